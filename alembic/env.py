@@ -7,6 +7,9 @@ from sqlalchemy import engine_from_config, pool
 from sqlalchemy.ext.declarative import declarative_base
 
 from alembic import context
+from models.login_attempt import LoginAttempt  # noqa: F401 (registers the table on User.metadata)
+from models.summary import Summary  # noqa: F401 (registers the table on User.metadata)
+from models.transcript import Transcript  # noqa: F401 (registers the table on User.metadata)
 from models.user import User
 
 Base = declarative_base()
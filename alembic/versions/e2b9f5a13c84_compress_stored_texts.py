@@ -0,0 +1,49 @@
+"""Store summary and transcript texts as compressed blobs, with their zstd dictionaries
+
+Revision ID: e2b9f5a13c84
+Revises: d8a4c7f20e19
+Create Date: 2026-10-19 19:12:48.904311
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b9f5a13c84'
+down_revision: Union[str, None] = 'd8a4c7f20e19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Existing texts become RAW blobs (format byte 0 + UTF-8, see utils/text_codec.py). Compress them with
+# python -m scripts.train_text_dictionary --recompress once a dictionary has been trained.
+TO_BLOB = "'\\x00'::bytea || convert_to({column}, 'UTF8')"
+# Only RAW blobs can be turned back into text in SQL; run the script with --decompress before downgrading
+TO_TEXT = "convert_from(substring({column} from 2), 'UTF8')"
+
+
+def upgrade() -> None:
+    # The dictionaries the blobs are compressed with (see utils/text_codec.py); rows are never deleted
+    op.create_table(
+        'text_dictionaries',
+        sa.Column('dict_id', sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column('dictionary', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('dict_id'),
+    )
+    op.create_index('ix_text_dictionaries_created_at', 'text_dictionaries', ['created_at'], unique=False)
+    op.execute(f"ALTER TABLE summaries ALTER COLUMN summary TYPE bytea USING {TO_BLOB.format(column='summary')}")
+    op.execute(
+        f"ALTER TABLE transcripts ALTER COLUMN transcript TYPE bytea USING {TO_BLOB.format(column='transcript')}"
+    )
+
+
+def downgrade() -> None:
+    op.execute(f"ALTER TABLE summaries ALTER COLUMN summary TYPE text USING {TO_TEXT.format(column='summary')}")
+    op.execute(
+        f"ALTER TABLE transcripts ALTER COLUMN transcript TYPE text USING {TO_TEXT.format(column='transcript')}"
+    )
+    op.drop_index('ix_text_dictionaries_created_at', table_name='text_dictionaries')
+    op.drop_table('text_dictionaries')
@@ -6,26 +6,54 @@ and services for database operations, user auth, and external API interactions.
 """
 
 import argparse
+import functools
+import json
 import logging
+import math
 import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Dict, Optional
 
 import colorama
-from dotenv import load_dotenv
-from fastapi import Depends, FastAPI, HTTPException, Request, status
+from fastapi import BackgroundTasks, Depends, FastAPI, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
-import uvicorn
 
 from models.api_models import SummarizeRequest, UserCreate
+from models.summary import Summary
 from services.user_auth_service import UserAuthService
-from services.dependencies import get_user_auth_service2, get_current_user
+from repositories.repository_interfaces import IUserRepository
+from repositories.repository_provider import get_repository
+from services.dependencies import get_user_auth_service2, get_current_user, get_login_throttle_service
+from services.dependencies import get_current_admin_user, get_related_video_service, get_summary_history_service
+from services.dependencies import get_llm_scheduler, get_summarize_admission_controller, get_summarize_memory_budget
+from services.dependencies import get_summary_reuse_service
 from services.dependencies import get_youtube_service, get_openai_service
 from services.openai_api_service import OpenAIAPIService
+from services.admission_control_service import AdmissionRejectedError, estimate_summarize_memory
+from services.service_interfaces import (
+    IAdmissionController, ILLMScheduler, ILoginThrottleService, IRelatedVideoService, ISummaryHistoryService,
+    ISummaryReuseService
+)
 from services.youtube_api_service import YouTubeAPIService
+from utils.bulkhead import (
+    BCRYPT, DATABASE, OPENAI, YOUTUBE_DATA, YOUTUBE_TRANSCRIPT, BulkheadFullError, get_bulkhead, run_in_bulkhead
+)
+from utils.deadline import ClientDisconnectedError, DeadlineExceededError, request_deadline, run_stage
+from utils.metrics import STAGE_DURATION_SECONDS, mark_worker_stopped, render_metrics
+from utils.request_metrics import RequestMetricsMiddleware
+from utils.server_utils import get_server_options, prepare_multiprocess_metrics
+from utils.slow_requests import get_slow_request_log
+from utils.tracing import TracingMiddleware, annotate, span
+from utils.settings import get_settings
 from utils.text_utils import extract_video_id
 
 colorama.init()
-load_dotenv()
+# Load the .env file, once for the whole process (see utils/settings.py)
+get_settings()
 
 # Configure logging
 logging.basicConfig(
@@ -36,7 +64,37 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+# Users per chunk of the NDJSON export, also the page size used to read them
+EXPORT_BATCH_SIZE = 1000
+# Secrets that never leave the server
+EXPORT_EXCLUDED_FIELDS = ("password_hash", "token")
+
+# Page size of the summary history
+DEFAULT_SUMMARY_PAGE_SIZE = 20
+MAX_SUMMARY_PAGE_SIZE = 100
+
+# Results per search and the longest accepted query
+DEFAULT_SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 50
+MAX_SEARCH_QUERY_LENGTH = 200
+
+# Number of related videos returned by default and at most
+DEFAULT_RELATED_VIDEOS = 5
+MAX_RELATED_VIDEOS = 50
+
+# Number of slow requests listed by default and at most
+DEFAULT_SLOW_REQUESTS = 20
+MAX_SLOW_REQUESTS = 1000
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    """Run the worker; on shutdown, drop its live gauges from the metrics shared by all workers."""
+    yield
+    mark_worker_stopped()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS middleware setup
 app.add_middleware(
@@ -45,7 +103,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets the frontend read where the time of a request went (see utils/tracing.py)
+    expose_headers=["Server-Timing"],
 )
+app.add_middleware(RequestMetricsMiddleware)
+# Added last, so it is the outermost middleware and its root span covers everything else
+app.add_middleware(TracingMiddleware)
+
+
+@app.exception_handler(BulkheadFullError)
+async def bulkhead_full_handler(request: Request, error: BulkheadFullError) -> JSONResponse:
+    """Answer requests whose upstream dependency is saturated with 503, without waiting for it."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": f"Service temporarily unavailable ({error.name} is saturated), try again later"},
+        headers={"Retry-After": "1"},
+    )
 
 
 @app.get("/")
@@ -55,6 +128,13 @@ async def root_endpoint():
     raise HTTPException(status_code=403, detail="Access to this endpoint is forbidden")
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint() -> Response:
+    """Expose the Prometheus metrics of all workers (see utils/metrics.py)."""
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
+
 @app.get("/health")
 async def health_endpoint():
     """Endpoint to check the health status of the API."""
@@ -77,7 +157,8 @@ async def register_endpoint(
     """
     logger.info(f"Received registration request: {user.username}, {user.email}")
     try:
-        user_auth_service.register_user(user.username, user.email, user.password)
+        # bcrypt takes a CPU for a while; on its own bulkhead it cannot block the event loop
+        await run_in_bulkhead(BCRYPT, user_auth_service.register_user, user.username, user.email, user.password)
         logger.info(f"User registered successfully: {user.username}")
         return {"message": "User registered successfully"}
     except ValueError as e:
@@ -87,22 +168,40 @@ async def register_endpoint(
 
 @app.post("/token")
 async def token_endpoint(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    user_auth_service: UserAuthService = Depends(get_user_auth_service2)
+    user_auth_service: UserAuthService = Depends(get_user_auth_service2),
+    login_throttle_service: ILoginThrottleService = Depends(get_login_throttle_service),
 ):
     """Endpoint for user login and token generation.
 
     Args:
+        request: The incoming request, used for the client IP.
         form_data: The login credentials.
         user_auth_service: injected service which does authentication
+        login_throttle_service: injected service which throttles login attempts
     Returns: A dictionary containing the access token and token type.
-    Raises: HTTPException: If login fails due to invalid credentials or other errors.
+    Raises: HTTPException: If login fails due to invalid credentials, throttling or other errors.
     """
     logger.info(f"Login attempt received for user: {form_data.username}")
+
+    # Throttle before authenticate_user so a flood of attempts never reaches bcrypt
+    client_ip = request.client.host if request.client else "unknown"
+    # With the postgres backend the throttle makes database round trips, kept off the event loop
+    retry_after = await run_in_bulkhead(DATABASE, login_throttle_service.check, form_data.username, client_ip)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
     try:
-        user = user_auth_service.authenticate_user(
-            form_data.username, form_data.password
+        # bcrypt takes a CPU for a while; on its own bulkhead it cannot block the event loop
+        user = await run_in_bulkhead(
+            BCRYPT, user_auth_service.authenticate_user, form_data.username, form_data.password
         )
+        await run_in_bulkhead(DATABASE, login_throttle_service.record_result, form_data.username, success=bool(user))
         if not user:
             logger.warning(f"Invalid credentials for user: {form_data.username}")
             raise HTTPException(
@@ -112,7 +211,7 @@ async def token_endpoint(
         access_token = user_auth_service.generate_token(user)
         logger.info(f"Login successful for user: {form_data.username}")
         return {"access_token": access_token, "token_type": "bearer"}
-    except HTTPException:
+    except (HTTPException, BulkheadFullError):
         raise
     except Exception as e:
         logger.error(f"Unexpected error during login: {str(e)}")
@@ -125,32 +224,64 @@ async def token_endpoint(
 @app.post("/summarize")
 async def summarize_endpoint(
     summarize_request: SummarizeRequest,
+    background_tasks: BackgroundTasks,
     current_user: str = Depends(get_current_user),
     youtube_service: YouTubeAPIService = Depends(get_youtube_service),
-    openai_service: OpenAIAPIService = Depends(get_openai_service)
+    openai_service: OpenAIAPIService = Depends(get_openai_service),
+    summary_history_service: ISummaryHistoryService = Depends(get_summary_history_service),
+    related_video_service: IRelatedVideoService = Depends(get_related_video_service),
+    summary_reuse_service: ISummaryReuseService = Depends(get_summary_reuse_service),
+    admission_controller: IAdmissionController = Depends(get_summarize_admission_controller),
+    memory_budget: IAdmissionController = Depends(get_summarize_memory_budget),
+    llm_scheduler: ILLMScheduler = Depends(get_llm_scheduler),
+    timeout_seconds: float = Depends(request_deadline),
 ):
     """Endpoint to summarize a YouTube video transcript.
 
     This endpoint processes a request to summarize a YouTube video. It extracts the video ID,
-    retrieves the transcript and metadata, and generates a summary using OpenAI's API.
+    retrieves the transcript and metadata, and generates a summary using OpenAI's API, unless a
+    summary with the same parameters exists for a near-identical transcript (a re-upload of the same
+    content). The summary is stored in the user's history and indexed for related videos after the
+    response has been sent.
 
     Args:
         summarize_request: The request containing video URL and summarization parameters.
+        background_tasks: Tasks run after the response is sent (injected by FastAPI).
         current_user: The authenticated user making the request (injected by FastAPI).
         youtube_service: Service for interacting with YouTube API (injected by FastAPI).
         openai_service: Service for interacting with OpenAI API (injected by FastAPI).
+        summary_history_service: Service storing the summary in the user's history (injected by FastAPI).
+        related_video_service: Service indexing the summary for related videos (injected by FastAPI).
+        summary_reuse_service: Service finding summaries of near-identical transcripts (injected by FastAPI).
+        admission_controller: Limits the summarizations in flight (injected by FastAPI).
+        memory_budget: Limits the memory reserved by summarizations in flight (injected by FastAPI).
+        llm_scheduler: Shares the LLM calls fairly between users and priorities (injected by FastAPI).
+        timeout_seconds: The request's deadline, from X-Request-Timeout or REQUEST_TIMEOUT_SECONDS; the
+            upstream calls share it and are abandoned when the client disconnects (injected by FastAPI).
 
     Returns:
         A dictionary containing the generated summary, word count, and video metadata.
 
     Raises:
-        HTTPException: If there's an error in video ID extraction, transcript retrieval, or summarization.
+        HTTPException: If there's an error in video ID extraction, transcript retrieval, or summarization,
+            or with 503 and Retry-After if the server is saturated (413 if the transcript can never fit the
+            worker's memory budget or 503 if an upstream's bulkhead is saturated), with 504 if the deadline passed
+            and 499 if the client disconnected.
     """
-    logger.info(f"Received summarize request from user: {current_user}")
+    logger.info(f"Received summarize request from user: {current_user} (deadline {timeout_seconds:.1f}s)")
 
+    # Shed load before any upstream call: a fast 503 is better than a request that times out anyway
+    try:
+        with span("admission"):
+            admitted_at = await admission_controller.acquire()
+    except AdmissionRejectedError as e:
+        raise _admission_rejected(e)
+
+    memory_bytes, memory_reserved_at = 0, None
     try:
         # Extract video ID from the provided URL
-        video_id = extract_video_id(summarize_request.video_url)
+        with span("extract"), STAGE_DURATION_SECONDS.labels(stage="extract").time():
+            video_id = extract_video_id(summarize_request.video_url)
         if not video_id:
             logger.error(f"Invalid YouTube URL: {summarize_request.video_url}")
             raise HTTPException(status_code=400, detail="Invalid YouTube URL")
@@ -158,43 +289,295 @@ async def summarize_endpoint(
         logger.info(f"Extracted video ID: {video_id}")
 
         # Retrieve transcript and metadata
-        transcript = youtube_service.get_youtube_transcript(video_id, include_timestamps=False)
+        transcript_start = time.perf_counter()
+        # Each stage gets a share of the time left; the summary takes whatever the YouTube calls left over
+        transcript = await run_stage(
+            "transcript",
+            0.3,
+            youtube_service.get_youtube_transcript,
+            video_id,
+            include_timestamps=False,
+            bulkhead=get_bulkhead(YOUTUBE_TRANSCRIPT),
+        )
         if not transcript:
             logger.error(f"Failed to retrieve transcript for video ID: {video_id}")
             raise HTTPException(status_code=400, detail="Failed to retrieve transcript")
 
-        metadata = youtube_service.get_video_metadata(video_id)
-
-        logger.info(f"Transcript retrieved. Length: {len(' '.join(transcript))} characters")
-
-        # Generate summary using OpenAI service
-        summary = openai_service.summarize_text(
-            " ".join(transcript),
-            metadata,
-            summarize_request.summary_length,
-            summarize_request.used_model,
+        metadata = await run_stage(
+            "metadata", 0.15, youtube_service.get_video_metadata, video_id, bulkhead=get_bulkhead(YOUTUBE_DATA)
         )
+        transcript_seconds = time.perf_counter() - transcript_start
+
+        # Reserve the memory the rest of the request needs, so a few long transcripts cannot exhaust the worker
+        memory_bytes = estimate_summarize_memory(transcript)
+        with span("memory_reservation", bytes=memory_bytes):
+            memory_reserved_at = await memory_budget.acquire(memory_bytes)
+
+        transcript_text = " ".join(transcript)
+        logger.info(f"Transcript retrieved. Length: {len(transcript_text)} characters")
+        annotate(transcript_chars=len(transcript_text), model=summarize_request.used_model)
+
+        # Reuse the summary of a near-identical transcript, or generate one using OpenAI service
+        summary_start = time.perf_counter()
+        with span("reuse_lookup") as lookup_span:
+            fingerprint = await summary_reuse_service.fingerprint(transcript_text)
+            reused_summary = await summary_reuse_service.find_reusable(
+                fingerprint, summarize_request.summary_length, summarize_request.used_model
+            )
+            if lookup_span is not None:
+                lookup_span.set_attribute("hit", reused_summary is not None)
+        annotate(summary_reuse="hit" if reused_summary is not None else "miss")
+        if reused_summary is not None:
+            summary = reused_summary.summary
+            token_usage = {}
+        else:
+            # Wait for this user's fair share of the LLM, so one user's batch cannot hold up everyone else
+            with span("llm_queue", priority=summarize_request.priority):
+                await llm_scheduler.acquire(current_user, summarize_request.priority)
+            # The slot is released when the LLM call is over, even if the request stopped waiting for it
+            summary = await run_stage(
+                "llm",
+                1.0,
+                openai_service.summarize_text,
+                transcript_text,
+                metadata,
+                summarize_request.summary_length,
+                summarize_request.used_model,
+                bulkhead=get_bulkhead(OPENAI),
+                on_finished=functools.partial(llm_scheduler.release, current_user, summarize_request.priority),
+            )
+            token_usage = _token_usage(openai_service)
+            annotate(**token_usage)
+            background_tasks.add_task(summary_reuse_service.remember, video_id, fingerprint)
+        summary_seconds = time.perf_counter() - summary_start
         logger.info(f"Summary generated. Length: {len(summary)} characters")
 
         word_count = len(summary.split())
 
+        if summary:
+            stored_summary = Summary(
+                video_id=video_id,
+                video_title=str(metadata.get("title"))[:500] if isinstance(metadata, dict) else None,
+                summary_length=summarize_request.summary_length,
+                used_model=summarize_request.used_model,
+                summary=summary,
+                word_count=word_count,
+                transcript_seconds=transcript_seconds,
+                summary_seconds=summary_seconds,
+                created_at=datetime.utcnow(),
+                **token_usage,
+            )
+            background_tasks.add_task(related_video_service.add_summary, stored_summary)
+            background_tasks.add_task(summary_history_service.record, current_user, stored_summary, transcript_text)
+
         return {
             "summary": summary,
             "word_count": word_count,
             "metadata": metadata,
         }
+    except AdmissionRejectedError as e:
+        raise _admission_rejected(e)
+    except BulkheadFullError:
+        # Answered with 503 by bulkhead_full_handler
+        raise
+    except DeadlineExceededError as e:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=f"Deadline exceeded during {e.stage}")
+    except ClientDisconnectedError as e:
+        # Nobody reads the response; the status is for the access log (nginx's "client closed request")
+        raise HTTPException(status_code=499, detail=str(e))
     except Exception as e:
         logger.exception(f"Error in summarize endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
+    finally:
+        if memory_reserved_at is not None:
+            memory_budget.release(memory_reserved_at, memory_bytes)
+        admission_controller.release(admitted_at)
+
+
+def _admission_rejected(error: AdmissionRejectedError) -> HTTPException:
+    """Return the response to a request shed by admission control."""
+    if error.reason == "too_large":
+        return HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Transcript is too long to summarize"
+        )
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy, try again later",
+        headers={"Retry-After": str(math.ceil(error.retry_after))},
+    )
+
+
+def _token_usage(openai_service: OpenAIAPIService) -> Dict[str, int]:
+    """Return the token usage of the service's last call, or an empty dict if it reported none."""
+    usage = getattr(openai_service, "last_usage", None)
+    if not isinstance(usage, dict):
+        return {}
+    return {name: value for name, value in usage.items() if isinstance(value, int)}
+
+
+@app.get("/summaries")
+async def list_summaries_endpoint(
+    limit: int = Query(DEFAULT_SUMMARY_PAGE_SIZE, ge=1, le=MAX_SUMMARY_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: str = Depends(get_current_user),
+    summary_history_service: ISummaryHistoryService = Depends(get_summary_history_service),
+):
+    """Endpoint listing the current user's summaries, newest first.
+
+    Args:
+        limit: Maximum number of summaries per page.
+        cursor: The next_cursor of the previous page, omitted for the first page.
+        current_user: The authenticated user (injected by FastAPI).
+        summary_history_service: Service for the summary history (injected by FastAPI).
+    Returns: A dictionary with the summaries (without their text) and the cursor of the next page.
+    Raises: HTTPException: If the cursor is invalid.
+    """
+    try:
+        summaries, next_cursor = await summary_history_service.list_summaries(current_user, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": [summary.to_list_item() for summary in summaries], "next_cursor": next_cursor}
+
+
+@app.get("/summaries/{summary_id}")
+async def get_summary_endpoint(
+    summary_id: int,
+    current_user: str = Depends(get_current_user),
+    summary_history_service: ISummaryHistoryService = Depends(get_summary_history_service),
+):
+    """Endpoint returning one of the current user's stored summaries, without calling the LLM again.
+
+    Args:
+        summary_id: The ID of the summary.
+        current_user: The authenticated user (injected by FastAPI).
+        summary_history_service: Service for the summary history (injected by FastAPI).
+    Returns: The stored summary with its parameters, token usage and timings.
+    Raises: HTTPException: If the summary does not exist or belongs to another user.
+    """
+    summary = await summary_history_service.get_summary(current_user, summary_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Summary not found")
+    summary_data = summary.to_dict()
+    summary_data.pop("user_id")
+    return summary_data
+
+
+@app.get("/search")
+async def search_endpoint(
+    q: str = Query(..., min_length=1, max_length=MAX_SEARCH_QUERY_LENGTH),
+    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT),
+    current_user: str = Depends(get_current_user),
+    summary_history_service: ISummaryHistoryService = Depends(get_summary_history_service),
+):
+    """Endpoint searching the current user's summaries and the transcripts of all summarized videos.
+
+    Args:
+        q: The search terms.
+        limit: Maximum number of results.
+        current_user: The authenticated user (injected by FastAPI).
+        summary_history_service: Service for the summary history (injected by FastAPI).
+    Returns: A dictionary with the results, best first, each with a snippet highlighting the matches in <b></b>.
+    """
+    hits = await summary_history_service.search(current_user, q, limit)
+    return {"results": hits}
+
+
+@app.get("/videos/{video_id}/related")
+async def related_videos_endpoint(
+    video_id: str,
+    limit: int = Query(DEFAULT_RELATED_VIDEOS, ge=1, le=MAX_RELATED_VIDEOS),
+    current_user: str = Depends(get_current_user),
+    related_video_service: IRelatedVideoService = Depends(get_related_video_service),
+):
+    """Endpoint listing the summarized videos most similar to a summarized video.
+
+    Args:
+        video_id: The YouTube video ID.
+        limit: Maximum number of videos.
+        current_user: The authenticated user (injected by FastAPI).
+        related_video_service: Service for related videos (injected by FastAPI).
+    Returns: A dictionary with the related videos, most similar first.
+    Raises: HTTPException: If the video has not been summarized yet.
+    """
+    related = await related_video_service.find_related(video_id, limit)
+    if related is None:
+        raise HTTPException(status_code=404, detail="Video has not been summarized")
+    return {"related": related}
+
+
+@app.get("/admin/users/export")
+async def export_users_endpoint(
+    admin_user: str = Depends(get_current_admin_user),
+    repository: IUserRepository = Depends(get_repository),
+):
+    """Endpoint streaming all users as NDJSON (one JSON object per line), for admins only.
+
+    Users are read page by page and sent as they are read, so memory use does not grow with the
+    number of users. Password hashes and tokens are left out.
+
+    Args:
+        admin_user: The authenticated admin (injected by FastAPI).
+        repository: The user repository (injected by FastAPI).
+    Returns: A streaming application/x-ndjson response.
+    """
+    logger.info(f"User export requested by {admin_user}")
+
+    def generate_lines():
+        lines = []
+        for user in repository.iter_all(EXPORT_BATCH_SIZE):
+            user_data = user.to_dict()
+            for field in EXPORT_EXCLUDED_FIELDS:
+                user_data.pop(field, None)
+            lines.append(json.dumps(user_data) + "\n")
+            if len(lines) >= EXPORT_BATCH_SIZE:
+                yield "".join(lines)
+                lines = []
+        if lines:
+            yield "".join(lines)
+
+    # A sync generator is iterated in the threadpool, so reading pages never blocks the event loop
+    return StreamingResponse(generate_lines(), media_type="application/x-ndjson")
+
+
+@app.get("/debug/slow")
+async def slow_requests_endpoint(
+    limit: int = Query(DEFAULT_SLOW_REQUESTS, ge=1, le=MAX_SLOW_REQUESTS),
+    admin_user: str = Depends(get_current_admin_user),
+):
+    """Endpoint listing this worker's latest slow requests with their stage breakdown, for admins only.
+
+    Args:
+        limit: Maximum number of requests.
+        admin_user: The authenticated admin (injected by FastAPI).
+    Returns: A dictionary with the log's threshold and capacity and the slow requests, newest first
+        (see utils/slow_requests.py).
+    """
+    logger.info(f"Slow requests requested by {admin_user}")
+    slow_request_log = get_slow_request_log()
+    return {
+        "threshold_seconds": slow_request_log.threshold_seconds,
+        "capacity": slow_request_log.max_entries,
+        "requests": slow_request_log.entries(limit),
+    }
 
 
 if __name__ == "__main__":
     # Parse command-line arguments
     parser = argparse.ArgumentParser(description="Run the FastAPI application")
     parser.add_argument("--no-reload", action="store_false", dest="reload", help="Disable auto-reload")
+    parser.add_argument(
+        "--prod", action="store_true", help="Run several workers with production settings (see utils/server_utils.py)"
+    )
+    parser.add_argument("--workers", type=int, help="Number of worker processes with --prod (default: CPU count)")
     args = parser.parse_args()
 
-    # Run the FastAPI application using uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=args.reload)
+    # Run the FastAPI application using uvicorn (imported here, the workers only import main:app)
+    import uvicorn
+
+    server_options = get_server_options(args.prod, workers=args.workers, reload=args.reload)
+    if args.prod:
+        logger.info(f"Aggregating the workers' metrics in {prepare_multiprocess_metrics()}")
+    logger.info(f"Starting server with {server_options}")
+    uvicorn.run("main:app", **server_options)
     # Note: The host "0.0.0.0" allows the server to be accessible from any IP address.
-    #       For production, consider using a more restrictive host setting.
+    #       For production, consider using a more restrictive host setting (HOST environment variable).
@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic import BaseModel
 
 
@@ -6,6 +8,8 @@ class SummarizeRequest(BaseModel):
     video_url: str
     summary_length: int
     used_model: str
+    # Batch jobs get a smaller share of the LLM capacity while interactive requests are waiting
+    priority: Literal["interactive", "batch"] = "interactive"
 
 
 class UserCreate(BaseModel):
@@ -13,3 +17,20 @@ class UserCreate(BaseModel):
     username: str
     email: str
     password: str
+
+
+class SearchHit(BaseModel):
+    """A search result: a matching summary of the user or a matching transcript."""
+    video_id: str
+    video_title: Optional[str] = None
+    source: str  # "summary" or "transcript"
+    summary_id: Optional[int] = None
+    rank: float
+    snippet: str
+
+
+class RelatedVideo(BaseModel):
+    """A video whose stored summary is similar to the summary of another video."""
+    video_id: str
+    video_title: Optional[str] = None
+    score: float
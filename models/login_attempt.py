@@ -0,0 +1,22 @@
+"""SQLAlchemy model for login attempts shared between workers for throttling."""
+
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String
+
+from models.user import Base
+
+
+class LoginAttempt(Base):
+    """SQLAlchemy model for the login_attempts table.
+
+    Each row is one login attempt counted against a throttle key (identifier or client IP).
+    """
+
+    __tablename__ = "login_attempts"
+
+    attempt_id = Column(BigInteger().with_variant(Integer(), "sqlite"), primary_key=True)
+    throttle_key = Column(String(320), nullable=False)
+    attempted_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_login_attempts_key_attempted_at", "throttle_key", "attempted_at"),
+    )
@@ -0,0 +1,94 @@
+"""SQLAlchemy model and utility methods for stored summaries."""
+
+from datetime import datetime
+from typing import Dict
+
+from sqlalchemy import BigInteger, Column, DateTime, Float, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
+
+from models.user import Base
+from utils.text_codec import CompressedText
+
+# Columns returned by the history listing; the listing index includes them so it is answered from the index alone
+SUMMARY_LIST_COLUMNS = (
+    "summary_id", "video_id", "video_title", "summary_length", "used_model", "word_count", "created_at"
+)
+
+
+class Summary(Base):
+    """SQLAlchemy model for the summaries table.
+
+    Each row is one summary produced by summarize_endpoint for a user, together with the request
+    parameters, the token usage reported by OpenAI and the time spent per stage.
+    """
+
+    __tablename__ = "summaries"
+
+    summary_id = Column(BigInteger().with_variant(Integer(), "sqlite"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    video_id = Column(String(32), nullable=False)
+    video_title = Column(String(500), nullable=True)
+    summary_length = Column(Integer, nullable=False)
+    used_model = Column(String(100), nullable=False)
+    summary = Column(CompressedText, nullable=False)
+    word_count = Column(Integer, nullable=False)
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    total_tokens = Column(Integer, nullable=True)
+    transcript_seconds = Column(Float, nullable=True)
+    summary_seconds = Column(Float, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Full-text search document (title and summary), filled in by SummaryDBRepository.add on Postgres
+    search_vector = deferred(Column(TSVECTOR().with_variant(Text(), "sqlite"), nullable=True))
+
+    __table_args__ = (
+        # Keyset pagination walks this index backwards: WHERE user_id = ? AND (created_at, summary_id) < (?, ?)
+        Index(
+            "ix_summaries_user_id_created_at", "user_id", "created_at", "summary_id",
+            postgresql_include=["video_id", "video_title", "summary_length", "used_model", "word_count"],
+        ),
+        Index("ix_summaries_search_vector", "search_vector", postgresql_using="gin"),
+        # Lookup of an existing summary to reuse for a near-duplicate transcript
+        Index("ix_summaries_video_id", "video_id", "summary_length", "used_model", "created_at"),
+    )
+
+    def to_dict(self) -> Dict:
+        """Convert Summary instance to a dictionary.
+
+        Returns: Dictionary representation of the Summary.
+        """
+        return {
+            "summary_id": self.summary_id,
+            "user_id": self.user_id,
+            "video_id": self.video_id,
+            "video_title": self.video_title,
+            "summary_length": self.summary_length,
+            "used_model": self.used_model,
+            "summary": self.summary,
+            "word_count": self.word_count,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "transcript_seconds": self.transcript_seconds,
+            "summary_seconds": self.summary_seconds,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
+    def to_list_item(self) -> Dict:
+        """Return the fields shown in the history listing (SUMMARY_LIST_COLUMNS, no summary text)."""
+        item = {column: getattr(self, column) for column in SUMMARY_LIST_COLUMNS}
+        item["created_at"] = self.created_at.isoformat() if self.created_at else None
+        return item
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Summary":
+        """Create a Summary instance from a dictionary.
+
+        Args:
+            data: Dictionary containing summary data.
+        Returns: Summary instance created from the dictionary data.
+        """
+        values = dict(data)
+        values["created_at"] = datetime.fromisoformat(data["created_at"]) if data.get("created_at") else None
+        return cls(**values)
@@ -0,0 +1,26 @@
+"""SQLAlchemy model for the zstd dictionaries stored texts are compressed with."""
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, Index, LargeBinary
+
+from models.user import Base
+
+
+class TextDictionary(Base):
+    """SQLAlchemy model for the text_dictionaries table.
+
+    One row per trained dictionary, kept forever so old blobs stay readable; the newest one is used
+    for new blobs (see utils.text_codec).
+    """
+
+    __tablename__ = "text_dictionaries"
+
+    # zstd dictionary ids are unsigned 32-bit integers
+    dict_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    dictionary = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_text_dictionaries_created_at", "created_at"),
+    )
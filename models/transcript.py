@@ -0,0 +1,30 @@
+"""SQLAlchemy model for stored video transcripts."""
+
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Index, String, Text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
+
+from models.user import Base
+from utils.text_codec import CompressedText
+
+
+class Transcript(Base):
+    """SQLAlchemy model for the transcripts table.
+
+    One row per video, stored the first time the video is summarized so it can be searched.
+    """
+
+    __tablename__ = "transcripts"
+
+    video_id = Column(String(32), primary_key=True)
+    video_title = Column(String(500), nullable=True)
+    transcript = Column(CompressedText, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Full-text search document (weighted title and transcript), filled in by the search repository
+    search_vector = deferred(Column(TSVECTOR().with_variant(Text(), "sqlite"), nullable=True))
+
+    __table_args__ = (
+        Index("ix_transcripts_search_vector", "search_vector", postgresql_using="gin"),
+    )
@@ -0,0 +1,65 @@
+"""Adapter exposing a synchronous IUserRepository through the IAsyncUserRepository interface."""
+
+from itertools import islice
+from typing import AsyncIterator, List, Optional
+
+from models.user import User
+from utils.bulkhead import DATABASE, run_in_bulkhead
+from .repository_interfaces import IAsyncUserRepository, IUserRepository
+
+
+class AsyncUserRepositoryAdapter(IAsyncUserRepository):
+    """Run a synchronous repository's calls on the database bulkhead (see utils.bulkhead), off the event loop.
+
+    Used for the JSON and SQLite repositories, which have no native async driver.
+    """
+
+    def __init__(self, repository: IUserRepository):
+        """Initialize the adapter with the synchronous repository to wrap."""
+        self.repository = repository
+
+    async def get_by_id(self, user_id: int) -> Optional[User]:
+        """Retrieve a user by their ID."""
+        return await run_in_bulkhead(DATABASE, self.repository.get_by_id, user_id)
+
+    async def get_by_identifier(self, identifier: str) -> Optional[User]:
+        """Retrieve a user by their identifier (username)."""
+        return await run_in_bulkhead(DATABASE, self.repository.get_by_identifier, identifier)
+
+    async def get_by_email(self, email: str) -> Optional[User]:
+        """Retrieve a user by their email address."""
+        return await run_in_bulkhead(DATABASE, self.repository.get_by_email, email)
+
+    async def get_all(self) -> List[User]:
+        """Retrieve all users."""
+        return await run_in_bulkhead(DATABASE, self.repository.get_all)
+
+    async def create(self, user: User) -> User:
+        """Create a new user."""
+        return await run_in_bulkhead(DATABASE, self.repository.create, user)
+
+    async def update(self, user: User) -> User:
+        """Update an existing user."""
+        return await run_in_bulkhead(DATABASE, self.repository.update, user)
+
+    async def delete(self, user: User) -> None:
+        """Delete a user."""
+        await run_in_bulkhead(DATABASE, self.repository.delete, user)
+
+    async def get_many(self, identifiers: List[str]) -> List[User]:
+        """Retrieve the users with the given identifiers (usernames)."""
+        return await run_in_bulkhead(DATABASE, self.repository.get_many, identifiers)
+
+    async def create_many(self, users: List[User]) -> List[User]:
+        """Create several users in one batch."""
+        return await run_in_bulkhead(DATABASE, self.repository.create_many, users)
+
+    async def iter_all(self, batch_size: int = 1000) -> AsyncIterator[User]:
+        """Iterate over all users, pulling each batch from the synchronous iterator on the database bulkhead."""
+        iterator = self.repository.iter_all(batch_size)
+        while True:
+            batch = await run_in_bulkhead(DATABASE, lambda: list(islice(iterator, batch_size)))
+            for user in batch:
+                yield user
+            if len(batch) < batch_size:
+                return
@@ -0,0 +1,65 @@
+"""Database-based implementation of the ILoginAttemptRepository interface.
+
+Sharing attempts through Postgres makes the throttle limits apply across all workers and nodes
+instead of per process.
+"""
+
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.orm import Session
+
+from models.login_attempt import LoginAttempt
+from utils.db_routing import use_primary
+from .repository_interfaces import ILoginAttemptRepository
+
+
+class LoginAttemptDBRepository(ILoginAttemptRepository):
+    """Sliding-window attempt log stored in the login_attempts table."""
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        """Initialize the repository.
+
+        Args:
+            session_factory: Callable returning a new SQLAlchemy session. A short-lived session is
+                used per call so no connection is held between login attempts.
+        """
+        self.session_factory = session_factory
+
+    def hit(self, key: str, limit: int, window_seconds: float) -> float:
+        """Record an attempt for key unless the window is already full.
+
+        Concurrent attempts for the same key (from any worker) are serialized, so they cannot all
+        count below the limit and all be recorded.
+        """
+        now = datetime.utcnow()
+        window_start = now - timedelta(seconds=window_seconds)
+        with self.session_factory() as session, use_primary(session):
+            # The count has to see our own inserts, so never read it from a replica
+            if session.get_bind().dialect.name == "postgresql":
+                # Held until commit: under READ COMMITTED the count alone would not see concurrent inserts
+                session.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": key})
+            # Expired rows for this key are never counted again, so drop them while we are here
+            session.execute(
+                delete(LoginAttempt).where(
+                    LoginAttempt.throttle_key == key, LoginAttempt.attempted_at <= window_start
+                )
+            )
+            count, oldest = session.execute(
+                select(func.count(), func.min(LoginAttempt.attempted_at)).where(
+                    LoginAttempt.throttle_key == key, LoginAttempt.attempted_at > window_start
+                )
+            ).one()
+            if count >= limit:
+                session.commit()
+                return max((oldest + timedelta(seconds=window_seconds) - now).total_seconds(), 0.001)
+            session.add(LoginAttempt(throttle_key=key, attempted_at=now))
+            session.commit()
+            return 0.0
+
+    def reset(self, key: str) -> None:
+        """Forget all recorded attempts for key."""
+        with self.session_factory() as session:
+            session.execute(delete(LoginAttempt).where(LoginAttempt.throttle_key == key))
+            session.commit()
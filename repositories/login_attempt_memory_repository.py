@@ -0,0 +1,59 @@
+"""In-memory implementation of the ILoginAttemptRepository interface."""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict
+
+from .repository_interfaces import ILoginAttemptRepository
+
+
+class LoginAttemptMemoryRepository(ILoginAttemptRepository):
+    """Sliding-window attempt log kept in process memory.
+
+    Each key keeps at most `limit` timestamps, so memory is bounded by the number of keys seen within
+    one window. Keys whose window has fully expired are swept periodically.
+    """
+
+    SWEEP_INTERVAL_SECONDS = 60.0
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        """Initialize the repository.
+
+        Args:
+            clock: Monotonic time source, injectable for tests.
+        """
+        self._clock = clock
+        self._attempts: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = clock()
+        self._max_window = 0.0
+
+    def hit(self, key: str, limit: int, window_seconds: float) -> float:
+        """Record an attempt for key unless the window is already full."""
+        now = self._clock()
+        with self._lock:
+            self._max_window = max(self._max_window, window_seconds)
+            if now - self._last_sweep >= self.SWEEP_INTERVAL_SECONDS:
+                self._sweep(now)
+
+            attempts = self._attempts.setdefault(key, deque())
+            while attempts and attempts[0] <= now - window_seconds:
+                attempts.popleft()
+            if len(attempts) >= limit:
+                return attempts[0] + window_seconds - now
+            attempts.append(now)
+            return 0.0
+
+    def reset(self, key: str) -> None:
+        """Forget all recorded attempts for key."""
+        with self._lock:
+            self._attempts.pop(key, None)
+
+    def _sweep(self, now: float) -> None:
+        """Drop keys whose most recent attempt has left every window (caller holds the lock)."""
+        expired = [key for key, attempts in self._attempts.items()
+                   if not attempts or attempts[-1] <= now - self._max_window]
+        for key in expired:
+            del self._attempts[key]
+        self._last_sweep = now
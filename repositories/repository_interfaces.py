@@ -1,7 +1,11 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from datetime import datetime
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
 
+from models.api_models import SearchHit
+from models.summary import Summary
 from models.user import User
+from utils.inverted_index import highlight, tokenize
 
 
 class IUserRepository(ABC):
@@ -40,4 +44,169 @@ class IUserRepository(ABC):
     @abstractmethod
     def delete(self, user: User) -> None:
         """Delete a user record."""
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def get_many(self, identifiers: List[str]) -> List[User]:
+        """Retrieve the users with the given identifiers (usernames); unknown identifiers are skipped."""
+        pass
+
+    @abstractmethod
+    def create_many(self, users: List[User]) -> List[User]:
+        """Create several user records in one batch; nothing is created if any of them already exists."""
+        pass
+
+    @abstractmethod
+    def iter_all(self, batch_size: int = 1000) -> Iterator[User]:
+        """Iterate over all users, loading at most batch_size of them at a time."""
+        pass
+
+class IAsyncUserRepository(ABC):
+    """Async interface for user data storage and retrieval operations."""
+
+    @abstractmethod
+    async def get_by_id(self, user_id: int) -> Optional[User]:
+        """Retrieve a user by their ID."""
+        pass
+
+    @abstractmethod
+    async def get_by_identifier(self, identifier: str) -> Optional[User]:
+        """Retrieve a user by their identifier (username or email)."""
+        pass
+
+    @abstractmethod
+    async def get_by_email(self, email: str) -> Optional[User]:
+        """Retrieve a user by their email address."""
+        pass
+
+    @abstractmethod
+    async def get_all(self) -> List[User]:
+        """Retrieve all users."""
+        pass
+
+    @abstractmethod
+    async def create(self, user: User) -> User:
+        """Create a new user record."""
+        pass
+
+    @abstractmethod
+    async def update(self, user: User) -> User:
+        """Update an existing user record."""
+        pass
+
+    @abstractmethod
+    async def delete(self, user: User) -> None:
+        """Delete a user record."""
+        pass
+
+    @abstractmethod
+    async def get_many(self, identifiers: List[str]) -> List[User]:
+        """Retrieve the users with the given identifiers (usernames); unknown identifiers are skipped."""
+        pass
+
+    @abstractmethod
+    async def create_many(self, users: List[User]) -> List[User]:
+        """Create several user records in one batch; nothing is created if any of them already exists."""
+        pass
+
+    @abstractmethod
+    def iter_all(self, batch_size: int = 1000) -> AsyncIterator[User]:
+        """Iterate over all users, loading at most batch_size of them at a time (async generator)."""
+        pass
+
+
+class ILoginAttemptRepository(ABC):
+    """Interface for sliding-window login attempt bookkeeping."""
+
+    @abstractmethod
+    def hit(self, key: str, limit: int, window_seconds: float) -> float:
+        """Record an attempt for key unless the window is already full.
+
+        Args:
+            key: The throttle key (e.g. an identifier or a client IP).
+            limit: Maximum number of attempts allowed within the window.
+            window_seconds: Length of the sliding window in seconds.
+        Returns: 0 if the attempt was recorded, otherwise the seconds until the next attempt is allowed.
+        """
+        pass
+
+    @abstractmethod
+    def reset(self, key: str) -> None:
+        """Forget all recorded attempts for key."""
+        pass
+
+
+class ISummaryRepository(ABC):
+    """Interface for storing and listing the summaries produced for users."""
+
+    @abstractmethod
+    def add(self, summary: Summary) -> Summary:
+        """Store a new summary and assign its summary_id."""
+        pass
+
+    @abstractmethod
+    def get(self, user_id: int, summary_id: int) -> Optional[Summary]:
+        """Retrieve one of a user's summaries; None if it does not exist or belongs to another user."""
+        pass
+
+    @abstractmethod
+    def list_for_user(
+        self, user_id: int, limit: int, before: Optional[Tuple[datetime, int]] = None
+    ) -> List[Summary]:
+        """List a user's summaries, newest first (keyset pagination).
+
+        Args:
+            user_id: The owner of the summaries.
+            limit: Maximum number of summaries to return.
+            before: (created_at, summary_id) of the last summary on the previous page, None for the first page.
+        Returns: Summaries with the fields of the listing loaded (the summary text may be missing).
+        """
+        pass
+
+    @abstractmethod
+    def find_latest_for_video(self, video_id: str, summary_length: int, used_model: str) -> Optional[Summary]:
+        """Retrieve the newest summary of a video made with the given parameters, by any user."""
+        pass
+
+
+class ISearchRepository(ABC):
+    """Interface for full-text search over stored summaries and transcripts."""
+
+    @abstractmethod
+    def index(self, summary: Summary, transcript: Optional[str] = None) -> None:
+        """Make a stored summary and, if given, the transcript of its video searchable.
+
+        Args:
+            summary: A summary with summary_id and user_id assigned.
+            transcript: The plain transcript text; each video's transcript is indexed once.
+        """
+        pass
+
+    @abstractmethod
+    def find(self, user_id: int, query: str, limit: int) -> List[Tuple[SearchHit, str]]:
+        """Search the user's summaries and all transcripts, without building snippets.
+
+        Args:
+            user_id: Only this user's summaries are searched (transcripts are shared).
+            query: Free text, as typed by the user.
+            limit: Maximum number of hits.
+        Returns: The best hits first, each with an empty snippet and the text of its document.
+        """
+        pass
+
+    def search(self, user_id: int, query: str, limit: int) -> List[SearchHit]:
+        """Search the user's summaries and all transcripts.
+
+        Args:
+            user_id: Only this user's summaries are searched (transcripts are shared).
+            query: Free text, as typed by the user.
+            limit: Maximum number of hits.
+        Returns: The best hits first, with highlighted snippets.
+        """
+        return self.with_snippets(self.find(user_id, query, limit), query)
+
+    @staticmethod
+    def with_snippets(found: List[Tuple[SearchHit, str]], query: str) -> List[SearchHit]:
+        """Return the hits returned by find, each with the snippet of its text that best matches query."""
+        terms = set(tokenize(query))
+        return [hit.model_copy(update={"snippet": highlight(text, terms)}) for hit, text in found]
@@ -2,45 +2,203 @@
 
 import logging
 import os
-from typing import Callable
+import threading
+from typing import Callable, Optional
 
 from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from utils.db_utils import get_db
-from .repository_interfaces import IUserRepository
+from utils import db_utils
+from utils.db_utils import get_async_db, get_db
+from utils.settings import get_settings
+from utils.sqlite_utils import DEFAULT_SQLITE_DATABASE_PATH, get_sqlite_session_factory
+from utils.user_cache import (
+    DEFAULT_USER_CACHE_MAX_ENTRIES, DEFAULT_USER_CACHE_TTL_SECONDS, UserCache, UserChangeListener
+)
+from .async_repository_adapter import AsyncUserRepositoryAdapter
+from .repository_interfaces import IAsyncUserRepository, ISearchRepository, ISummaryRepository, IUserRepository
+from .search_db_repository import SearchDBRepository
+from .search_index_repository import DEFAULT_SEARCH_INDEX_PATH, SearchIndexRepository
+from .summary_db_repository import SummaryDBRepository
+from .summary_json_repository import DEFAULT_SUMMARY_JSON_PATH, SummaryJsonRepository
+from .user_async_db_repository import AsyncUserDBRepository
+from .user_cached_repository import CachedAsyncUserRepository, CachedUserRepository
 from .user_db_repository import UserDBRepository
-from .user_json_repository import UserJsonRepository
+from .user_json_repository import DEFAULT_COMPACT_THRESHOLD_BYTES, UserJsonRepository
+from .user_sqlite_repository import UserSQLiteRepository
 
 logger = logging.getLogger(__name__)
 
 # Determine if we're running in a Continuous Integration (CI) environment
-IN_CI = os.getenv("CI") == "true" or os.getenv("GITHUB_ACTIONS") == "true"
+IN_CI = get_settings().in_ci
+
+
+def _delete_json_user_data(user_id: int) -> None:
+    """Remove a deleted user's summaries and search documents from the JSON stores (nothing cascades there)."""
+    SummaryJsonRepository.shared(os.getenv("SUMMARY_JSON_PATH", DEFAULT_SUMMARY_JSON_PATH)).delete_for_user(user_id)
+    _delete_search_documents(user_id)
+
+
+def _delete_search_documents(user_id: int) -> None:
+    """Remove a deleted user's summaries from the in-process search index."""
+    SearchIndexRepository.shared(os.getenv("SEARCH_INDEX_PATH", DEFAULT_SEARCH_INDEX_PATH)).delete_for_user(user_id)
+
+
+def _get_json_repository() -> UserJsonRepository:
+    """Return the process-wide JSON repository, journaled if USER_JSON_STORAGE=journal."""
+    return UserJsonRepository.shared(
+        "users.json",
+        journaled=os.getenv("USER_JSON_STORAGE", "snapshot") == "journal",
+        compact_threshold_bytes=int(
+            os.getenv("USER_JSON_COMPACT_THRESHOLD_BYTES", DEFAULT_COMPACT_THRESHOLD_BYTES)
+        ),
+        on_delete=_delete_json_user_data,
+    )
+
+
+def _get_sqlite_repository() -> UserSQLiteRepository:
+    """Return a SQLite repository bound to this worker's engine for SQLITE_DATABASE_PATH."""
+    return UserSQLiteRepository(
+        get_sqlite_session_factory(os.getenv("SQLITE_DATABASE_PATH", DEFAULT_SQLITE_DATABASE_PATH)),
+        on_delete=_delete_search_documents,
+    )
+
+
+_user_cache: Optional[UserCache] = None
+_user_cache_lock = threading.Lock()
+
+
+def get_user_cache() -> Optional[UserCache]:
+    """Return the worker's user cache for the postgres repository, or None if USER_CACHE_TTL_SECONDS is 0.
+
+    The cache is created on first use, i.e. after uvicorn forked the worker, together with the
+    listener thread that invalidates it on user_changes notifications.
+    """
+    global _user_cache
+    ttl_seconds = float(os.getenv("USER_CACHE_TTL_SECONDS", DEFAULT_USER_CACHE_TTL_SECONDS))
+    if ttl_seconds <= 0 or db_utils.DATABASE_URL is None:
+        return None
+    with _user_cache_lock:
+        if _user_cache is None:
+            _user_cache = UserCache(
+                ttl_seconds=ttl_seconds,
+                max_entries=int(os.getenv("USER_CACHE_MAX_ENTRIES", DEFAULT_USER_CACHE_MAX_ENTRIES)),
+            )
+            UserChangeListener(db_utils.DATABASE_URL, _user_cache).start()
+        return _user_cache
+
+
+def _get_db_repository(db: Session) -> IUserRepository:
+    """Return a UserDBRepository, behind the worker's user cache if it is enabled."""
+    repository = UserDBRepository(db)
+    cache = get_user_cache()
+    return CachedUserRepository(repository, cache) if cache is not None else repository
 
 
 def get_repository(db: Session = Depends(get_db)) -> IUserRepository:
     """
     Provide the appropriate user repository based on the environment and configuration.
 
-    This function determines which type of repository to use (JSON or Postgres)
+    This function determines which type of repository to use (JSON, SQLite or Postgres)
     based on the environment variables and whether we're in a CI environment.
 
     Args:
         db: SQLAlchemy database session (injected by FastAPI).
-    Returns: An instance of IUserRepository (either UserJsonRepository or UserDBRepository).
+    Returns: An instance of IUserRepository (UserJsonRepository, UserSQLiteRepository or UserDBRepository,
+        the latter wrapped in CachedUserRepository unless the user cache is disabled).
     Raises: ValueError if an invalid repository type is specified.
     """
     # Determine repository type: use 'json' in CI, otherwise use the environment variable
     repository_type = "json" if IN_CI else os.getenv("USER_REPOSITORY_TYPE", "json")
     logger.info(f"Creating repository of type: {repository_type}")
     if repository_type == "json":
-        return UserJsonRepository("users.json")
+        return _get_json_repository()
+    elif repository_type == "sqlite":
+        return _get_sqlite_repository()
     elif repository_type == "postgres":
         # Check if we have a real database session (not in CI)
         if not hasattr(db, "execute"):
             logger.warning("Using JSON repository due to mock session in CI")
-            return UserJsonRepository("users.json")
-        return UserDBRepository(db)
+            return _get_json_repository()
+        return _get_db_repository(db)
+    else:
+        raise ValueError(f"Invalid USER_REPOSITORY_TYPE: {repository_type}")
+
+
+def get_async_repository(db: Optional[AsyncSession] = Depends(get_async_db)) -> IAsyncUserRepository:
+    """
+    Provide the appropriate async user repository, the async counterpart of get_repository.
+
+    Postgres is queried natively through an AsyncSession. The JSON and SQLite repositories have no
+    async driver and are wrapped so their calls run in the threadpool instead of on the event loop.
+
+    Args:
+        db: SQLAlchemy async database session (injected by FastAPI), None without a database.
+    Returns: An instance of IAsyncUserRepository.
+    Raises: ValueError if an invalid repository type is specified.
+    """
+    repository_type = "json" if IN_CI else os.getenv("USER_REPOSITORY_TYPE", "json")
+    if repository_type == "json":
+        return AsyncUserRepositoryAdapter(_get_json_repository())
+    elif repository_type == "sqlite":
+        return AsyncUserRepositoryAdapter(_get_sqlite_repository())
+    elif repository_type == "postgres":
+        if db is None:
+            logger.warning("Using JSON repository due to missing async session in CI")
+            return AsyncUserRepositoryAdapter(_get_json_repository())
+        cache = get_user_cache()
+        repository = AsyncUserDBRepository(db)
+        return CachedAsyncUserRepository(repository, cache) if cache is not None else repository
+    else:
+        raise ValueError(f"Invalid USER_REPOSITORY_TYPE: {repository_type}")
+
+
+def get_summary_repository() -> ISummaryRepository:
+    """
+    Provide the summary repository matching the user repository type.
+
+    Summaries live next to the users: in the summaries table of the Postgres or SQLite database, or
+    in SUMMARY_JSON_PATH (default summaries.jsonl) for the json repository type.
+
+    Returns: An instance of ISummaryRepository.
+    Raises: ValueError if an invalid repository type is specified.
+    """
+    repository_type = "json" if IN_CI else os.getenv("USER_REPOSITORY_TYPE", "json")
+    if repository_type == "json":
+        return SummaryJsonRepository.shared(os.getenv("SUMMARY_JSON_PATH", DEFAULT_SUMMARY_JSON_PATH))
+    elif repository_type == "sqlite":
+        return SummaryDBRepository(
+            get_sqlite_session_factory(os.getenv("SQLITE_DATABASE_PATH", DEFAULT_SQLITE_DATABASE_PATH))
+        )
+    elif repository_type == "postgres":
+        if db_utils.SessionLocal is None:
+            logger.warning("Using JSON summary repository due to missing database in CI")
+            return SummaryJsonRepository.shared(os.getenv("SUMMARY_JSON_PATH", DEFAULT_SUMMARY_JSON_PATH))
+        return SummaryDBRepository(db_utils.SessionLocal)
+    else:
+        raise ValueError(f"Invalid USER_REPOSITORY_TYPE: {repository_type}")
+
+
+def get_search_repository() -> ISearchRepository:
+    """
+    Provide the search repository matching the user repository type.
+
+    Postgres searches the tsvector columns of the summaries and transcripts tables. The json and
+    sqlite types use an in-process inverted index over SEARCH_INDEX_PATH (default
+    search_documents.jsonl).
+
+    Returns: An instance of ISearchRepository.
+    Raises: ValueError if an invalid repository type is specified.
+    """
+    repository_type = "json" if IN_CI else os.getenv("USER_REPOSITORY_TYPE", "json")
+    if repository_type in ("json", "sqlite"):
+        return SearchIndexRepository.shared(os.getenv("SEARCH_INDEX_PATH", DEFAULT_SEARCH_INDEX_PATH))
+    elif repository_type == "postgres":
+        if db_utils.SessionLocal is None:
+            logger.warning("Using in-process search index due to missing database in CI")
+            return SearchIndexRepository.shared(os.getenv("SEARCH_INDEX_PATH", DEFAULT_SEARCH_INDEX_PATH))
+        return SearchDBRepository(db_utils.SessionLocal)
     else:
         raise ValueError(f"Invalid USER_REPOSITORY_TYPE: {repository_type}")
 
@@ -59,9 +217,11 @@ def get_repository_provider() -> Callable[..., IUserRepository]:
     repository_type = "json" if IN_CI else os.getenv("USER_REPOSITORY_TYPE", "json")
 
     if repository_type == "json":
-        return lambda: UserJsonRepository("users.json")
+        return _get_json_repository
+    elif repository_type == "sqlite":
+        return _get_sqlite_repository
     elif repository_type == "postgres":
-        return lambda db: UserDBRepository(db)
+        return _get_db_repository
     else:
         raise ValueError(f"Invalid USER_REPOSITORY_TYPE: {repository_type}")
 
@@ -69,17 +229,22 @@ def get_repository_provider() -> Callable[..., IUserRepository]:
 # 1. When this module is imported, it determines if it's running in a CI environment.
 # 2. The get_repository function is the main entry point for obtaining a repository instance:
 #    a) It checks the environment to determine which repository type to use.
-#    b) For JSON repositories, it creates and returns a UserJsonRepository instance.
-#    c) For Postgres repositories:
-#       - In non-CI environments, it creates and returns a UserDBRepository instance.
+#    b) For JSON repositories, it returns the process-wide UserJsonRepository instance, which keeps the
+#       users and their indexes in memory and only re-reads users.json when the file changes.
+#    c) For SQLite repositories, it returns a UserSQLiteRepository bound to the worker's own engine.
+#    d) For Postgres repositories:
+#       - In non-CI environments, it creates and returns a UserDBRepository instance, wrapped in a
+#         CachedUserRepository that answers lookups from the worker's user cache (see utils/user_cache.py).
 #       - In CI environments or if a mock session is detected, it falls back to UserJsonRepository.
-# 3. The get_repository_provider function creates a factory for repository instances:
+# 3. get_async_repository is the async counterpart used by async endpoints: Postgres goes through an
+#    AsyncSession, JSON and SQLite repositories are wrapped to run in the threadpool.
+# 4. The get_repository_provider function creates a factory for repository instances:
 #    a) It returns a lambda function that, when called, creates the appropriate repository.
 #    b) This is useful for scenarios where you need to defer repository creation.
-# 4. Both functions handle the 'json' and 'postgres' repository types, throwing an error for invalid types.
-# 5. This setup allows for flexible repository usage across different environments:
+# 5. All functions handle the 'json', 'sqlite' and 'postgres' repository types, throwing an error for invalid types.
+# 6. This setup allows for flexible repository usage across different environments:
 #    - CI environments always use JSON storage for simplicity and isolation.
-#    - Production/development can use either JSON or Postgres based on configuration.
+#    - Production/development can use JSON, SQLite or Postgres based on configuration.
 #    - The system gracefully handles cases where database sessions might not be available.
 
 # Key benefits of this approach:
@@ -0,0 +1,95 @@
+"""Postgres implementation of the ISearchRepository interface (tsvector columns with GIN indexes)."""
+
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Tuple
+
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from models.api_models import SearchHit
+from models.summary import Summary
+from models.transcript import Transcript
+from .repository_interfaces import ISearchRepository
+
+SEARCH_CONFIG = "english"
+
+
+def search_document(title: Any, body: Any) -> ColumnElement:
+    """Return the tsvector expression for a document: title matches (weight A) rank above body matches (B)."""
+    # The weights are "char" literals, which a varchar bind parameter would not match
+    return func.setweight(func.to_tsvector(SEARCH_CONFIG, func.coalesce(title, "")), literal_column("'A'")).op("||")(
+        func.setweight(func.to_tsvector(SEARCH_CONFIG, body), literal_column("'B'"))
+    )
+
+
+class SearchDBRepository(ISearchRepository):
+    """Search over the search_vector columns of summaries and transcripts.
+
+    Matching uses the GIN indexes, so only documents containing the query terms are visited. Both
+    tables are ranked with ts_rank_cd and only the best `limit` rows are fetched. The texts are
+    stored compressed (see utils.text_codec), which ts_headline cannot read, so find returns the
+    decompressed texts of the best `limit` rows, and snippets are built from them in Python.
+    Summary vectors are written by SummaryDBRepository.add, transcript vectors by index.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        """Initialize the repository.
+
+        Args:
+            session_factory: Callable returning a new SQLAlchemy session.
+        """
+        self.session_factory = session_factory
+
+    def index(self, summary: Summary, transcript: Optional[str] = None) -> None:
+        """Store the transcript of the summarized video, unless it is stored already."""
+        if not transcript:
+            return
+        statement = insert(Transcript).values(
+            video_id=summary.video_id,
+            video_title=summary.video_title,
+            transcript=transcript,
+            created_at=datetime.utcnow(),
+            search_vector=search_document(summary.video_title, transcript),
+        ).on_conflict_do_nothing(index_elements=[Transcript.video_id])
+        with self.session_factory() as session:
+            session.execute(statement)
+            session.commit()
+
+    def find(self, user_id: int, query: str, limit: int) -> List[Tuple[SearchHit, str]]:
+        """Search the user's summaries and all transcripts, best matches first."""
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+        summaries = self._ranked(
+            ts_query, limit, Summary.search_vector, Summary.summary,
+            Summary.summary_id, Summary.video_id, Summary.video_title,
+        ).where(Summary.user_id == user_id)
+        transcripts = self._ranked(
+            ts_query, limit, Transcript.search_vector, Transcript.transcript,
+            Transcript.video_id, Transcript.video_title,
+        )
+        with self.session_factory() as session:
+            summary_rows = session.execute(summaries).all()
+            transcript_rows = session.execute(transcripts).all()
+        found = [
+            (SearchHit(video_id=row.video_id, video_title=row.video_title, source="summary",
+                       summary_id=row.summary_id, rank=row.rank, snippet=""), row.text)
+            for row in summary_rows
+        ] + [
+            (SearchHit(video_id=row.video_id, video_title=row.video_title, source="transcript",
+                       rank=row.rank, snippet=""), row.text)
+            for row in transcript_rows
+        ]
+        found.sort(key=lambda item: item[0].rank, reverse=True)
+        return found[:limit]
+
+    @staticmethod
+    def _ranked(ts_query: Any, limit: int, vector: Any, text: Any, *columns: Any):
+        """Select the best `limit` documents matching ts_query, with their text and rank."""
+        rank = func.ts_rank_cd(vector, ts_query).label("rank")
+        return (
+            select(*columns, text.label("text"), rank)
+            .where(vector.op("@@")(ts_query))
+            .order_by(rank.desc())
+            .limit(limit)
+        )
@@ -0,0 +1,146 @@
+"""In-process implementation of the ISearchRepository interface, for JSON and SQLite deployments.
+
+Searchable documents are appended to a JSONL file under an inter-process file lock; the file is
+only rewritten to remove the documents of a deleted user (see delete_for_user). Every process
+keeps a BM25 inverted index over them (see utils.inverted_index) and only reads the lines appended
+since its last look. The document texts stay on disk, compressed with the text codec: the index
+remembers the offset of each line and reads back the few documents it builds snippets for.
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import ClassVar, Dict, List, Optional, Set, Tuple
+
+from models.api_models import SearchHit
+from models.summary import Summary
+from utils.file_utils import (
+    append_jsonl, atomic_write_text, file_lock, read_jsonl, read_jsonl_record, read_jsonl_with_offsets,
+    read_signature
+)
+from utils.inverted_index import InvertedIndex
+from utils.text_codec import get_text_codec
+from .repository_interfaces import ISearchRepository
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEARCH_INDEX_PATH = "search_documents.jsonl"
+
+
+class SearchIndexRepository(ISearchRepository):
+    """Search over summaries and transcripts with an in-memory inverted index."""
+
+    _shared_instances: ClassVar[Dict[str, "SearchIndexRepository"]] = {}
+    _shared_instances_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(self, file_path: str = DEFAULT_SEARCH_INDEX_PATH):
+        """Initialize the repository.
+
+        Args:
+            file_path: Path of the JSONL file with the searchable documents.
+        """
+        self.file_path = file_path
+        self.lock_path = file_path + ".lock"
+        self._lock = threading.RLock()
+        self._inode: Optional[int] = None
+        self._offset = 0
+        self._reset()
+
+    @classmethod
+    def shared(cls, file_path: str = DEFAULT_SEARCH_INDEX_PATH) -> "SearchIndexRepository":
+        """Return the process-wide repository for file_path."""
+        key = os.path.abspath(file_path)
+        with cls._shared_instances_lock:
+            repository = cls._shared_instances.get(key)
+            if repository is None:
+                repository = cls(file_path)
+                cls._shared_instances[key] = repository
+            return repository
+
+    def _reset(self) -> None:
+        """Drop the in-memory state (caller holds the thread lock)."""
+        self._index = InvertedIndex()
+        # Per document number: (line offset, user_id or None for transcripts)
+        self._documents: List[Tuple[int, Optional[int]]] = []
+        self._transcript_video_ids: Set[str] = set()
+
+    def _refresh(self) -> None:
+        """Index the documents appended since the last refresh (caller holds the thread lock)."""
+        signature = read_signature(self.file_path)
+        inode = signature[2] if signature else None
+        if inode != self._inode or (signature and signature[1] < self._offset):
+            # The file was replaced or truncated, start over
+            self._inode, self._offset = inode, 0
+            self._reset()
+        if signature is None or signature[1] == self._offset:
+            return
+        records, self._offset = read_jsonl_with_offsets(self.file_path, self._offset)
+        for offset, record in records:
+            self._add(offset, record)
+
+    @staticmethod
+    def _text(record: Dict) -> str:
+        """Return the document text of a stored record."""
+        return get_text_codec().decode_str(record["text_blob"]) if "text_blob" in record else record["text"]
+
+    def _add(self, offset: int, record: Dict) -> None:
+        """Add a stored document to the index (caller holds the thread lock)."""
+        self._index.add(f"{record.get('video_title') or ''}\n{self._text(record)}")
+        self._documents.append((offset, record.get("user_id")))
+        if record["source"] == "transcript":
+            self._transcript_video_ids.add(record["video_id"])
+
+    def index(self, summary: Summary, transcript: Optional[str] = None) -> None:
+        """Make the summary and, unless indexed already, the transcript of its video searchable."""
+        with self._lock, file_lock(self.lock_path):
+            self._refresh()
+            records = [{
+                "source": "summary", "summary_id": summary.summary_id, "user_id": summary.user_id,
+                "video_id": summary.video_id, "video_title": summary.video_title,
+                "text_blob": get_text_codec().encode_str(summary.summary),
+            }]
+            if transcript and summary.video_id not in self._transcript_video_ids:
+                records.append({
+                    "source": "transcript", "video_id": summary.video_id, "video_title": summary.video_title,
+                    "text_blob": get_text_codec().encode_str(transcript),
+                })
+            offset = self._offset
+            self._offset = append_jsonl(self.file_path, records, self._offset)
+            if self._inode is None:
+                self._inode = read_signature(self.file_path)[2]
+            # Index from the file, so the line offsets of the new records are known
+            for record_offset, record in read_jsonl_with_offsets(self.file_path, offset)[0]:
+                self._add(record_offset, record)
+
+    def delete_for_user(self, user_id: int) -> int:
+        """Remove the summaries of a deleted user from the file; transcripts are shared and stay.
+
+        The file is rewritten without them and the index rebuilt; other processes see the new file
+        and rebuild theirs.
+        Returns: The number of documents removed.
+        """
+        with self._lock, file_lock(self.lock_path):
+            self._refresh()
+            if all(document_user_id != user_id for _, document_user_id in self._documents):
+                return 0
+            records = read_jsonl(self.file_path, 0)[0]
+            kept = [record for record in records if record.get("user_id") != user_id]
+            atomic_write_text(self.file_path, "".join(json.dumps(record) + "\n" for record in kept))
+            self._refresh()
+            return len(records) - len(kept)
+
+    def find(self, user_id: int, query: str, limit: int) -> List[Tuple[SearchHit, str]]:
+        """Search the user's summaries and all transcripts, best matches first (BM25)."""
+        with self._lock:
+            self._refresh()
+            documents = self._documents
+            ranked = self._index.search(query, limit, accept=lambda doc: documents[doc][1] in (None, user_id))
+            records = [(read_jsonl_record(self.file_path, documents[doc][0]), score) for doc, score in ranked]
+        return [
+            (SearchHit(
+                video_id=record["video_id"], video_title=record.get("video_title"), source=record["source"],
+                summary_id=record.get("summary_id"), rank=score, snippet="",
+            ), self._text(record))
+            for record, score in records
+        ]
@@ -0,0 +1,86 @@
+"""Database-based implementation of the ISummaryRepository interface (Postgres and SQLite)."""
+
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session, load_only
+
+from models.summary import SUMMARY_LIST_COLUMNS, Summary
+from utils.db_routing import mark_written, recently_written, routes_reads_to_replicas, use_primary
+from utils.tracing import count
+from .repository_interfaces import ISummaryRepository
+from .search_db_repository import search_document
+
+
+class SummaryDBRepository(ISummaryRepository):
+    """Repository for summaries in the summaries table.
+
+    A short-lived session is used per call. The listing only loads the columns included in
+    ix_summaries_user_id_created_at, so Postgres can answer it with an index-only scan. After a
+    user stored a summary, their reads go to the primary for the replica staleness budget.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        """Initialize the repository.
+
+        Args:
+            session_factory: Callable returning a new SQLAlchemy session (with expire_on_commit=False).
+        """
+        self.session_factory = session_factory
+
+    def add(self, summary: Summary) -> Summary:
+        """Store a new summary and assign its summary_id."""
+        with self.session_factory() as session:
+            if session.get_bind().dialect.name == "postgresql":
+                # Computed by the INSERT from the bound title and text, see ix_summaries_search_vector
+                summary.search_vector = search_document(summary.video_title, summary.summary)
+            session.add(summary)
+            session.commit()
+        mark_written(("summaries", summary.user_id))
+        return summary
+
+    def get(self, user_id: int, summary_id: int) -> Optional[Summary]:
+        """Retrieve one of a user's summaries; None if it does not exist or belongs to another user."""
+        query = select(Summary).where(Summary.summary_id == summary_id, Summary.user_id == user_id)
+        with self.session_factory() as session:
+            with use_primary(session, recently_written(("summaries", user_id))):
+                summary = session.scalars(query).first()
+            if summary is None and routes_reads_to_replicas(session):
+                # A link to a summary may be opened before the replica has it
+                count("retries")
+                with use_primary(session):
+                    summary = session.scalars(query).first()
+            return summary
+
+    def list_for_user(
+        self, user_id: int, limit: int, before: Optional[Tuple[datetime, int]] = None
+    ) -> List[Summary]:
+        """List a user's summaries, newest first, loading only the listing columns."""
+        query = (
+            select(Summary)
+            .options(load_only(*(getattr(Summary, column) for column in SUMMARY_LIST_COLUMNS)))
+            .where(Summary.user_id == user_id)
+            .order_by(Summary.created_at.desc(), Summary.summary_id.desc())
+            .limit(limit)
+        )
+        if before is not None:
+            query = query.where(tuple_(Summary.created_at, Summary.summary_id) < tuple_(*before))
+        with self.session_factory() as session:
+            with use_primary(session, recently_written(("summaries", user_id))):
+                return list(session.scalars(query))
+
+    def find_latest_for_video(self, video_id: str, summary_length: int, used_model: str) -> Optional[Summary]:
+        """Retrieve the newest summary of a video made with the given parameters, by any user."""
+        query = (
+            select(Summary)
+            .where(
+                Summary.video_id == video_id,
+                Summary.summary_length == summary_length,
+                Summary.used_model == used_model,
+            )
+            .order_by(Summary.created_at.desc())
+            .limit(1)
+        )
+        with self.session_factory() as session:
+            return session.scalars(query).first()
@@ -0,0 +1,155 @@
+"""JSON-based implementation of the ISummaryRepository interface.
+
+Summaries are appended to a JSONL file under an inter-process file lock; the file is only rewritten
+to remove the summaries of a deleted user (see delete_for_user). Every process keeps them in memory
+together with a per-user index sorted by (created_at, summary_id), and only reads the lines appended
+since its last look. Summary texts are kept compressed with the
+text codec (base64 in the file, also in memory) and only decompressed when a summary is read.
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import ClassVar, Dict, List, Optional, Tuple
+
+from models.summary import Summary
+from utils.file_utils import append_jsonl, atomic_write_text, file_lock, read_jsonl, read_signature
+from utils.text_codec import get_text_codec
+from .repository_interfaces import ISummaryRepository
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SUMMARY_JSON_PATH = "summaries.jsonl"
+
+SummaryKey = Tuple[datetime, int]
+
+
+class SummaryJsonRepository(ISummaryRepository):
+    """Repository for summaries in an append-only JSONL file, for JSON and CI deployments."""
+
+    _shared_instances: ClassVar[Dict[str, "SummaryJsonRepository"]] = {}
+    _shared_instances_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(self, file_path: str = DEFAULT_SUMMARY_JSON_PATH):
+        """Initialize the repository.
+
+        Args:
+            file_path: Path of the JSONL file.
+        """
+        self.file_path = file_path
+        self.lock_path = file_path + ".lock"
+        self._lock = threading.RLock()
+        self._inode: Optional[int] = None
+        self._offset = 0
+        self._summaries: Dict[int, Dict] = {}
+        self._keys_by_user: Dict[int, List[SummaryKey]] = {}
+        # (video_id, summary_length, used_model) -> summary_id of the newest such summary
+        self._latest_by_video: Dict[Tuple[str, int, str], int] = {}
+
+    @classmethod
+    def shared(cls, file_path: str = DEFAULT_SUMMARY_JSON_PATH) -> "SummaryJsonRepository":
+        """Return the process-wide repository for file_path."""
+        key = os.path.abspath(file_path)
+        with cls._shared_instances_lock:
+            repository = cls._shared_instances.get(key)
+            if repository is None:
+                repository = cls(file_path)
+                cls._shared_instances[key] = repository
+            return repository
+
+    def _refresh(self) -> None:
+        """Read the lines appended since the last refresh (caller holds the thread lock)."""
+        signature = read_signature(self.file_path)
+        inode = signature[2] if signature else None
+        if inode != self._inode or (signature and signature[1] < self._offset):
+            # The file was replaced or truncated, start over
+            self._inode, self._offset = inode, 0
+            self._summaries, self._keys_by_user, self._latest_by_video = {}, {}, {}
+        if signature is None or signature[1] == self._offset:
+            return
+        records, self._offset = read_jsonl(self.file_path, self._offset)
+        for record in records:
+            self._index(record)
+
+    def _index(self, record: Dict) -> None:
+        """Add a stored summary to the in-memory state (caller holds the thread lock)."""
+        self._summaries[record["summary_id"]] = record
+        key = (datetime.fromisoformat(record["created_at"]), record["summary_id"])
+        bisect.insort(self._keys_by_user.setdefault(record["user_id"], []), key)
+        video_key = (record["video_id"], record["summary_length"], record["used_model"])
+        latest_id = self._latest_by_video.get(video_key)
+        if latest_id is None or (
+            datetime.fromisoformat(self._summaries[latest_id]["created_at"]) <= key[0]
+        ):
+            self._latest_by_video[video_key] = record["summary_id"]
+
+    @staticmethod
+    def _to_summary(record: Dict, with_text: bool = True) -> Summary:
+        """Create a Summary from a stored record, decompressing the text unless with_text is False."""
+        values = dict(record)
+        blob = values.pop("summary_blob", None)
+        if blob is not None and with_text:
+            values["summary"] = get_text_codec().decode_str(blob)
+        return Summary.from_dict(values)
+
+    def add(self, summary: Summary) -> Summary:
+        """Store a new summary and assign its summary_id."""
+        with self._lock, file_lock(self.lock_path):
+            self._refresh()
+            summary.summary_id = max(self._summaries, default=0) + 1
+            if summary.created_at is None:
+                summary.created_at = datetime.utcnow()
+            record = summary.to_dict()
+            record["summary_blob"] = get_text_codec().encode_str(record.pop("summary"))
+            self._offset = append_jsonl(self.file_path, [record], self._offset)
+            if self._inode is None:
+                self._inode = read_signature(self.file_path)[2]
+            self._index(record)
+            return summary
+
+    def delete_for_user(self, user_id: int) -> int:
+        """Remove all summaries of a deleted user from the file, like the database's ON DELETE CASCADE.
+
+        The file is rewritten without them; other processes see the new file and reload it.
+        Returns: The number of summaries removed.
+        """
+        with self._lock, file_lock(self.lock_path):
+            self._refresh()
+            kept = [record for record in self._summaries.values() if record["user_id"] != user_id]
+            removed = len(self._summaries) - len(kept)
+            if removed:
+                atomic_write_text(self.file_path, "".join(json.dumps(record) + "\n" for record in kept))
+                self._refresh()
+            return removed
+
+    def get(self, user_id: int, summary_id: int) -> Optional[Summary]:
+        """Retrieve one of a user's summaries; None if it does not exist or belongs to another user."""
+        with self._lock:
+            self._refresh()
+            record = self._summaries.get(summary_id)
+        if record is None or record["user_id"] != user_id:
+            return None
+        return self._to_summary(record)
+
+    def list_for_user(
+        self, user_id: int, limit: int, before: Optional[Tuple[datetime, int]] = None
+    ) -> List[Summary]:
+        """List a user's summaries, newest first."""
+        with self._lock:
+            self._refresh()
+            keys = self._keys_by_user.get(user_id, [])
+            end = bisect.bisect_left(keys, before) if before is not None else len(keys)
+            page = keys[max(end - limit, 0):end]
+            records = [self._summaries[summary_id] for _, summary_id in reversed(page)]
+        return [self._to_summary(record, with_text=False) for record in records]
+
+    def find_latest_for_video(self, video_id: str, summary_length: int, used_model: str) -> Optional[Summary]:
+        """Retrieve the newest summary of a video made with the given parameters, by any user."""
+        with self._lock:
+            self._refresh()
+            summary_id = self._latest_by_video.get((video_id, summary_length, used_model))
+            record = self._summaries[summary_id] if summary_id is not None else None
+        return self._to_summary(record) if record is not None else None
@@ -0,0 +1,157 @@
+"""Async database-based implementation of the IAsyncUserRepository interface."""
+
+from typing import Any, AsyncIterator, List, Optional, cast
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.user import User
+from utils.db_routing import mark_written, recently_written, routes_reads_to_replicas, use_primary
+from utils.user_cache import notify_user_change_async
+from .repository_interfaces import IAsyncUserRepository
+from .user_db_repository import IN_CHUNK_SIZE
+
+
+class AsyncUserDBRepository(IAsyncUserRepository):
+    """Repository for managing User entities using a database through SQLAlchemy's asyncio extension.
+
+    After every operation the session is released if it supports it (see utils.db_utils.LazyAsyncSession),
+    so the pooled connection is returned right away instead of at the end of the request.
+    Replica routing and user_changes notifications work as in UserDBRepository.
+    """
+
+    def __init__(self, session: AsyncSession):
+        """Initialize the repository with an async database session."""
+        self.session = session
+
+    async def _release(self) -> None:
+        """Return the session's connection to the pool if the session supports lazy acquisition."""
+        release = getattr(self.session, "release", None)
+        if release is not None:
+            await release()
+
+    async def _lookup(self, key: Any, **filters: Any) -> Optional[User]:
+        """Return the first user matching filters, reading from the primary when the replica may be stale."""
+        with use_primary(self.session, recently_written(key)):
+            user = (await self.session.scalars(select(User).filter_by(**filters))).first()
+        if user is None and routes_reads_to_replicas(self.session) and not recently_written(key):
+            with use_primary(self.session):
+                user = (await self.session.scalars(select(User).filter_by(**filters))).first()
+        return user
+
+    def _mark_written(self, user: User) -> None:
+        """Pin the user's keys to the primary for the replica staleness budget."""
+        mark_written(("user_name", user.user_name), ("email", user.email), ("user_id", user.user_id))
+
+    async def get_by_id(self, user_id: int) -> Optional[User]:
+        """Retrieve a user by their ID."""
+        try:
+            return await self._lookup(("user_id", user_id), user_id=user_id)
+        finally:
+            await self._release()
+
+    async def get_by_identifier(self, identifier: str) -> Optional[User]:
+        """Retrieve a user by their identifier (username)."""
+        try:
+            return await self._lookup(("user_name", identifier), user_name=identifier)
+        finally:
+            await self._release()
+
+    async def get_by_email(self, email: str) -> Optional[User]:
+        """Retrieve a user by their email address."""
+        try:
+            return await self._lookup(("email", email), email=email)
+        finally:
+            await self._release()
+
+    async def get_all(self) -> List[User]:
+        """Retrieve all users."""
+        try:
+            result = await self.session.scalars(select(User))
+            return cast(List[User], result.all())
+        finally:
+            await self._release()
+
+    async def create(self, user: User) -> User:
+        """Create a new user."""
+        try:
+            self.session.add(user)
+            await self.session.flush()
+            await notify_user_change_async(self.session, user)
+            await self.session.commit()
+            self._mark_written(user)
+            return user
+        finally:
+            await self._release()
+
+    async def update(self, user: User) -> User:
+        """Update an existing user."""
+        try:
+            await self.session.merge(user)
+            await notify_user_change_async(self.session, user)
+            await self.session.commit()
+            self._mark_written(user)
+            return user
+        finally:
+            await self._release()
+
+    async def delete(self, user: User) -> None:
+        """Delete a user."""
+        try:
+            # The user may come from an earlier, already released session
+            await self.session.delete(await self.session.merge(user))
+            await notify_user_change_async(self.session, user)
+            await self.session.commit()
+            self._mark_written(user)
+        finally:
+            await self._release()
+
+    async def _get_by_user_names(self, user_names: List[str]) -> List[User]:
+        """Look up user_names in chunks, from the primary if any of them was written recently."""
+        users: List[User] = []
+        for start in range(0, len(user_names), IN_CHUNK_SIZE):
+            chunk = user_names[start:start + IN_CHUNK_SIZE]
+            pinned = any(recently_written(("user_name", user_name)) for user_name in chunk)
+            with use_primary(self.session, pinned):
+                users.extend(await self.session.scalars(select(User).where(User.user_name.in_(chunk))))
+        return users
+
+    async def get_many(self, identifiers: List[str]) -> List[User]:
+        """Retrieve the users with the given identifiers (usernames); unknown identifiers are skipped."""
+        try:
+            users = await self._get_by_user_names(identifiers)
+            if routes_reads_to_replicas(self.session) and len(users) < len(set(identifiers)):
+                found = {user.user_name for user in users}
+                with use_primary(self.session):
+                    users.extend(await self._get_by_user_names([i for i in identifiers if i not in found]))
+            return users
+        finally:
+            await self._release()
+
+    async def create_many(self, users: List[User]) -> List[User]:
+        """Create several users in one transaction using multi-row INSERTs with RETURNING."""
+        try:
+            self.session.add_all(users)
+            await self.session.commit()
+            for user in users:
+                self._mark_written(user)
+            return users
+        finally:
+            await self._release()
+
+    async def iter_all(self, batch_size: int = 1000) -> AsyncIterator[User]:
+        """Iterate over all users in user_id order (keyset pagination), releasing the session after every page."""
+        last_user_id = None
+        while True:
+            query = select(User).order_by(User.user_id).limit(batch_size)
+            if last_user_id is not None:
+                query = query.where(User.user_id > last_user_id)
+            try:
+                page = (await self.session.scalars(query)).all()
+            finally:
+                await self._release()
+            for user in page:
+                yield user
+            if len(page) < batch_size:
+                return
+            last_user_id = page[-1].user_id
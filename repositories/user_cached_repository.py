@@ -0,0 +1,179 @@
+"""Read-through caching decorators for the IUserRepository and IAsyncUserRepository interfaces."""
+
+from typing import AsyncIterator, Iterator, List, Optional
+
+from models.user import User
+from utils.user_cache import UserCache
+from .repository_interfaces import IAsyncUserRepository, IUserRepository
+
+
+class CachedUserRepository(IUserRepository):
+    """Answers user lookups from a UserCache and delegates everything else to the wrapped repository.
+
+    Writes invalidate the cache of this worker right away; other workers are invalidated by the
+    notification the wrapped UserDBRepository sends on commit.
+    """
+
+    def __init__(self, repository: IUserRepository, cache: UserCache):
+        """Initialize the decorator.
+
+        Args:
+            repository: The repository to read through to.
+            cache: The worker's user cache.
+        """
+        self.repository = repository
+        self.cache = cache
+
+    def get_by_id(self, user_id: int) -> Optional[User]:
+        """Retrieve a user by their ID."""
+        user = self.cache.get("user_id", user_id)
+        if user is None:
+            generation = self.cache.generation
+            user = self.repository.get_by_id(user_id)
+            self.cache.put(user, generation)
+        return user
+
+    def get_by_identifier(self, identifier: str) -> Optional[User]:
+        """Retrieve a user by their identifier (username)."""
+        user = self.cache.get("user_name", identifier)
+        if user is None:
+            generation = self.cache.generation
+            user = self.repository.get_by_identifier(identifier)
+            self.cache.put(user, generation)
+        return user
+
+    def get_by_email(self, email: str) -> Optional[User]:
+        """Retrieve a user by their email address."""
+        user = self.cache.get("email", email)
+        if user is None:
+            generation = self.cache.generation
+            user = self.repository.get_by_email(email)
+            self.cache.put(user, generation)
+        return user
+
+    def get_all(self) -> List[User]:
+        """Retrieve all users (not cached)."""
+        return self.repository.get_all()
+
+    def create(self, user: User) -> User:
+        """Create a new user."""
+        created = self.repository.create(user)
+        self.cache.invalidate(user_id=created.user_id, user_name=created.user_name, email=created.email)
+        return created
+
+    def update(self, user: User) -> User:
+        """Update an existing user."""
+        try:
+            return self.repository.update(user)
+        finally:
+            self.cache.invalidate(user_id=user.user_id, user_name=user.user_name, email=user.email)
+
+    def delete(self, user: User) -> None:
+        """Delete a user."""
+        try:
+            self.repository.delete(user)
+        finally:
+            self.cache.invalidate(user_id=user.user_id, user_name=user.user_name, email=user.email)
+
+    def get_many(self, identifiers: List[str]) -> List[User]:
+        """Retrieve the users with the given identifiers (usernames), reading only the misses through."""
+        users = [self.cache.get("user_name", identifier) for identifier in identifiers]
+        missing = [identifier for identifier, user in zip(identifiers, users) if user is None]
+        if missing:
+            generation = self.cache.generation
+            for user in self.repository.get_many(missing):
+                self.cache.put(user, generation)
+                users.append(user)
+        return [user for user in users if user is not None]
+
+    def create_many(self, users: List[User]) -> List[User]:
+        """Create several users in one batch (misses are never cached, so nothing to invalidate)."""
+        return self.repository.create_many(users)
+
+    def iter_all(self, batch_size: int = 1000) -> Iterator[User]:
+        """Iterate over all users (not cached)."""
+        return self.repository.iter_all(batch_size)
+
+
+class CachedAsyncUserRepository(IAsyncUserRepository):
+    """Async counterpart of CachedUserRepository, sharing the same UserCache."""
+
+    def __init__(self, repository: IAsyncUserRepository, cache: UserCache):
+        """Initialize the decorator.
+
+        Args:
+            repository: The async repository to read through to.
+            cache: The worker's user cache.
+        """
+        self.repository = repository
+        self.cache = cache
+
+    async def get_by_id(self, user_id: int) -> Optional[User]:
+        """Retrieve a user by their ID."""
+        user = self.cache.get("user_id", user_id)
+        if user is None:
+            generation = self.cache.generation
+            user = await self.repository.get_by_id(user_id)
+            self.cache.put(user, generation)
+        return user
+
+    async def get_by_identifier(self, identifier: str) -> Optional[User]:
+        """Retrieve a user by their identifier (username)."""
+        user = self.cache.get("user_name", identifier)
+        if user is None:
+            generation = self.cache.generation
+            user = await self.repository.get_by_identifier(identifier)
+            self.cache.put(user, generation)
+        return user
+
+    async def get_by_email(self, email: str) -> Optional[User]:
+        """Retrieve a user by their email address."""
+        user = self.cache.get("email", email)
+        if user is None:
+            generation = self.cache.generation
+            user = await self.repository.get_by_email(email)
+            self.cache.put(user, generation)
+        return user
+
+    async def get_all(self) -> List[User]:
+        """Retrieve all users (not cached)."""
+        return await self.repository.get_all()
+
+    async def create(self, user: User) -> User:
+        """Create a new user."""
+        created = await self.repository.create(user)
+        self.cache.invalidate(user_id=created.user_id, user_name=created.user_name, email=created.email)
+        return created
+
+    async def update(self, user: User) -> User:
+        """Update an existing user."""
+        try:
+            return await self.repository.update(user)
+        finally:
+            self.cache.invalidate(user_id=user.user_id, user_name=user.user_name, email=user.email)
+
+    async def delete(self, user: User) -> None:
+        """Delete a user."""
+        try:
+            await self.repository.delete(user)
+        finally:
+            self.cache.invalidate(user_id=user.user_id, user_name=user.user_name, email=user.email)
+
+    async def get_many(self, identifiers: List[str]) -> List[User]:
+        """Retrieve the users with the given identifiers (usernames), reading only the misses through."""
+        users = [self.cache.get("user_name", identifier) for identifier in identifiers]
+        missing = [identifier for identifier, user in zip(identifiers, users) if user is None]
+        if missing:
+            generation = self.cache.generation
+            for user in await self.repository.get_many(missing):
+                self.cache.put(user, generation)
+                users.append(user)
+        return [user for user in users if user is not None]
+
+    async def create_many(self, users: List[User]) -> List[User]:
+        """Create several users in one batch (misses are never cached, so nothing to invalidate)."""
+        return await self.repository.create_many(users)
+
+    def iter_all(self, batch_size: int = 1000) -> AsyncIterator[User]:
+        """Iterate over all users (not cached)."""
+        return self.repository.iter_all(batch_size)
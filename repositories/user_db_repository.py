@@ -1,49 +1,218 @@
 """Database-based implementation of the IUserRepository interface."""
 
-from typing import List, Optional, cast
+import io
+from typing import Any, Iterator, List, Optional, cast
 
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from models.user import User
+from utils.db_routing import mark_written, recently_written, routes_reads_to_replicas, use_primary
+from utils.tracing import count
+from utils.user_cache import notify_user_change
 from .repository_interfaces import IUserRepository
 
+# create_many switches from multi-row INSERTs to COPY at this many users
+COPY_THRESHOLD = 1000
+# Maximum number of user names per IN (...) lookup
+IN_CHUNK_SIZE = 1000
+COPY_COLUMNS = (
+    "user_name", "email", "password_hash", "identity_provider", "last_login_date", "token_issuance_date", "token"
+)
+
+
+def _copy_field(value: Any) -> str:
+    """Render a value as a COPY CSV field, with unquoted \\N for NULL so it differs from an empty string."""
+    if value is None:
+        return "\\N"
+    text_value = value.isoformat() if hasattr(value, "isoformat") else str(value)
+    return '"' + text_value.replace('"', '""') + '"'
+
 
 class UserDBRepository(IUserRepository):
-    """Repository for managing User entities using a database."""
+    """Repository for managing User entities using a database.
+
+    After every operation the session is released if it supports it (see utils.db_utils.LazySession),
+    so the pooled connection is returned right away instead of at the end of the request.
+
+    With read replicas configured (see utils.db_routing), lookups go to a replica unless the key was
+    written recently by this worker; a lookup that misses on a replica is retried on the primary.
+
+    Every write also sends a user_changes notification in the same transaction, which invalidates
+    the user caches of all workers (see utils.user_cache).
+    """
 
     def __init__(self, session: Session):
         """Initialize the repository with a database session."""
         self.session = session
 
+    def _release(self) -> None:
+        """Return the session's connection to the pool if the session supports lazy acquisition."""
+        release = getattr(self.session, "release", None)
+        if release is not None:
+            release()
+
+    def _lookup(self, key: Any, **filters: Any) -> Optional[User]:
+        """Return the first user matching filters, reading from the primary when the replica may be stale."""
+        with use_primary(self.session, recently_written(key)):
+            user = self.session.query(User).filter_by(**filters).first()
+        if user is None and routes_reads_to_replicas(self.session) and not recently_written(key):
+            # The user may have been created by another worker and not be replicated yet
+            count("retries")
+            with use_primary(self.session):
+                user = self.session.query(User).filter_by(**filters).first()
+        return user
+
+    def _mark_written(self, user: User) -> None:
+        """Pin the user's keys to the primary for the replica staleness budget."""
+        mark_written(("user_name", user.user_name), ("email", user.email), ("user_id", user.user_id))
+
     def get_by_id(self, user_id: int) -> Optional[User]:
         """Retrieve a user by their ID."""
-        return self.session.query(User).filter_by(user_id=user_id).first()
+        try:
+            return self._lookup(("user_id", user_id), user_id=user_id)
+        finally:
+            self._release()
 
     def get_by_identifier(self, identifier: str) -> Optional[User]:
         """Retrieve a user by their identifier (username)."""
-        return self.session.query(User).filter_by(user_name=identifier).first()
+        try:
+            return self._lookup(("user_name", identifier), user_name=identifier)
+        finally:
+            self._release()
 
     def get_by_email(self, email: str) -> Optional[User]:
         """Retrieve a user by their email address."""
-        return self.session.query(User).filter_by(email=email).first()
+        try:
+            return self._lookup(("email", email), email=email)
+        finally:
+            self._release()
 
     def get_all(self) -> List[User]:
         """Retrieve all users."""
-        return cast(List[User], self.session.query(User).all())
+        try:
+            return cast(List[User], self.session.query(User).all())
+        finally:
+            self._release()
 
     def create(self, user: User) -> User:
         """Create a new user."""
-        self.session.add(user)
-        self.session.commit()
-        return user
+        try:
+            self.session.add(user)
+            self.session.flush()  # assigns user_id for the notification
+            notify_user_change(self.session, user)
+            self.session.commit()
+            self._mark_written(user)
+            return user
+        finally:
+            self._release()
 
     def update(self, user: User) -> User:
         """Update an existing user."""
-        self.session.merge(user)
-        self.session.commit()
-        return user
+        try:
+            self.session.merge(user)
+            notify_user_change(self.session, user)
+            self.session.commit()
+            self._mark_written(user)
+            return user
+        finally:
+            self._release()
 
     def delete(self, user: User) -> None:
         """Delete a user."""
-        self.session.delete(user)
-        self.session.commit()
+        try:
+            # The user may come from an earlier, already released session
+            self.session.delete(self.session.merge(user))
+            notify_user_change(self.session, user)
+            self.session.commit()
+            self._mark_written(user)
+        finally:
+            self._release()
+
+    def _get_by_user_names(self, user_names: List[str]) -> List[User]:
+        """Look up user_names in chunks, from the primary if any of them was written recently."""
+        users: List[User] = []
+        for start in range(0, len(user_names), IN_CHUNK_SIZE):
+            chunk = user_names[start:start + IN_CHUNK_SIZE]
+            pinned = any(recently_written(("user_name", user_name)) for user_name in chunk)
+            with use_primary(self.session, pinned):
+                users.extend(self.session.query(User).filter(User.user_name.in_(chunk)).all())
+        return users
+
+    def get_many(self, identifiers: List[str]) -> List[User]:
+        """Retrieve the users with the given identifiers (usernames); unknown identifiers are skipped."""
+        try:
+            users = self._get_by_user_names(identifiers)
+            if routes_reads_to_replicas(self.session) and len(users) < len(set(identifiers)):
+                found = {user.user_name for user in users}
+                count("retries")
+                with use_primary(self.session):
+                    users.extend(self._get_by_user_names([i for i in identifiers if i not in found]))
+            return users
+        finally:
+            self._release()
+
+    def create_many(self, users: List[User]) -> List[User]:
+        """Create several users in one transaction.
+
+        Postgres (psycopg2) batches of COPY_THRESHOLD users or more are streamed with COPY, followed
+        by one query for the generated ids. Smaller batches and other databases use multi-row INSERTs
+        with RETURNING (SQLAlchemy's insertmanyvalues). No notifications are sent: user caches never
+        hold misses, so new users cannot be stale anywhere.
+        """
+        try:
+            if len(users) >= COPY_THRESHOLD and self.session.get_bind().dialect.driver == "psycopg2":
+                self._copy_users(users)
+            else:
+                self.session.add_all(users)
+                self.session.flush()
+            self.session.commit()
+            for user in users:
+                self._mark_written(user)
+            return users
+        finally:
+            self._release()
+
+    def _copy_users(self, users: List[User]) -> None:
+        """COPY users into the users table and set their user_id (caller commits)."""
+        buffer = io.StringIO()
+        for user in users:
+            if user.identity_provider is None:
+                user.identity_provider = "local"
+            buffer.write(",".join(_copy_field(getattr(user, column)) for column in COPY_COLUMNS) + "\n")
+        buffer.seek(0)
+        with self.session.connection().connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY users ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer
+            )
+
+        user_ids = {}
+        user_names = [user.user_name for user in users]
+        with use_primary(self.session):
+            for start in range(0, len(user_names), IN_CHUNK_SIZE):
+                chunk = user_names[start:start + IN_CHUNK_SIZE]
+                user_ids.update(self.session.execute(
+                    select(User.user_name, User.user_id).where(User.user_name.in_(chunk))
+                ).tuples())
+        for user in users:
+            user.user_id = user_ids[user.user_name]
+
+    def iter_all(self, batch_size: int = 1000) -> Iterator[User]:
+        """Iterate over all users in user_id order (keyset pagination).
+
+        The session is released after every page, so no connection is held while the caller
+        processes the users (e.g. while a streaming response is being sent).
+        """
+        last_user_id = None
+        while True:
+            query = self.session.query(User).order_by(User.user_id)
+            if last_user_id is not None:
+                query = query.filter(User.user_id > last_user_id)
+            try:
+                page = query.limit(batch_size).all()
+            finally:
+                self._release()
+            yield from page
+            if len(page) < batch_size:
+                return
+            last_user_id = page[-1].user_id
@@ -1,83 +1,342 @@
-"""JSON-based implementation of the IUserRepository interface."""
+"""JSON-based implementation of the IUserRepository interface.
+
+Two storage modes are supported:
+- snapshot (default): every mutation rewrites users.json. The rewrite is atomic and done under an
+  inter-process file lock, so concurrent workers can neither corrupt the file nor lose updates.
+- journaled: mutations are appended as JSONL records to users.json.journal under the same lock.
+  The current state is the snapshot (users.json) with the journal replayed on top. Once the journal
+  grows past a threshold it is compacted into a new snapshot in a background thread.
+
+Like the database's identity column, user ids only go up: the snapshot keeps the last assigned id
+under LAST_USER_ID_KEY, so the id of a deleted user is never given to a new one (the summaries and
+search documents of JSON deployments are keyed by user id, see on_delete).
+"""
 
 import json
+import logging
 import os
-from typing import Dict, List, Optional
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
 from models.user import User
+from utils.file_utils import (
+    FileSignature, append_jsonl, atomic_write_text, file_lock, read_jsonl, read_signature
+)
 from .repository_interfaces import IUserRepository
 
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMPACT_THRESHOLD_BYTES = 1024 * 1024
+# Snapshot entry holding the last assigned user id; not a valid user name
+LAST_USER_ID_KEY = "__last_user_id__"
+
+
+def _read_snapshot(path: str) -> Tuple[Dict[str, Dict], int]:
+    """Load the users snapshot and the last assigned user id, or nothing if there is no snapshot."""
+    if not os.path.exists(path):
+        return {}, 0
+    with open(path, "r") as file:
+        users = json.load(file)
+    last_user_id = users.pop(LAST_USER_ID_KEY, 0)
+    # Snapshots written before the id was kept only know the ids of the remaining users
+    return users, max([last_user_id, *(_user_id(record) for record in users.values())])
+
+
+def _snapshot_text(users: Dict[str, Dict], last_user_id: int) -> str:
+    """Return the content of a snapshot with users and the last assigned user id."""
+    return json.dumps({LAST_USER_ID_KEY: last_user_id, **users}, indent=4)
+
+
+def _user_id(user_data: Dict) -> int:
+    """Return the user_id of stored user data, 0 if it has none."""
+    return user_data.get("user_id") or 0
+
+
+def _apply_record(users: Dict[str, Dict], record: Dict) -> None:
+    """Apply one journal record to a users dict."""
+    if record["op"] == "put":
+        users[record["user"]["user_name"]] = record["user"]
+    elif record["op"] == "delete":
+        users.pop(record["user_name"], None)
+
 
 class UserJsonRepository(IUserRepository):
-    """Repository for managing User entities using JSON file storage."""
+    """Repository for managing User entities using JSON file storage.
+
+    Users are kept in memory together with email and id indexes, so lookups are dictionary hits.
+    The files are only re-read when their signature (mtime, size, inode) changes, i.e. when another
+    process has written them. In journaled mode only the new journal records are replayed.
+    """
+
+    _shared_instances: Dict[str, "UserJsonRepository"] = {}
+    _shared_instances_lock = threading.Lock()
 
-    def __init__(self, file_path: str = "users.json"):
-        """Initialize the repository with the given JSON file path."""
+    def __init__(
+        self,
+        file_path: str = "users.json",
+        journaled: bool = False,
+        compact_threshold_bytes: int = DEFAULT_COMPACT_THRESHOLD_BYTES,
+        on_delete: Optional[Callable[[int], None]] = None,
+    ):
+        """Initialize the repository.
+
+        Args:
+            file_path: Path of the JSON snapshot file.
+            journaled: Append mutations to a journal instead of rewriting the snapshot.
+            compact_threshold_bytes: Journal size that triggers a background compaction.
+            on_delete: Called with the user_id of every deleted user, to remove the data stored
+                for them elsewhere (what ON DELETE CASCADE does in the database).
+        """
         self.file_path = file_path
+        self.journal_path = file_path + ".journal"
+        self.lock_path = file_path + ".lock"
+        self.journaled = journaled
+        self.compact_threshold_bytes = compact_threshold_bytes
+        self.on_delete = on_delete
+        self._lock = threading.RLock()
+        self._snapshot_signature: Optional[FileSignature] = None
+        self._journal_inode: Optional[int] = None
+        self._journal_offset = 0
+        self._compaction_thread: Optional[threading.Thread] = None
+        self._users: Dict[str, Dict] = {}
+        self._user_names_by_email: Dict[str, str] = {}
+        self._user_names_by_id: Dict[int, str] = {}
+        self._last_user_id = 0
+
+    @classmethod
+    def shared(cls, file_path: str = "users.json", **kwargs) -> "UserJsonRepository":
+        """Return the process-wide repository for file_path, creating it with kwargs on first use."""
+        key = os.path.abspath(file_path)
+        with cls._shared_instances_lock:
+            repository = cls._shared_instances.get(key)
+            if repository is None:
+                repository = cls(file_path, **kwargs)
+                cls._shared_instances[key] = repository
+            return repository
+
+    def _load_users(self, locked: bool = False) -> Dict[str, Dict]:
+        """Return the users keyed by user name, bringing them up to date with the files first.
+
+        Args:
+            locked: The caller already holds the exclusive file lock.
+        """
+        with self._lock:
+            journal_signature = read_signature(self.journal_path) if self.journaled else None
+            journal_inode = journal_signature[2] if journal_signature else None
+            journal_size = journal_signature[1] if journal_signature else 0
 
-    def _load_users(self) -> Dict[str, Dict]:
-        """Load users from the JSON file."""
-        if not os.path.exists(self.file_path):
-            return {}
-        with open(self.file_path, "r") as file:
-            return json.load(file)
+            if (
+                read_signature(self.file_path) != self._snapshot_signature
+                or journal_inode != self._journal_inode
+                or journal_size < self._journal_offset
+            ):
+                if locked:
+                    self._reload()
+                else:
+                    with file_lock(self.lock_path, shared=True):
+                        self._reload()
+            elif journal_size > self._journal_offset:
+                records, self._journal_offset = read_jsonl(self.journal_path, self._journal_offset)
+                for record in records:
+                    self._apply(record)
+            return self._users
 
-    def _save_users(self, users: Dict[str, Dict]):
-        """Save users to the JSON file."""
-        with open(self.file_path, "w") as file:
-            json.dump(users, file, indent=4)
+    def _reload(self):
+        """Rebuild the in-memory state from the snapshot and the whole journal (caller holds both locks)."""
+        self._snapshot_signature = read_signature(self.file_path)
+        self._users = {}
+        self._user_names_by_email = {}
+        self._user_names_by_id = {}
+        users, self._last_user_id = _read_snapshot(self.file_path)
+        for user_data in users.values():
+            self._apply({"op": "put", "user": user_data})
+
+        self._journal_offset = 0
+        self._journal_inode = None
+        if self.journaled:
+            journal_signature = read_signature(self.journal_path)
+            self._journal_inode = journal_signature[2] if journal_signature else None
+            records, self._journal_offset = read_jsonl(self.journal_path, 0)
+            for record in records:
+                self._apply(record)
+
+    def _apply(self, record: Dict):
+        """Apply a journal record to the in-memory users and indexes (caller holds the lock)."""
+        user_name = record["user"]["user_name"] if record["op"] == "put" else record["user_name"]
+        previous = self._users.get(user_name)
+        if previous is not None:
+            self._user_names_by_email.pop(previous["email"], None)
+            self._user_names_by_id.pop(previous.get("user_id"), None)
+        _apply_record(self._users, record)
+        if record["op"] == "put":
+            user_data = record["user"]
+            self._last_user_id = max(self._last_user_id, _user_id(user_data))
+            self._user_names_by_email[user_data["email"]] = user_name
+            if user_data.get("user_id") is not None:
+                self._user_names_by_id[user_data["user_id"]] = user_name
+
+    def _commit(self, *records: Dict):
+        """Persist mutations and apply them in memory (caller holds both locks and has refreshed).
+
+        All records are written with a single snapshot rewrite or a single journal append and fsync.
+        """
+        if not self.journaled:
+            users = dict(self._users)
+            last_user_id = self._last_user_id
+            for record in records:
+                _apply_record(users, record)
+                if record["op"] == "put":
+                    last_user_id = max(last_user_id, _user_id(record["user"]))
+            atomic_write_text(self.file_path, _snapshot_text(users, last_user_id))
+            self._snapshot_signature = read_signature(self.file_path)
+            for record in records:
+                self._apply(record)
+            return
+
+        self._journal_offset = append_jsonl(self.journal_path, list(records), self._journal_offset)
+        if self._journal_inode is None:
+            self._journal_inode = read_signature(self.journal_path)[2]
+        for record in records:
+            self._apply(record)
+
+        if self._journal_offset >= self.compact_threshold_bytes:
+            self._start_compaction()
+
+    def _start_compaction(self):
+        """Compact the journal in a background thread unless a compaction is already running."""
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        self._compaction_thread = threading.Thread(
+            target=self.compact, name=f"compact-{os.path.basename(self.file_path)}", daemon=True
+        )
+        self._compaction_thread.start()
+
+    def compact(self):
+        """Fold the journal into a new snapshot and truncate it.
+
+        The state is rebuilt from the files rather than from memory, so compaction only needs the
+        file lock and never blocks readers in this process. Snapshot and journal records are
+        idempotent, so a crash between writing the snapshot and truncating the journal is harmless.
+        """
+        try:
+            with file_lock(self.lock_path):
+                if not os.path.exists(self.journal_path):
+                    return
+                records, offset = read_jsonl(self.journal_path, 0)
+                if offset < self.compact_threshold_bytes:
+                    return  # another worker compacted in the meantime
+                users, last_user_id = _read_snapshot(self.file_path)
+                for record in records:
+                    _apply_record(users, record)
+                    if record["op"] == "put":
+                        # Deleted users' puts leave with the journal; their ids stay used
+                        last_user_id = max(last_user_id, _user_id(record["user"]))
+                atomic_write_text(self.file_path, _snapshot_text(users, last_user_id))
+                os.truncate(self.journal_path, 0)
+                logger.info(f"Compacted {len(records)} journal records into {self.file_path}")
+        except Exception as e:
+            logger.error(f"Journal compaction of {self.file_path} failed: {str(e)}")
+
+    def _get_by_user_name(self, user_name: Optional[str]) -> Optional[User]:
+        """Build a fresh User for user_name from the in-memory data (caller has refreshed)."""
+        user_data = self._users.get(user_name) if user_name is not None else None
+        return User.from_dict(user_data) if user_data else None
 
     def get_by_id(self, user_id: int) -> Optional[User]:
         """Retrieve a user by their ID."""
-        users = self._load_users()
-        for user_data in users.values():
-            if user_data["user_id"] == user_id:
-                return User.from_dict(user_data)
-        return None
+        with self._lock:
+            self._load_users()
+            return self._get_by_user_name(self._user_names_by_id.get(user_id))
 
     def get_by_identifier(self, identifier: str) -> Optional[User]:
         """Retrieve a user by their identifier (username)."""
-        users = self._load_users()
-        user_data = users.get(identifier)
-        if user_data:
-            return User.from_dict(user_data)
-        return None
+        with self._lock:
+            self._load_users()
+            return self._get_by_user_name(identifier)
 
     def get_by_email(self, email: str) -> Optional[User]:
         """Retrieve a user by their email address."""
-        users = self._load_users()
-        for user_data in users.values():
-            if user_data["email"] == email:
-                return User.from_dict(user_data)
-        return None
+        with self._lock:
+            self._load_users()
+            return self._get_by_user_name(self._user_names_by_email.get(email))
 
     def get_all(self) -> List[User]:
         """Retrieve all users."""
-        users = self._load_users()
-        return [User.from_dict(user_data) for user_data in users.values()]
+        with self._lock:
+            users = self._load_users()
+            return [User.from_dict(user_data) for user_data in users.values()]
+
+    def _assign_user_id(self, user: User) -> None:
+        """Give a new user the next never used user_id, like the database's identity column (caller holds the locks)."""
+        if user.user_id is None:
+            user.user_id = self._last_user_id + 1
 
     def create(self, user: User) -> User:
         """Create a new user."""
-        users = self._load_users()
-        if user.user_name in users:
-            raise ValueError(f"User with username '{user.user_name}' already exists")
-        users[user.user_name] = user.to_dict()
-        self._save_users(users)
-        return user
+        with self._lock, file_lock(self.lock_path):
+            users = self._load_users(locked=True)
+            if user.user_name in users:
+                raise ValueError(f"User with username '{user.user_name}' already exists")
+            if user.user_name == LAST_USER_ID_KEY:
+                raise ValueError(f"The username '{user.user_name}' is reserved")
+            self._assign_user_id(user)
+            self._commit({"op": "put", "user": user.to_dict()})
+            return user
 
     def update(self, user: User) -> User:
         """Update an existing user."""
-        users = self._load_users()
-        if user.user_name not in users:
-            raise ValueError(f"User with username '{user.user_name}' not found")
-        users[user.user_name] = user.to_dict()
-        self._save_users(users)
-        return user
+        with self._lock, file_lock(self.lock_path):
+            users = self._load_users(locked=True)
+            if user.user_name not in users:
+                raise ValueError(f"User with username '{user.user_name}' not found")
+            self._commit({"op": "put", "user": user.to_dict()})
+            return user
 
     def delete(self, user: User) -> None:
-        """Delete a user."""
-        users = self._load_users()
-        if user.user_name not in users:
-            raise ValueError(f"User with username '{user.user_name}' not found")
-        del users[user.user_name]
-        self._save_users(users)
+        """Delete a user, and with on_delete the data stored for them."""
+        with self._lock, file_lock(self.lock_path):
+            users = self._load_users(locked=True)
+            if user.user_name not in users:
+                raise ValueError(f"User with username '{user.user_name}' not found")
+            user_id = users[user.user_name].get("user_id")
+            self._commit({"op": "delete", "user_name": user.user_name})
+        if self.on_delete is not None and user_id is not None:
+            self.on_delete(user_id)
+
+    def get_many(self, identifiers: List[str]) -> List[User]:
+        """Retrieve the users with the given identifiers (usernames); unknown identifiers are skipped."""
+        with self._lock:
+            self._load_users()
+            users = (self._get_by_user_name(identifier) for identifier in identifiers)
+            return [user for user in users if user is not None]
+
+    def create_many(self, users: List[User]) -> List[User]:
+        """Create several users with a single write; nothing is created if any of them already exists."""
+        with self._lock, file_lock(self.lock_path):
+            existing = self._load_users(locked=True)
+            seen = set()
+            for user in users:
+                if user.user_name in existing or user.user_name in seen:
+                    raise ValueError(f"User with username '{user.user_name}' already exists")
+                if user.user_name == LAST_USER_ID_KEY:
+                    raise ValueError(f"The username '{user.user_name}' is reserved")
+                seen.add(user.user_name)
+            given_user_ids = [user.user_id for user in users if user.user_id is not None]
+            next_user_id = max([self._last_user_id, *given_user_ids]) + 1
+            for user in users:
+                if user.user_id is None:
+                    user.user_id, next_user_id = next_user_id, next_user_id + 1
+            if users:
+                self._commit(*({"op": "put", "user": user.to_dict()} for user in users))
+            return users
+
+    def iter_all(self, batch_size: int = 1000) -> Iterator[User]:
+        """Iterate over all users, building the User objects one at a time.
+
+        The users are taken from the state at the time of the call. A user's dictionary is replaced,
+        never modified, on change, so no lock is held while iterating.
+        """
+        with self._lock:
+            user_data_list = list(self._load_users().values())
+        for user_data in user_data_list:
+            yield User.from_dict(user_data)
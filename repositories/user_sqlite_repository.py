@@ -0,0 +1,114 @@
+"""SQLite-based implementation of the IUserRepository interface."""
+
+from typing import Callable, Iterator, List, Optional, cast
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models.user import User
+from .repository_interfaces import IUserRepository
+
+# Stay well below SQLite's limit on bound parameters per statement
+SQLITE_IN_CHUNK_SIZE = 500
+
+
+class UserSQLiteRepository(IUserRepository):
+    """Repository for managing User entities in a local SQLite database.
+
+    Uses the same User mapping as UserDBRepository. Each operation runs in its own short session,
+    so the connection goes back to the worker's pool as soon as the lookup is done.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], on_delete: Optional[Callable[[int], None]] = None):
+        """Initialize the repository.
+
+        Args:
+            session_factory: Session factory of the database (see utils.sqlite_utils).
+            on_delete: Called with the user_id of every deleted user, to remove the data stored for
+                them outside the database (summaries in it go with the user through ON DELETE CASCADE).
+        """
+        self.session_factory = session_factory
+        self.on_delete = on_delete
+
+    def get_by_id(self, user_id: int) -> Optional[User]:
+        """Retrieve a user by their ID."""
+        with self.session_factory() as session:
+            return session.get(User, user_id)
+
+    def get_by_identifier(self, identifier: str) -> Optional[User]:
+        """Retrieve a user by their identifier (username)."""
+        with self.session_factory() as session:
+            return session.scalars(select(User).where(User.user_name == identifier)).first()
+
+    def get_by_email(self, email: str) -> Optional[User]:
+        """Retrieve a user by their email address."""
+        with self.session_factory() as session:
+            return session.scalars(select(User).where(User.email == email)).first()
+
+    def get_all(self) -> List[User]:
+        """Retrieve all users."""
+        with self.session_factory() as session:
+            return cast(List[User], session.scalars(select(User)).all())
+
+    def create(self, user: User) -> User:
+        """Create a new user."""
+        with self.session_factory() as session:
+            session.add(user)
+            try:
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+                raise ValueError(f"User with username '{user.user_name}' or email '{user.email}' already exists")
+            return user
+
+    def update(self, user: User) -> User:
+        """Update an existing user."""
+        with self.session_factory() as session:
+            session.merge(user)
+            session.commit()
+            return user
+
+    def delete(self, user: User) -> None:
+        """Delete a user."""
+        with self.session_factory() as session:
+            stored = session.merge(user)
+            user_id = stored.user_id
+            session.delete(stored)
+            session.commit()
+        if self.on_delete is not None and user_id is not None:
+            self.on_delete(user_id)
+
+    def get_many(self, identifiers: List[str]) -> List[User]:
+        """Retrieve the users with the given identifiers (usernames); unknown identifiers are skipped."""
+        users: List[User] = []
+        with self.session_factory() as session:
+            for start in range(0, len(identifiers), SQLITE_IN_CHUNK_SIZE):
+                chunk = identifiers[start:start + SQLITE_IN_CHUNK_SIZE]
+                users.extend(session.scalars(select(User).where(User.user_name.in_(chunk))))
+        return users
+
+    def create_many(self, users: List[User]) -> List[User]:
+        """Create several users in one transaction; nothing is created if any of them already exists."""
+        with self.session_factory() as session:
+            session.add_all(users)
+            try:
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+                raise ValueError("One or more users already exist (duplicate username or email)")
+            return users
+
+    def iter_all(self, batch_size: int = 1000) -> Iterator[User]:
+        """Iterate over all users in user_id order, one short session per page (keyset pagination)."""
+        last_user_id = None
+        while True:
+            query = select(User).order_by(User.user_id).limit(batch_size)
+            if last_user_id is not None:
+                query = query.where(User.user_id > last_user_id)
+            with self.session_factory() as session:
+                page = session.scalars(query).all()
+            yield from page
+            if len(page) < batch_size:
+                return
+            last_user_id = page[-1].user_id
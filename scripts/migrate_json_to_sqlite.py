@@ -0,0 +1,111 @@
+"""Copy the users of a JSON user store (users.json plus journal) and their summaries into a SQLite database.
+
+Users keep their ids, so the search index (search_documents.jsonl, used by both deployments) still
+matches them. Users that already exist in the SQLite database (same user name) are skipped together
+with their summaries, so the script can be re-run safely, e.g. once more right before switching
+USER_REPOSITORY_TYPE to sqlite.
+
+Run from the project directory: python -m scripts.migrate_json_to_sqlite --json-path users.json
+"""
+
+import argparse
+import logging
+import os
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from models.summary import Summary
+from repositories.summary_db_repository import SummaryDBRepository
+from repositories.summary_json_repository import DEFAULT_SUMMARY_JSON_PATH, SummaryJsonRepository
+from repositories.user_json_repository import UserJsonRepository
+from repositories.user_sqlite_repository import UserSQLiteRepository
+from utils.sqlite_utils import DEFAULT_SQLITE_DATABASE_PATH, get_sqlite_session_factory
+
+logger = logging.getLogger(__name__)
+
+# Summaries read from the JSON store per page
+SUMMARY_PAGE_SIZE = 1000
+
+
+def migrate_json_to_sqlite(json_path: str, sqlite_path: str, summaries_path: Optional[str] = None) -> int:
+    """Copy all users from the JSON store at json_path, and their summaries, into the SQLite database.
+
+    Args:
+        json_path: Path of the users.json snapshot (a users.json.journal next to it is replayed too).
+        sqlite_path: Path of the SQLite database, created if missing.
+        summaries_path: Path of the JSON summary store, None to copy users only.
+    Returns: The number of users copied.
+    """
+    json_repository = UserJsonRepository(json_path, journaled=True)
+    session_factory = get_sqlite_session_factory(sqlite_path)
+    sqlite_repository = UserSQLiteRepository(session_factory)
+    summary_json_repository = SummaryJsonRepository(summaries_path) if summaries_path else None
+
+    copied = copied_summaries = 0
+    for user in json_repository.get_all():
+        if sqlite_repository.get_by_identifier(user.user_name) is not None:
+            logger.info(f"Skipping existing user {user.user_name}")
+            continue
+        json_user_id = user.user_id
+        if user.user_id is not None and sqlite_repository.get_by_id(user.user_id) is not None:
+            logger.warning(f"User id {user.user_id} of {user.user_name} is taken, assigning a new one")
+            user.user_id = None
+        sqlite_repository.create(user)
+        copied += 1
+        if summary_json_repository is not None and json_user_id is not None:
+            copied_summaries += _copy_summaries(summary_json_repository, json_user_id, user.user_id, session_factory)
+    if summary_json_repository is not None:
+        logger.info(f"Copied {copied_summaries} summaries")
+    return copied
+
+
+def _copy_summaries(
+    summary_json_repository: SummaryJsonRepository,
+    json_user_id: int,
+    user_id: int,
+    session_factory: Callable[[], Session],
+) -> int:
+    """Copy the summaries of one user, oldest first; returns the number copied."""
+    summary_repository = SummaryDBRepository(session_factory)
+    listed, before = [], None
+    while True:
+        page = summary_json_repository.list_for_user(json_user_id, SUMMARY_PAGE_SIZE, before)
+        listed.extend(page)
+        if len(page) < SUMMARY_PAGE_SIZE:
+            break
+        before = (page[-1].created_at, page[-1].summary_id)
+
+    for listed_summary in reversed(listed):
+        summary = summary_json_repository.get(json_user_id, listed_summary.summary_id)
+        values = summary.to_dict()
+        values["user_id"] = user_id
+        with session_factory() as session:
+            # Keep the id the search index refers to, unless the database already uses it
+            if session.get(Summary, summary.summary_id) is not None:
+                values["summary_id"] = None
+        summary_repository.add(Summary.from_dict(values))
+    return len(listed)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    parser = argparse.ArgumentParser(description="Copy users from users.json into a SQLite database")
+    parser.add_argument("--json-path", dest="json_path", default="users.json")
+    parser.add_argument(
+        "--summaries-path",
+        dest="summaries_path",
+        default=os.getenv("SUMMARY_JSON_PATH", DEFAULT_SUMMARY_JSON_PATH),
+        help="JSON summary store whose summaries are copied along with their users",
+    )
+    parser.add_argument(
+        "--sqlite-path",
+        dest="sqlite_path",
+        default=os.getenv("SQLITE_DATABASE_PATH", DEFAULT_SQLITE_DATABASE_PATH),
+    )
+    args = parser.parse_args()
+
+    summaries_path = args.summaries_path if os.path.exists(args.summaries_path) else None
+    count = migrate_json_to_sqlite(args.json_path, args.sqlite_path, summaries_path)
+    logger.info(f"Copied {count} users from {args.json_path} to {args.sqlite_path}")
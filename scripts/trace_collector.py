@@ -0,0 +1,106 @@
+"""Minimal OTLP/HTTP collector for local development: receives traces in the JSON encoding and prints them.
+
+Start it, then run the application with OTEL_EXPORTER_OTLP_ENDPOINT=http://localhost:4318; every
+request's spans are printed as an indented waterfall and appended to the output file (one OTLP
+export request per line), which can be loaded into a real tracing backend later.
+
+Run from the project directory: python -m scripts.trace_collector --port 4318 --output traces.jsonl
+"""
+
+import argparse
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACES_PATH = "/v1/traces"
+
+
+def spans_of(export_request: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Return the spans of an OTLP/JSON export request."""
+    return [
+        span
+        for resource_spans in export_request.get("resourceSpans", [])
+        for scope_spans in resource_spans.get("scopeSpans", [])
+        for span in scope_spans.get("spans", [])
+    ]
+
+
+def format_trace(spans: List[Dict[str, Any]]) -> List[str]:
+    """Return the spans of one trace as lines of a waterfall: offset, duration and name, children indented."""
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    span_ids = {span["spanId"] for span in spans}
+    for span in spans:
+        # Spans whose parent is in another service (or was not received) are shown as roots
+        parent_id = span.get("parentSpanId") if span.get("parentSpanId") in span_ids else None
+        children.setdefault(parent_id, []).append(span)
+    trace_start = min(int(span["startTimeUnixNano"]) for span in spans)
+
+    lines = []
+
+    def add(span: Dict[str, Any], depth: int) -> None:
+        start, end = int(span["startTimeUnixNano"]), int(span["endTimeUnixNano"])
+        error = f"  [{span['status']['message']}]" if span.get("status", {}).get("code") == 2 else ""
+        lines.append(f"{(start - trace_start) / 1e6:9.1f}ms {(end - start) / 1e6:9.1f}ms  "
+                     f"{'  ' * depth}{span['name']}{error}")
+        for child in sorted(children.get(span["spanId"], []), key=lambda s: int(s["startTimeUnixNano"])):
+            add(child, depth + 1)
+
+    for root in sorted(children.get(None, []), key=lambda s: int(s["startTimeUnixNano"])):
+        add(root, 0)
+    return lines
+
+
+def make_handler(output_path: Optional[str]):
+    """Return a request handler class storing received traces in output_path (if given)."""
+
+    class CollectorHandler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:
+            if self.path != TRACES_PATH:
+                self.send_error(404)
+                return
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                export_request = json.loads(body)
+            except ValueError:
+                self.send_error(400, "Expected OTLP/JSON")
+                return
+
+            if output_path:
+                with open(output_path, "a", encoding="utf-8") as output:
+                    output.write(json.dumps(export_request) + "\n")
+            traces: Dict[str, List[Dict[str, Any]]] = {}
+            for span in spans_of(export_request):
+                traces.setdefault(span["traceId"], []).append(span)
+            for trace_id, spans in traces.items():
+                print(f"trace {trace_id}")
+                print("\n".join(format_trace(spans)), flush=True)
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, format: str, *args: Any) -> None:
+            logger.debug(format % args)
+
+    return CollectorHandler
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    parser = argparse.ArgumentParser(description="Receive OTLP/JSON traces and print them")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4318, help="Port (4318 is the OTLP/HTTP default)")
+    parser.add_argument("--output", help="File to append the received export requests to (JSONL)")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.output))
+    logger.info(f"Collecting traces on http://{args.host}:{args.port}{TRACES_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
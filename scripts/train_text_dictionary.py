@@ -0,0 +1,139 @@
+"""Train a zstd dictionary on stored summaries and transcripts, and optionally recompress stored texts.
+
+The new dictionary becomes the current one; older dictionaries are kept, so existing blobs stay
+readable. For the postgres and sqlite repository types it is stored in the text_dictionaries table of
+the database, for the json type in TEXT_DICTIONARY_DIR (see utils/text_codec.py). Workers switch to
+the new dictionary within a minute.
+
+With --recompress, the texts in the summaries and transcripts tables are rewritten with the new
+dictionary (e.g. after the migration turned them into uncompressed blobs). With --decompress they are
+rewritten as uncompressed blobs, which is required before downgrading the compression migration.
+The JSONL files of the json repository type are append-only; new records use the new dictionary.
+
+Run from the project directory: python -m scripts.train_text_dictionary --samples 5000 --recompress
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+from typing import Callable, List, Optional
+
+from sqlalchemy import LargeBinary, column, func, inspect, select, table
+from sqlalchemy.orm import Session
+
+from models.summary import Summary
+from models.transcript import Transcript
+from repositories.summary_json_repository import DEFAULT_SUMMARY_JSON_PATH
+from repositories.search_index_repository import DEFAULT_SEARCH_INDEX_PATH
+from utils import db_utils
+from utils.sqlite_utils import DEFAULT_SQLITE_DATABASE_PATH, get_sqlite_session_factory
+from utils.text_codec import DEFAULT_DICTIONARY_SIZE, FORMAT_RAW, get_text_codec
+
+logger = logging.getLogger(__name__)
+
+# Rows rewritten per transaction by --recompress and --decompress
+BATCH_SIZE = 500
+
+
+def get_session_factory(repository_type: str) -> Optional[Callable[[], Session]]:
+    """Return the session factory of the database holding summaries, None for the json type."""
+    if repository_type == "postgres":
+        return db_utils.SessionLocal
+    if repository_type == "sqlite":
+        return get_sqlite_session_factory(os.getenv("SQLITE_DATABASE_PATH", DEFAULT_SQLITE_DATABASE_PATH))
+    return None
+
+
+def sample_database(session_factory: Callable[[], Session], limit: int) -> List[str]:
+    """Return up to limit random summary and transcript texts from the database."""
+    samples = []
+    with session_factory() as session:
+        for text_column in (Summary.summary, Transcript.transcript):
+            if not inspect(session.get_bind()).has_table(text_column.table.name):
+                continue
+            query = select(text_column).order_by(func.random()).limit(limit // 2 or 1)
+            samples.extend(session.scalars(query))
+    return samples
+
+
+def sample_jsonl(limit: int) -> List[str]:
+    """Return up to limit random texts from the JSONL files of the json repository type."""
+    codec = get_text_codec()
+    samples = []
+    for path, text_field, blob_field in (
+        (os.getenv("SUMMARY_JSON_PATH", DEFAULT_SUMMARY_JSON_PATH), "summary", "summary_blob"),
+        (os.getenv("SEARCH_INDEX_PATH", DEFAULT_SEARCH_INDEX_PATH), "text", "text_blob"),
+    ):
+        if not os.path.exists(path):
+            continue
+        with open(path, "rb") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                samples.append(codec.decode_str(record[blob_field]) if blob_field in record else record[text_field])
+    random.shuffle(samples)
+    return samples[:limit]
+
+
+def rewrite_texts(session_factory: Callable[[], Session], compress: bool) -> int:
+    """Rewrite all stored summary and transcript texts, compressed with the current dictionary or raw.
+
+    Returns: The number of rows rewritten.
+    """
+    codec = get_text_codec()
+    rewritten = 0
+    for model, key_name, text_name in ((Summary, "summary_id", "summary"), (Transcript, "video_id", "transcript")):
+        # A plain table, so that the blobs written here bypass the CompressedText column type
+        raw_table = table(model.__tablename__, column(key_name), column(text_name, LargeBinary))
+        key_column, text_column = getattr(model, key_name), getattr(model, text_name)
+        with session_factory() as session:
+            if not inspect(session.get_bind()).has_table(model.__tablename__):
+                continue
+        last_key = None
+        while True:
+            with session_factory() as session:
+                query = select(key_column, text_column).order_by(key_column).limit(BATCH_SIZE)
+                if last_key is not None:
+                    query = query.where(key_column > last_key)
+                rows = session.execute(query).all()
+                if not rows:
+                    break
+                for key, text in rows:
+                    blob = codec.encode(text) if compress else bytes([FORMAT_RAW]) + text.encode("utf-8")
+                    session.execute(
+                        raw_table.update().where(raw_table.c[key_name] == key).values({text_name: blob})
+                    )
+                session.commit()
+            rewritten += len(rows)
+            last_key = rows[-1][0]
+            logger.info(f"Rewrote {rewritten} texts")
+    return rewritten
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    parser = argparse.ArgumentParser(description="Train a zstd dictionary on stored summaries and transcripts")
+    parser.add_argument("--samples", type=int, default=5000, help="Number of texts to train on")
+    parser.add_argument("--dict-size", dest="dict_size", type=int, default=DEFAULT_DICTIONARY_SIZE)
+    parser.add_argument("--recompress", action="store_true", help="Rewrite stored texts with the new dictionary")
+    parser.add_argument("--decompress", action="store_true", help="Only rewrite stored texts uncompressed")
+    args = parser.parse_args()
+
+    factory = get_session_factory(os.getenv("USER_REPOSITORY_TYPE", "json"))
+    if args.decompress:
+        if factory is None:
+            parser.error("--decompress needs the postgres or sqlite repository type")
+        logger.info(f"Decompressed {rewrite_texts(factory, compress=False)} texts")
+    else:
+        texts = sample_database(factory, args.samples) if factory is not None else sample_jsonl(args.samples)
+        if len(texts) < 10:
+            parser.error(f"Found {len(texts)} texts, too few to train a dictionary")
+        get_text_codec().dictionary_store.train(texts, args.dict_size)
+        if args.recompress and factory is not None:
+            # Make the codec pick up the new dictionary right away
+            get_text_codec()._checked_at = float("-inf")
+            logger.info(f"Recompressed {rewrite_texts(factory, compress=True)} texts")
@@ -0,0 +1,256 @@
+"""Admission control for expensive requests: limits on in-flight requests and memory, with a bounded wait queue."""
+
+import asyncio
+import logging
+import sys
+import time
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+from services.service_interfaces import IAdmissionController
+from utils.deadline import remaining_seconds
+from utils.metrics import (
+    ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_QUEUE_WAIT_SECONDS, ADMISSION_REJECTIONS,
+    ADMISSION_RESERVED, ADMISSION_RESERVED_PER_REQUEST, PROCESS_PEAK_RSS_BYTES
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_MAX_QUEUE = 16
+DEFAULT_QUEUE_TIMEOUT_SECONDS = 10.0
+DEFAULT_MEMORY_BUDGET_BYTES = 512 * 1024 * 1024
+# Peak allocation per transcript character, measured with tracemalloc: mostly the word shingles of the
+# near-duplicate fingerprint (see utils.minhash), then the joined text and the JSON body of the LLM request
+BYTES_PER_TRANSCRIPT_CHARACTER = 48
+BASE_REQUEST_BYTES = 1024 * 1024
+# Weight of the latest request in the moving average of the time a slot is held
+_SERVICE_TIME_SMOOTHING = 0.2
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a request is not admitted; it should be answered with 503 and Retry-After."""
+
+    def __init__(self, reason: str, retry_after: float):
+        """Initialize the error.
+
+        Args:
+            reason: Why the request was rejected (too_large, queue_full or queue_timeout).
+            retry_after: Seconds the client should wait before retrying.
+        """
+        super().__init__(f"Request rejected by admission control ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController(IAdmissionController):
+    """Lets requests run while their costs fit the capacity, queues max_queue more, and rejects the rest.
+
+    Under a spike, admitting everything makes every request slow down together until clients time
+    out, so the work done is wasted. Capping the requests in flight keeps their latency bounded; the
+    excess gets a fast rejection with a Retry-After estimated from the queue length and the average
+    time a slot is held. Waiters are admitted in arrival order, so a large request at the head of the
+    queue is not starved by smaller ones behind it.
+
+    The cost of a request defaults to 1, making the capacity a limit on requests in flight; with
+    costs in bytes it is a memory budget (see MemoryBudget).
+
+    One controller per worker process, used from the event loop only (not thread-safe).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        queue_timeout: float = DEFAULT_QUEUE_TIMEOUT_SECONDS,
+    ):
+        """Initialize the controller.
+
+        Args:
+            name: Label of the controller's metrics (e.g. the endpoint).
+            max_in_flight: The capacity: requests allowed to run at once, or the sum of their costs.
+            max_queue: Requests allowed to wait for a slot; 0 rejects as soon as the capacity is used.
+            queue_timeout: Seconds a request may wait for a slot before it is rejected.
+        """
+        self.name = name
+        self.capacity = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._in_flight = 0
+        self._reserved = 0
+        self._waiters: Deque[Tuple[asyncio.Future, int]] = deque()
+        self._service_seconds: Optional[float] = None
+
+    @property
+    def in_flight(self) -> int:
+        """The number of admitted requests that have not been released."""
+        return self._in_flight
+
+    @property
+    def reserved(self) -> int:
+        """The sum of the costs of the admitted requests."""
+        return self._reserved
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of requests waiting for a slot."""
+        return len(self._waiters)
+
+    def _retry_after(self) -> float:
+        """Estimate the seconds until the queue has drained enough to admit a new request."""
+        service_seconds = self._service_seconds or self.queue_timeout
+        return max(1.0, service_seconds * (len(self._waiters) + 1) / max(self._in_flight, 1))
+
+    def _reject(self, reason: str) -> AdmissionRejectedError:
+        ADMISSION_REJECTIONS.labels(controller=self.name, reason=reason).inc()
+        logger.warning(
+            f"Rejected {self.name} request ({reason}): {self._in_flight} in flight, {len(self._waiters)} queued"
+        )
+        return AdmissionRejectedError(reason, self._retry_after())
+
+    def _update_gauges(self) -> None:
+        ADMISSION_IN_FLIGHT.labels(controller=self.name).set(self._in_flight)
+        ADMISSION_RESERVED.labels(controller=self.name).set(self._reserved)
+        ADMISSION_QUEUE_DEPTH.labels(controller=self.name).set(len(self._waiters))
+
+    def _admit(self, cost: int) -> None:
+        self._in_flight += 1
+        self._reserved += cost
+
+    async def acquire(self, cost: int = 1) -> float:
+        """Wait until the request's cost fits the capacity.
+
+        Args:
+            cost: The share of the capacity the request holds until it is released.
+        Returns: The time the request was admitted (time.monotonic()), to pass to release.
+        Raises: AdmissionRejectedError if the cost exceeds the whole capacity (too_large), the queue is full
+            (queue_full) or the request waited longer than queue_timeout or until its deadline (queue_timeout).
+        """
+        if cost > self.capacity:
+            raise self._reject("too_large")
+        if not self._waiters and self._reserved + cost <= self.capacity:
+            self._admit(cost)
+            self._update_gauges()
+            return time.monotonic()
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append((waiter, cost))
+        self._update_gauges()
+        queued_at = time.monotonic()
+        # Waiting past the request's deadline is pointless: it would time out right after admission
+        remaining = remaining_seconds()
+        timeout = self.queue_timeout if remaining is None else min(self.queue_timeout, remaining)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                self._remove_waiter(waiter)
+                raise self._reject("queue_timeout")
+            # The request was admitted just as the timeout fired; keep the slot
+        except asyncio.CancelledError:
+            # The client went away while queued: give up the place, or the slot if it was already granted
+            if waiter.done():
+                self._free(cost)
+            else:
+                self._remove_waiter(waiter)
+            raise
+        ADMISSION_QUEUE_WAIT_SECONDS.labels(controller=self.name).observe(time.monotonic() - queued_at)
+        return time.monotonic()
+
+    def release(self, admitted_at: float, cost: int = 1) -> None:
+        """Give up the slot of an admitted request, admitting waiters that fit now.
+
+        Args:
+            admitted_at: The value returned by acquire.
+            cost: The cost passed to acquire.
+        """
+        held_seconds = time.monotonic() - admitted_at
+        if self._service_seconds is None:
+            self._service_seconds = held_seconds
+        else:
+            self._service_seconds += _SERVICE_TIME_SMOOTHING * (held_seconds - self._service_seconds)
+        self._free(cost)
+
+    def _remove_waiter(self, waiter: asyncio.Future) -> None:
+        """Drop a waiter that gave up; the ones behind it may fit now."""
+        self._waiters = deque(entry for entry in self._waiters if entry[0] is not waiter)
+        waiter.cancel()
+        self._admit_waiters()
+        self._update_gauges()
+
+    def _free(self, cost: int) -> None:
+        """Return the cost of a request to the capacity and admit the waiters that fit."""
+        self._in_flight -= 1
+        self._reserved -= cost
+        self._admit_waiters()
+        self._update_gauges()
+
+    def _admit_waiters(self) -> None:
+        """Admit waiters in arrival order for as long as the oldest one fits."""
+        while self._waiters and self._reserved + self._waiters[0][1] <= self.capacity:
+            waiter, cost = self._waiters.popleft()
+            self._admit(cost)
+            waiter.set_result(None)
+
+
+class MemoryBudget(AdmissionController):
+    """Admission controller whose capacity is a worker's memory budget in bytes.
+
+    Requests reserve the memory they are estimated to need (see estimate_summarize_memory), so a few
+    very long transcripts cannot push the worker past its container memory limit while many short
+    ones still run side by side. A request estimated above the whole budget is rejected (too_large).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        budget_bytes: int = DEFAULT_MEMORY_BUDGET_BYTES,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        queue_timeout: float = DEFAULT_QUEUE_TIMEOUT_SECONDS,
+    ):
+        """Initialize the budget.
+
+        Args:
+            name: Label of the budget's metrics.
+            budget_bytes: Bytes the admitted requests may reserve together.
+            max_queue: Requests allowed to wait for memory.
+            queue_timeout: Seconds a request may wait for memory before it is rejected.
+        """
+        super().__init__(name, max_in_flight=budget_bytes, max_queue=max_queue, queue_timeout=queue_timeout)
+
+    async def acquire(self, cost: int = 1) -> float:
+        """Reserve cost bytes (see AdmissionController.acquire)."""
+        admitted_at = await super().acquire(cost)
+        ADMISSION_RESERVED_PER_REQUEST.labels(controller=self.name).observe(cost)
+        return admitted_at
+
+    def release(self, admitted_at: float, cost: int = 1) -> None:
+        """Return cost bytes to the budget (see AdmissionController.release) and report the peak memory."""
+        super().release(admitted_at, cost)
+        peak_bytes = peak_rss_bytes()
+        if peak_bytes is not None:
+            PROCESS_PEAK_RSS_BYTES.set(peak_bytes)
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Return the peak resident memory of this process, None where the platform does not report it."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def estimate_summarize_memory(transcript: List[str]) -> int:
+    """Estimate the peak bytes summarizing a transcript allocates (joined text, fingerprint, LLM request).
+
+    Args:
+        transcript: The transcript segments.
+    Returns: The bytes to reserve in the memory budget.
+    """
+    return BASE_REQUEST_BYTES + BYTES_PER_TRANSCRIPT_CHARACTER * sum(len(segment) for segment in transcript)
@@ -4,22 +4,52 @@ This module defines and provides dependencies for various services used in the a
 including user authentication, YouTube API, and OpenAI API services.
 """
 
+import os
+from typing import Optional
+
 from fastapi import Depends, HTTPException
 from starlette import status
 from fastapi.security import OAuth2PasswordBearer
-from youtube_transcript_api import YouTubeTranscriptApi
-# noinspection PyPackageRequirements
-from googleapiclient.discovery import build
-from openai import OpenAI
-
-from services.user_auth_service import UserAuthService
-from services.service_interfaces import IUserAuthService
-from repositories.repository_provider import get_repository, IUserRepository
+
+from services.admission_control_service import (
+    DEFAULT_MAX_IN_FLIGHT, DEFAULT_MAX_QUEUE, DEFAULT_MEMORY_BUDGET_BYTES, DEFAULT_QUEUE_TIMEOUT_SECONDS,
+    AdmissionController, MemoryBudget
+)
+from services.llm_scheduler_service import (
+    DEFAULT_MAX_CONCURRENCY, DEFAULT_MAX_PER_USER, FairScheduler, parse_user_limits
+)
+from services.login_throttle_service import (
+    DEFAULT_MAX_ATTEMPTS_PER_IDENTIFIER, DEFAULT_MAX_ATTEMPTS_PER_IP, DEFAULT_WINDOW_SECONDS, LoginThrottleService
+)
+from services.related_video_service import RelatedVideoService
+from services.summary_history_service import SummaryHistoryService
+from services.summary_reuse_service import DEFAULT_NEAR_DUPLICATE_THRESHOLD, SummaryReuseService
+from services.user_auth_service import AsyncUserAuthService, UserAuthService
+from services.service_interfaces import (
+    IAdmissionController, IAsyncUserAuthService, ILLMScheduler, ILoginThrottleService, IRelatedVideoService,
+    ISummaryHistoryService, ISummaryReuseService, IUserAuthService
+)
+from repositories.login_attempt_db_repository import LoginAttemptDBRepository
+from repositories.login_attempt_memory_repository import LoginAttemptMemoryRepository
+from repositories.repository_provider import (
+    get_async_repository, get_repository, get_search_repository, get_summary_repository, IUserRepository
+)
+from repositories.repository_interfaces import IAsyncUserRepository, ISearchRepository, ISummaryRepository
+from utils import db_utils
+from utils.minhash import LshIndex
+from utils.vector_index import DEFAULT_DIMENSIONS, VectorIndex
 from services.youtube_api_service import YouTubeAPIService
 from services.openai_api_service import OpenAIAPIService
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Throttle state has to outlive a single request, so there is one service per process
+_login_throttle_service: Optional[ILoginThrottleService] = None
+# Admission state is per worker process as well
+_summarize_admission_controller: Optional[IAdmissionController] = None
+_summarize_memory_budget: Optional[IAdmissionController] = None
+_llm_scheduler: Optional[ILLMScheduler] = None
+
 
 def get_user_auth_service2(repo: IUserRepository = Depends(get_repository)) -> IUserAuthService:
     """Provide an instance of UserAuthService.
@@ -32,15 +62,81 @@ def get_user_auth_service2(repo: IUserRepository = Depends(get_repository)) -> I
     return UserAuthService(repo)
 
 
-def get_current_user(
+def get_async_user_auth_service(
+    repo: IAsyncUserRepository = Depends(get_async_repository)
+) -> IAsyncUserAuthService:
+    """Provide an instance of AsyncUserAuthService.
+
+    Args:
+        repo: An instance of IAsyncUserRepository, injected by FastAPI.
+
+    Returns: An instance of IAsyncUserAuthService (specifically, AsyncUserAuthService).
+    """
+    return AsyncUserAuthService(repo)
+
+
+def get_summary_history_service(
+    summary_repository: ISummaryRepository = Depends(get_summary_repository),
+    user_repository: IAsyncUserRepository = Depends(get_async_repository),
+    search_repository: ISearchRepository = Depends(get_search_repository),
+) -> ISummaryHistoryService:
+    """Provide an instance of SummaryHistoryService.
+
+    Args:
+        summary_repository: An instance of ISummaryRepository, injected by FastAPI.
+        user_repository: An instance of IAsyncUserRepository, injected by FastAPI.
+        search_repository: An instance of ISearchRepository, injected by FastAPI.
+
+    Returns: An instance of ISummaryHistoryService (specifically, SummaryHistoryService).
+    """
+    return SummaryHistoryService(summary_repository, user_repository, search_repository)
+
+
+def get_related_video_service() -> IRelatedVideoService:
+    """Provide an instance of RelatedVideoService.
+
+    The vector index lives in VECTOR_INDEX_DIR (default vector_index) and is shared by all workers;
+    VECTOR_INDEX_DIMENSIONS (default 1024) must not change once the index exists.
+
+    Returns: An instance of IRelatedVideoService (specifically, RelatedVideoService).
+    """
+    return RelatedVideoService(VectorIndex.shared(
+        os.getenv("VECTOR_INDEX_DIR", "vector_index"),
+        int(os.getenv("VECTOR_INDEX_DIMENSIONS", DEFAULT_DIMENSIONS)),
+    ))
+
+
+def get_summary_reuse_service(
+    summary_repository: ISummaryRepository = Depends(get_summary_repository),
+) -> ISummaryReuseService:
+    """Provide an instance of SummaryReuseService.
+
+    Transcript fingerprints are kept in TRANSCRIPT_FINGERPRINTS_PATH (default transcript_fingerprints.jsonl);
+    NEAR_DUPLICATE_THRESHOLD (default 0.9) is the similarity from which a stored summary is reused.
+
+    Args:
+        summary_repository: An instance of ISummaryRepository, injected by FastAPI.
+
+    Returns: An instance of ISummaryReuseService (specifically, SummaryReuseService).
+    """
+    return SummaryReuseService(
+        LshIndex.shared(os.getenv("TRANSCRIPT_FINGERPRINTS_PATH", "transcript_fingerprints.jsonl")),
+        summary_repository,
+        threshold=float(os.getenv("NEAR_DUPLICATE_THRESHOLD", DEFAULT_NEAR_DUPLICATE_THRESHOLD)),
+    )
+
+
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    auth_service: IUserAuthService = Depends(get_user_auth_service2)
+    auth_service: IAsyncUserAuthService = Depends(get_async_user_auth_service)
 ) -> str:
     """Dependency to get the current authenticated user.
 
+    Runs on the async authentication path, so the user lookup never blocks the event loop.
+
     Args:
         token: The JWT token from the request, injected by FastAPI.
-        auth_service: An instance of IUserAuthService, injected by FastAPI.
+        auth_service: An instance of IAsyncUserAuthService, injected by FastAPI.
 
     Returns: The username of the authenticated user.
 
@@ -52,7 +148,7 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        user = auth_service.authenticate_user_by_token(token)
+        user = await auth_service.authenticate_user_by_token(token)
         if user is None:
             raise credentials_exception
         return user.user_name
@@ -60,20 +156,122 @@ def get_current_user(
         raise credentials_exception
 
 
+def get_current_admin_user(current_user: str = Depends(get_current_user)) -> str:
+    """Dependency to get the current user, who must be listed in ADMIN_USERS.
+
+    Args:
+        current_user: The authenticated user, injected by FastAPI.
+
+    Returns: The username of the authenticated admin.
+
+    Raises: HTTPException: If the user is not an admin.
+    """
+    admin_users = {name.strip() for name in os.getenv("ADMIN_USERS", "").split(",") if name.strip()}
+    if current_user not in admin_users:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
+    return current_user
+
+
 def get_youtube_service() -> YouTubeAPIService:
     """Provide an instance of YouTubeAPIService.
 
-    Returns: An instance of YouTubeAPIService with YouTubeTranscriptApi and build function injected.
+    Returns: An instance of YouTubeAPIService (the YouTube SDKs are imported on first use).
     """
-    return YouTubeAPIService(
-        youtube_transcript_api=YouTubeTranscriptApi,
-        youtube_build=build
-    )
+    return YouTubeAPIService()
 
 
 def get_openai_service() -> OpenAIAPIService:
     """Provide an instance of OpenAIAPIService.
 
-    Returns: An instance of OpenAIAPIService with OpenAI client injected.
+    Returns: An instance of OpenAIAPIService with an OpenAI client for OPENAI_API_KEY.
+    """
+    return OpenAIAPIService()
+
+
+def get_login_throttle_service() -> ILoginThrottleService:
+    """Provide the process-wide LoginThrottleService.
+
+    Attempts are kept in memory unless LOGIN_THROTTLE_BACKEND=postgres, in which case they are shared
+    between all workers through the login_attempts table.
+
+    Returns: An instance of ILoginThrottleService (specifically, LoginThrottleService).
+    Raises: ValueError if an invalid backend is specified.
+    """
+    global _login_throttle_service
+    if _login_throttle_service is None:
+        backend = os.getenv("LOGIN_THROTTLE_BACKEND", "memory")
+        if backend == "memory":
+            attempt_repository = LoginAttemptMemoryRepository()
+        elif backend == "postgres":
+            if db_utils.SessionLocal is None:
+                # No database in CI, keep throttling per process
+                attempt_repository = LoginAttemptMemoryRepository()
+            else:
+                attempt_repository = LoginAttemptDBRepository(db_utils.SessionLocal)
+        else:
+            raise ValueError(f"Invalid LOGIN_THROTTLE_BACKEND: {backend}")
+        _login_throttle_service = LoginThrottleService(
+            attempt_repository,
+            max_attempts_per_identifier=int(
+                os.getenv("LOGIN_THROTTLE_MAX_PER_IDENTIFIER", DEFAULT_MAX_ATTEMPTS_PER_IDENTIFIER)
+            ),
+            max_attempts_per_ip=int(os.getenv("LOGIN_THROTTLE_MAX_PER_IP", DEFAULT_MAX_ATTEMPTS_PER_IP)),
+            window_seconds=float(os.getenv("LOGIN_THROTTLE_WINDOW_SECONDS", DEFAULT_WINDOW_SECONDS)),
+        )
+    return _login_throttle_service
+
+
+def get_summarize_admission_controller() -> IAdmissionController:
+    """Provide the worker's admission controller for /summarize.
+
+    The limits are per worker process: SUMMARIZE_MAX_IN_FLIGHT concurrent summarizations,
+    SUMMARIZE_MAX_QUEUE waiting ones, each for at most SUMMARIZE_QUEUE_TIMEOUT_SECONDS.
+
+    Returns: An instance of IAdmissionController (specifically, AdmissionController).
+    """
+    global _summarize_admission_controller
+    if _summarize_admission_controller is None:
+        _summarize_admission_controller = AdmissionController(
+            "summarize",
+            max_in_flight=int(os.getenv("SUMMARIZE_MAX_IN_FLIGHT", DEFAULT_MAX_IN_FLIGHT)),
+            max_queue=int(os.getenv("SUMMARIZE_MAX_QUEUE", DEFAULT_MAX_QUEUE)),
+            queue_timeout=float(os.getenv("SUMMARIZE_QUEUE_TIMEOUT_SECONDS", DEFAULT_QUEUE_TIMEOUT_SECONDS)),
+        )
+    return _summarize_admission_controller
+
+
+def get_summarize_memory_budget() -> IAdmissionController:
+    """Provide the worker's memory budget for /summarize.
+
+    Requests reserve their estimated peak memory out of SUMMARIZE_MEMORY_BUDGET_BYTES per worker
+    process; requests that do not fit wait like those over the in-flight limit.
+
+    Returns: An instance of IAdmissionController (specifically, MemoryBudget).
+    """
+    global _summarize_memory_budget
+    if _summarize_memory_budget is None:
+        _summarize_memory_budget = MemoryBudget(
+            "summarize_memory",
+            budget_bytes=int(os.getenv("SUMMARIZE_MEMORY_BUDGET_BYTES", DEFAULT_MEMORY_BUDGET_BYTES)),
+            max_queue=int(os.getenv("SUMMARIZE_MAX_QUEUE", DEFAULT_MAX_QUEUE)),
+            queue_timeout=float(os.getenv("SUMMARIZE_QUEUE_TIMEOUT_SECONDS", DEFAULT_QUEUE_TIMEOUT_SECONDS)),
+        )
+    return _summarize_memory_budget
+
+
+def get_llm_scheduler() -> ILLMScheduler:
+    """Provide the worker's fair scheduler of LLM calls.
+
+    The worker runs LLM_MAX_CONCURRENCY calls at once, at most LLM_MAX_PER_USER per user unless
+    LLM_USER_CONCURRENCY (e.g. "alice=4,nightly-import=1") sets a user's own limit.
+
+    Returns: An instance of ILLMScheduler (specifically, FairScheduler).
     """
-    return OpenAIAPIService(client=OpenAI())
+    global _llm_scheduler
+    if _llm_scheduler is None:
+        _llm_scheduler = FairScheduler(
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)),
+            max_per_user=int(os.getenv("LLM_MAX_PER_USER", DEFAULT_MAX_PER_USER)),
+            user_limits=parse_user_limits(os.getenv("LLM_USER_CONCURRENCY", "")),
+        )
+    return _llm_scheduler
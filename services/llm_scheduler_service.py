@@ -0,0 +1,192 @@
+"""Weighted fair scheduling of LLM calls across users and priorities."""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from services.service_interfaces import ILLMScheduler
+from utils.deadline import DeadlineExceededError, remaining_seconds
+from utils.metrics import LLM_SCHEDULER_IN_FLIGHT, LLM_SCHEDULER_QUEUE_DEPTH, LLM_SCHEDULER_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+# Share of the LLM slots a queue of each priority gets while queues of both are waiting
+DEFAULT_PRIORITY_WEIGHTS = {INTERACTIVE: 4.0, BATCH: 1.0}
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_MAX_PER_USER = 2
+
+
+class _Flow:
+    """The waiting calls of one user at one priority, with the flow's last virtual finish tag."""
+
+    __slots__ = ("weight", "finish", "waiters")
+
+    def __init__(self, weight: float):
+        self.weight = weight
+        self.finish = 0.0
+        self.waiters: Deque[Tuple[float, int, asyncio.Future]] = deque()
+
+
+class FairScheduler(ILLMScheduler):
+    """Start-time fair queueing of LLM calls, with a queue per user and priority.
+
+    Served first-come, first-served, one user's batch takes every slot and interactive users wait
+    behind it for minutes. Here every (user, priority) queue gets a share of the slots proportional
+    to the priority's weight: a call is tagged on arrival with the virtual time its queue may start
+    it (the later of the scheduler's virtual time and the finish tag of the queue's previous call),
+    and a free slot goes to the smallest tag. A user's new interactive call therefore starts as
+    soon as a slot frees, however many batch calls are queued, while batch calls still use every
+    slot nobody else wants. Each user also runs at most max_per_user calls at once (or their own
+    limit from user_limits).
+
+    One scheduler per worker process, used from the event loop only (not thread-safe).
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_per_user: int = DEFAULT_MAX_PER_USER,
+        user_limits: Optional[Dict[str, int]] = None,
+        priority_weights: Optional[Dict[str, float]] = None,
+    ):
+        """Initialize the scheduler.
+
+        Args:
+            max_concurrency: LLM calls allowed to run at once.
+            max_per_user: LLM calls one user may run at once.
+            user_limits: Per-user exceptions to max_per_user.
+            priority_weights: Weight of each priority (default DEFAULT_PRIORITY_WEIGHTS).
+        """
+        self.max_concurrency = max_concurrency
+        self.max_per_user = max_per_user
+        self.user_limits = dict(user_limits or {})
+        self.priority_weights = dict(priority_weights or DEFAULT_PRIORITY_WEIGHTS)
+        self._virtual_time = 0.0
+        self._sequence = 0
+        self._flows: Dict[Tuple[str, str], _Flow] = {}
+        self._running_per_user: Dict[str, int] = {}
+        self._running_per_priority: Dict[str, int] = {priority: 0 for priority in self.priority_weights}
+
+    @property
+    def in_flight(self) -> int:
+        """The number of calls holding a slot."""
+        return sum(self._running_per_priority.values())
+
+    def queue_depth(self, priority: Optional[str] = None) -> int:
+        """Return the number of waiting calls, of one priority or of all."""
+        return sum(len(flow.waiters) for (_, flow_priority), flow in self._flows.items()
+                   if priority is None or flow_priority == priority)
+
+    def user_limit(self, user_name: str) -> int:
+        """Return the number of calls the user may run at once."""
+        return self.user_limits.get(user_name, self.max_per_user)
+
+    async def acquire(self, user_name: str, priority: str = INTERACTIVE) -> None:
+        """Wait for the user's turn to call the LLM.
+
+        Args:
+            user_name: The user the call is made for.
+            priority: INTERACTIVE or BATCH.
+        Raises: ValueError for an unknown priority, DeadlineExceededError if the request's deadline
+            passed while waiting.
+        """
+        weight = self.priority_weights.get(priority)
+        if weight is None:
+            raise ValueError(f"Unknown priority: {priority}")
+        flow = self._flows.get((user_name, priority))
+        if flow is None:
+            flow = self._flows[(user_name, priority)] = _Flow(weight)
+        start = max(self._virtual_time, flow.finish)
+        flow.finish = start + 1.0 / weight
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._sequence += 1
+        flow.waiters.append((start, self._sequence, waiter))
+        self._dispatch()
+        if waiter.done():
+            LLM_SCHEDULER_WAIT_SECONDS.labels(priority=priority).observe(0.0)
+            return
+
+        queued_at = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), remaining_seconds())
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                self._remove_waiter(flow, waiter)
+                logger.warning(f"Deadline passed while {user_name}'s {priority} call waited for the LLM")
+                raise DeadlineExceededError("llm queue")
+            # The call was started just as the deadline passed; keep the slot
+        except asyncio.CancelledError:
+            if waiter.done():
+                self.release(user_name, priority)
+            else:
+                self._remove_waiter(flow, waiter)
+            raise
+        LLM_SCHEDULER_WAIT_SECONDS.labels(priority=priority).observe(time.monotonic() - queued_at)
+
+    def release(self, user_name: str, priority: str = INTERACTIVE) -> None:
+        """Give up the slot taken by acquire and start the next calls.
+
+        Args:
+            user_name: The user passed to acquire.
+            priority: The priority passed to acquire.
+        """
+        self._running_per_priority[priority] -= 1
+        self._running_per_user[user_name] -= 1
+        if not self._running_per_user[user_name]:
+            del self._running_per_user[user_name]
+        self._dispatch()
+
+    def _remove_waiter(self, flow: _Flow, waiter: asyncio.Future) -> None:
+        """Drop a call that gave up waiting."""
+        flow.waiters = deque(entry for entry in flow.waiters if entry[2] is not waiter)
+        waiter.cancel()
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Start waiting calls in the order of their tags while slots are free."""
+        while self.in_flight < self.max_concurrency:
+            best: Optional[Tuple[Tuple[float, int], Tuple[str, str]]] = None
+            for key, flow in self._flows.items():
+                user_name = key[0]
+                if not flow.waiters or self._running_per_user.get(user_name, 0) >= self.user_limit(user_name):
+                    continue
+                start, sequence, _ = flow.waiters[0]
+                if best is None or (start, sequence) < best[0]:
+                    best = ((start, sequence), key)
+            if best is None:
+                break
+            (start, _), (user_name, priority) = best
+            _, _, waiter = self._flows[(user_name, priority)].waiters.popleft()
+            self._virtual_time = max(self._virtual_time, start)
+            self._running_per_user[user_name] = self._running_per_user.get(user_name, 0) + 1
+            self._running_per_priority[priority] += 1
+            waiter.set_result(None)
+
+        # A flow that is idle and caught up with the virtual time would start from it anyway
+        self._flows = {
+            key: flow for key, flow in self._flows.items() if flow.waiters or flow.finish > self._virtual_time
+        }
+        for priority, running in self._running_per_priority.items():
+            LLM_SCHEDULER_IN_FLIGHT.labels(priority=priority).set(running)
+            LLM_SCHEDULER_QUEUE_DEPTH.labels(priority=priority).set(self.queue_depth(priority))
+
+
+def parse_user_limits(value: str) -> Dict[str, int]:
+    """Parse per-user concurrency limits written as "alice=4,nightly-import=1".
+
+    Raises: ValueError if an entry is not a name and a number.
+    """
+    limits = {}
+    for entry in value.split(","):
+        if not entry.strip():
+            continue
+        name, separator, limit = entry.partition("=")
+        if not separator or not name.strip():
+            raise ValueError(f"Invalid user limit: {entry!r}")
+        limits[name.strip()] = int(limit)
+    return limits
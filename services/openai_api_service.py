@@ -1,31 +1,41 @@
 """Implementation of OpenAI service for text summarization."""
 
-import os
-
-from dotenv import load_dotenv
-from openai import OpenAI
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
 from services.service_interfaces import IOpenAIAPIService
+from utils.bulkhead import OPENAI
+from utils.deadline import remaining_seconds
+from utils.metrics import LLM_TOKENS, UPSTREAM_ERRORS
+from utils.settings import get_settings
+from utils.tracing import count, current_span, span
 
-load_dotenv()
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 
 class OpenAIAPIService(IOpenAIAPIService):
     """OpenAI service for text summarization."""
 
-    def __init__(self, client: OpenAI = None):
+    # Token usage reported for the last summarize_text call (prompt_tokens, completion_tokens, total_tokens)
+    last_usage: Optional[Dict[str, int]] = None
+
+    def __init__(self, client: Optional["OpenAI"] = None):
         """Initialize the OpenAI service."""
         self._client = client or self._initialize_client()
 
-    def _initialize_client(self):
-        """Initialize the OpenAI client, using the API key from environment.
+    @staticmethod
+    def _initialize_client() -> "OpenAI":
+        """Create the OpenAI client, using the API key from the settings.
 
         Raises: ValueError if OPENAI_API_KEY is not set.
         """
-        api_key = os.getenv("OPENAI_API_KEY")
+        api_key = get_settings().openai_api_key
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable is not set")
-        self._client = OpenAI(api_key=api_key)
+        # Imported here: the SDK takes longer to import than the rest of the application
+        from openai import DefaultHttpxClient, OpenAI
+        # The SDK retries failed calls itself; the hook sees every attempt, so retries show up in the trace
+        return OpenAI(api_key=api_key, http_client=DefaultHttpxClient(event_hooks={"request": [_count_attempt]}))
 
     def summarize_text(self, text: str, metadata: dict, max_words: int, used_model: str = "gpt-3.5-turbo") -> str:
         """Summarize given text using OpenAI's API, incorporating video metadata.
@@ -49,28 +59,57 @@ class OpenAIAPIService(IOpenAIAPIService):
             Description: {metadata['description']}
             """
 
+            # Within a request, give up when the request's deadline for this stage passes (see utils.deadline).
+            # The timeout applies to each attempt, so the SDK must not retry: a retry would outlive the deadline.
+            timeout = remaining_seconds()
+            client = self._client.with_options(timeout=timeout, max_retries=0) if timeout is not None else self._client
+
             # Create chat completion request
-            response = self._client.chat.completions.create(
-                model=used_model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": f"Summarize the following YouTube video transcript in ~{max_words} words. "
-                                   f"Use the provided metadata to enhance your summary. Aim for at least {max_words} "
-                                   f"words, but not significantly more.",
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Video metadata:\n{metadata_str}\n\nTranscript: {text}",
-                    },
-                ],
-                max_tokens=max_words * 4,  # Rough estimate: tokens != words
-                n=1,
-                stop=None,
-                temperature=0.7,
-            )
+            with span("openai.chat.completions", model=used_model) as llm_span:
+                response = client.chat.completions.create(
+                    model=used_model,
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": f"Summarize the following YouTube video transcript in ~{max_words} words. "
+                                       f"Use the provided metadata to enhance your summary. "
+                                       f"Aim for at least {max_words} words, but not significantly more.",
+                        },
+                        {
+                            "role": "user",
+                            "content": f"Video metadata:\n{metadata_str}\n\nTranscript: {text}",
+                        },
+                    ],
+                    max_tokens=max_words * 4,  # Rough estimate: tokens != words
+                    n=1,
+                    stop=None,
+                    temperature=0.7,
+                )
 
+            usage = getattr(response, "usage", None)
+            self.last_usage = {}
+            for name in ("prompt_tokens", "completion_tokens", "total_tokens"):
+                value = getattr(usage, name, None)
+                if isinstance(value, int):
+                    self.last_usage[name] = value
+            for kind in ("prompt", "completion"):
+                if f"{kind}_tokens" in self.last_usage:
+                    LLM_TOKENS.labels(model=used_model, kind=kind).inc(self.last_usage[f"{kind}_tokens"])
+                    if llm_span is not None:
+                        llm_span.set_attribute(f"llm.{kind}_tokens", self.last_usage[f"{kind}_tokens"])
             return response.choices[0].message.content.strip()
         except Exception as e:
+            UPSTREAM_ERRORS.labels(dependency=OPENAI, error=type(e).__name__).inc()
             print(f"Summarization error: {str(e)}")
             return ""
+
+
+def _count_attempt(request: Any) -> None:
+    """Count an HTTP attempt of the current LLM call; every attempt after the first is a retry of the request."""
+    llm_span = current_span()
+    if llm_span is None:
+        return
+    attempts = llm_span.attributes.get("http.attempts", 0) + 1
+    llm_span.set_attribute("http.attempts", attempts)
+    if attempts > 1:
+        count("retries")
@@ -0,0 +1,53 @@
+"""Service finding related videos through a vector index over the stored summaries."""
+
+import logging
+from typing import List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from models.api_models import RelatedVideo
+from models.summary import Summary
+from services.service_interfaces import IRelatedVideoService
+from utils.vector_index import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+
+class RelatedVideoService(IRelatedVideoService):
+    """Keeps one vector per video (made from the title and the first stored summary) in a VectorIndex.
+
+    The index is shared by all users: results only reveal video ids and titles, never summaries.
+    Index calls touch files and run NumPy over the whole matrix, so they run in the threadpool.
+    """
+
+    def __init__(self, vector_index: VectorIndex):
+        """Initialize the service.
+
+        Args:
+            vector_index: The index holding the summary vectors.
+        """
+        self.vector_index = vector_index
+
+    async def add_summary(self, summary: Summary) -> None:
+        """Index the summary of a video; failures are logged, not raised, as the summary was already delivered."""
+        try:
+            added = await run_in_threadpool(
+                self.vector_index.add,
+                summary.video_id,
+                f"{summary.video_title or ''}\n{summary.summary}",
+                {"video_title": summary.video_title},
+            )
+            if added:
+                logger.info(f"Indexed summary of {summary.video_id} for related videos")
+        except Exception as e:
+            logger.warning(f"Failed to index summary of {summary.video_id} for related videos: {str(e)}")
+
+    async def find_related(self, video_id: str, limit: int) -> Optional[List[RelatedVideo]]:
+        """Find the videos whose summaries are most similar to the summary of video_id."""
+        results = await run_in_threadpool(self.vector_index.query_key, video_id, limit)
+        if results is None:
+            return None
+        return [
+            RelatedVideo(video_id=metadata["key"], video_title=metadata.get("video_title"), score=score)
+            for metadata, score in results
+        ]
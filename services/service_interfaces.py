@@ -6,8 +6,12 @@ and facilitate easier testing and dependency injection.
 """
 
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Union, List
+from typing import Optional, Dict, Union, List, Tuple
 
+import numpy as np
+
+from models.api_models import RelatedVideo, SearchHit
+from models.summary import Summary
 from models.user import User
 
 
@@ -43,6 +47,38 @@ class IUserAuthService(ABC):
         """Update a user's email address."""
 
 
+class IAsyncUserAuthService(ABC):
+    """Async interface for user authentication and management operations."""
+
+    @abstractmethod
+    async def register_user(self, username: str, email: str, password: str) -> User:
+        """Register a new user."""
+
+    @abstractmethod
+    async def authenticate_user(self, identifier: str, password: str) -> Optional[User]:
+        """Authenticate a user by identifier (username or email) and password."""
+
+    @abstractmethod
+    async def authenticate_user_by_token(self, token: str) -> Optional[User]:
+        """Authenticate a user using a token."""
+
+    @abstractmethod
+    def generate_token(self, user: User) -> str:
+        """Generate an authentication token for a user."""
+
+    @abstractmethod
+    async def get_user(self, identifier: str) -> Optional[User]:
+        """Retrieve a user by their identifier (username or email)."""
+
+    @abstractmethod
+    async def get_user_by_email(self, email: str) -> Optional[User]:
+        """Retrieve a user by their email address."""
+
+    @abstractmethod
+    async def update_user_email(self, user: User, new_email: str) -> User:
+        """Update a user's email address."""
+
+
 class IOpenAIAPIService(ABC):
     """Interface for OpenAI service operations."""
 
@@ -82,3 +118,145 @@ class IYouTubeAPIService(ABC):
             video_id: The YouTube video ID.
         Returns: Dictionary containing video metadata.
         """
+
+
+class ILoginThrottleService(ABC):
+    """Interface for throttling login attempts before any password hashing work is done."""
+
+    @abstractmethod
+    def check(self, identifier: str, client_ip: str) -> float:
+        """Register a login attempt and decide whether it may proceed.
+
+        Args:
+            identifier: The username or email the client is trying to log in as.
+            client_ip: The client's IP address.
+        Returns: 0 if the attempt may proceed, otherwise the number of seconds to wait (Retry-After).
+        """
+
+    @abstractmethod
+    def record_result(self, identifier: str, success: bool) -> None:
+        """Record the outcome of an attempt that was allowed to proceed."""
+
+
+class IAdmissionController(ABC):
+    """Interface for limiting the expensive requests processed at once, by count or by memory."""
+
+    @abstractmethod
+    async def acquire(self, cost: int = 1) -> float:
+        """Wait for a slot to process a request.
+
+        Args:
+            cost: The share of the capacity the request holds (1 per request, or e.g. bytes of memory).
+        Returns: A token to pass to release.
+        Raises: AdmissionRejectedError (see services.admission_control_service) if the request is shed.
+        """
+
+    @abstractmethod
+    def release(self, admitted_at: float, cost: int = 1) -> None:
+        """Give up the slot taken by acquire (with the same cost)."""
+
+
+class ILLMScheduler(ABC):
+    """Interface for sharing the LLM capacity fairly between users and priorities."""
+
+    @abstractmethod
+    async def acquire(self, user_name: str, priority: str = "interactive") -> None:
+        """Wait for the user's turn to call the LLM.
+
+        Args:
+            user_name: The user the call is made for.
+            priority: "interactive" or "batch".
+        Raises: DeadlineExceededError (see utils.deadline) if the request's deadline passed while waiting.
+        """
+
+    @abstractmethod
+    def release(self, user_name: str, priority: str = "interactive") -> None:
+        """Give up the turn taken by acquire (with the same user and priority)."""
+
+
+class ISummaryHistoryService(ABC):
+    """Interface for keeping and browsing the summaries produced for each user."""
+
+    @abstractmethod
+    async def record(self, user_name: str, summary: Summary, transcript: Optional[str] = None) -> Optional[Summary]:
+        """Store a summary for a user and make it searchable.
+
+        Failures are logged, not raised, as the summary was already delivered.
+
+        Args:
+            user_name: The owner of the summary.
+            summary: The summary (user_id and summary_id are assigned here).
+            transcript: The transcript the summary was made from, indexed for search.
+        """
+
+    @abstractmethod
+    async def list_summaries(
+        self, user_name: str, limit: int, cursor: Optional[str] = None
+    ) -> Tuple[List[Summary], Optional[str]]:
+        """List a user's summaries, newest first.
+
+        Args:
+            user_name: The owner of the summaries.
+            limit: Maximum number of summaries per page.
+            cursor: Opaque cursor returned with the previous page, None for the first page.
+        Returns: The page and the cursor for the next page (None on the last page).
+        Raises: ValueError if the cursor is invalid.
+        """
+
+    @abstractmethod
+    async def get_summary(self, user_name: str, summary_id: int) -> Optional[Summary]:
+        """Retrieve one of a user's summaries."""
+
+    @abstractmethod
+    async def search(self, user_name: str, query: str, limit: int) -> List[SearchHit]:
+        """Search a user's summaries and the transcripts of all summarized videos.
+
+        Args:
+            user_name: Only this user's summaries are searched.
+            query: The search terms.
+            limit: Maximum number of hits.
+        Returns: The best hits first.
+        """
+
+
+class IRelatedVideoService(ABC):
+    """Interface for finding videos with similar summaries."""
+
+    @abstractmethod
+    async def add_summary(self, summary: Summary) -> None:
+        """Index the summary of a video, unless the video is indexed already."""
+
+    @abstractmethod
+    async def find_related(self, video_id: str, limit: int) -> Optional[List[RelatedVideo]]:
+        """Find the videos whose summaries are most similar to the summary of video_id.
+
+        Args:
+            video_id: The YouTube video ID.
+            limit: Maximum number of videos.
+        Returns: The most similar videos first, or None if video_id has not been summarized.
+        """
+
+
+class ISummaryReuseService(ABC):
+    """Interface for reusing stored summaries of near-identical transcripts."""
+
+    @abstractmethod
+    async def fingerprint(self, transcript_text: str) -> Optional[np.ndarray]:
+        """Compute the fingerprint of a transcript, None if it has no words."""
+
+    @abstractmethod
+    async def find_reusable(
+        self, fingerprint: Optional[np.ndarray], summary_length: int, used_model: str
+    ) -> Optional[Summary]:
+        """Find a stored summary, made with the same parameters, of a near-identical transcript.
+
+        Args:
+            fingerprint: The fingerprint of the transcript to summarize.
+            summary_length: The requested summary length.
+            used_model: The requested model.
+        Returns: The summary to serve instead of calling the LLM, or None.
+        """
+
+    @abstractmethod
+    async def remember(self, video_id: str, fingerprint: Optional[np.ndarray]) -> None:
+        """Store the fingerprint of a summarized video's transcript for later lookups."""
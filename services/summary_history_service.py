@@ -0,0 +1,121 @@
+"""Service keeping the summaries produced for each user, so they can be reopened without an LLM call."""
+
+import base64
+import binascii
+import json
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from models.summary import Summary
+from models.api_models import SearchHit
+from repositories.repository_interfaces import IAsyncUserRepository, ISearchRepository, ISummaryRepository
+from services.service_interfaces import ISummaryHistoryService
+from utils.bulkhead import DATABASE, run_in_bulkhead
+
+logger = logging.getLogger(__name__)
+
+
+def encode_cursor(summary: Summary) -> str:
+    """Return the opaque cursor pointing just past summary in a user's listing."""
+    raw = json.dumps([summary.created_at.isoformat(), summary.summary_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Turn a cursor from encode_cursor back into (created_at, summary_id).
+
+    Raises: ValueError if the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, summary_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(summary_id)
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class SummaryHistoryService(ISummaryHistoryService):
+    """Stores and lists summaries through an ISummaryRepository, resolving user names to user ids.
+
+    The summary and search repositories are synchronous (a short session or a file per call), so
+    their calls run on the database bulkhead.
+    """
+
+    def __init__(
+        self,
+        summary_repository: ISummaryRepository,
+        user_repository: IAsyncUserRepository,
+        search_repository: Optional[ISearchRepository] = None,
+    ):
+        """Initialize the service.
+
+        Args:
+            summary_repository: Where summaries are stored.
+            user_repository: Used to resolve user names to user ids.
+            search_repository: Where stored summaries and transcripts are indexed; None disables search.
+        """
+        self.summary_repository = summary_repository
+        self.user_repository = user_repository
+        self.search_repository = search_repository
+
+    async def _get_user_id(self, user_name: str) -> Optional[int]:
+        user = await self.user_repository.get_by_identifier(user_name)
+        return user.user_id if user is not None else None
+
+    async def record(self, user_name: str, summary: Summary, transcript: Optional[str] = None) -> Optional[Summary]:
+        """Store a summary for a user and index it (with the transcript) for search.
+
+        Failures are logged, not raised, as the summary was already delivered.
+        """
+        try:
+            user_id = await self._get_user_id(user_name)
+            if user_id is None:
+                logger.warning(f"Not storing summary of {summary.video_id}: user {user_name} has no user_id")
+                return None
+            summary.user_id = user_id
+            stored = await run_in_bulkhead(DATABASE, self.summary_repository.add, summary)
+            logger.info(f"Stored summary {stored.summary_id} of {summary.video_id} for {user_name}")
+        except Exception as e:
+            logger.warning(f"Failed to store summary of {summary.video_id} for {user_name}: {str(e)}")
+            return None
+        if self.search_repository is not None:
+            try:
+                await run_in_bulkhead(DATABASE, self.search_repository.index, stored, transcript)
+            except Exception as e:
+                logger.warning(f"Failed to index summary {stored.summary_id} for search: {str(e)}")
+        return stored
+
+    async def list_summaries(
+        self, user_name: str, limit: int, cursor: Optional[str] = None
+    ) -> Tuple[List[Summary], Optional[str]]:
+        """List a user's summaries, newest first, with the cursor for the next page."""
+        before = decode_cursor(cursor) if cursor else None
+        user_id = await self._get_user_id(user_name)
+        if user_id is None:
+            return [], None
+        # Fetch one extra row to know whether there is a next page
+        summaries = await run_in_bulkhead(DATABASE, self.summary_repository.list_for_user, user_id, limit + 1, before)
+        if len(summaries) <= limit:
+            return summaries, None
+        return summaries[:limit], encode_cursor(summaries[limit - 1])
+
+    async def get_summary(self, user_name: str, summary_id: int) -> Optional[Summary]:
+        """Retrieve one of a user's summaries."""
+        user_id = await self._get_user_id(user_name)
+        if user_id is None:
+            return None
+        return await run_in_bulkhead(DATABASE, self.summary_repository.get, user_id, summary_id)
+
+    async def search(self, user_name: str, query: str, limit: int) -> List[SearchHit]:
+        """Search a user's summaries and the stored transcripts."""
+        if self.search_repository is None:
+            return []
+        user_id = await self._get_user_id(user_name)
+        if user_id is None:
+            return []
+        found = await run_in_bulkhead(DATABASE, self.search_repository.find, user_id, query, limit)
+        # Snippets take CPU, not the database: build them without holding a DATABASE slot
+        return await run_in_threadpool(self.search_repository.with_snippets, found, query)
@@ -0,0 +1,86 @@
+"""Service reusing stored summaries for re-uploads of the same content under other video IDs."""
+
+import logging
+from typing import Optional
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from models.summary import Summary
+from repositories.repository_interfaces import ISummaryRepository
+from services.service_interfaces import ISummaryReuseService
+from utils.metrics import SUMMARY_REUSE
+from utils.minhash import LshIndex, minhash
+from utils.text_utils import clean_transcript_words
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NEAR_DUPLICATE_THRESHOLD = 0.9
+
+
+def transcript_fingerprint(transcript_text: str) -> Optional[np.ndarray]:
+    """Return the MinHash signature of the cleaned transcript, None if it has no words."""
+    words = clean_transcript_words(transcript_text)
+    return minhash(words) if words else None
+
+
+class SummaryReuseService(ISummaryReuseService):
+    """Looks up near-identical transcripts in an LSH index of MinHash fingerprints.
+
+    A cache keyed on content rather than video_id: clips, mirrors and re-encodes of a video that
+    was already summarized with the same length and model get the stored summary instead of a new
+    LLM call. Lookups never fail a request; errors count as a miss.
+    """
+
+    def __init__(
+        self,
+        lsh_index: LshIndex,
+        summary_repository: ISummaryRepository,
+        threshold: float = DEFAULT_NEAR_DUPLICATE_THRESHOLD,
+    ):
+        """Initialize the service.
+
+        Args:
+            lsh_index: The index of transcript fingerprints, keyed by video_id.
+            summary_repository: Where the summaries to reuse are stored.
+            threshold: Minimum estimated Jaccard similarity of the transcripts' word shingles.
+        """
+        self.lsh_index = lsh_index
+        self.summary_repository = summary_repository
+        self.threshold = threshold
+
+    async def fingerprint(self, transcript_text: str) -> Optional[np.ndarray]:
+        """Compute the MinHash signature of the cleaned transcript, None if it has no words."""
+        return await run_in_threadpool(transcript_fingerprint, transcript_text)
+
+    def _find_reusable(self, fingerprint: np.ndarray, summary_length: int, used_model: str) -> Optional[Summary]:
+        """Return the summary of the most similar candidate that has one with these parameters."""
+        for video_id, similarity in self.lsh_index.query(fingerprint, self.threshold):
+            summary = self.summary_repository.find_latest_for_video(video_id, summary_length, used_model)
+            if summary is not None:
+                logger.info(f"Reusing summary {summary.summary_id} of {video_id} (similarity {similarity:.2f})")
+                return summary
+        return None
+
+    async def find_reusable(
+        self, fingerprint: Optional[np.ndarray], summary_length: int, used_model: str
+    ) -> Optional[Summary]:
+        """Find a stored summary, made with the same parameters, of a near-identical transcript."""
+        if fingerprint is None:
+            return None
+        try:
+            summary = await run_in_threadpool(self._find_reusable, fingerprint, summary_length, used_model)
+        except Exception as e:
+            logger.warning(f"Near-duplicate lookup failed: {str(e)}")
+            summary = None
+        SUMMARY_REUSE.labels(result="hit" if summary is not None else "miss").inc()
+        return summary
+
+    async def remember(self, video_id: str, fingerprint: Optional[np.ndarray]) -> None:
+        """Store the fingerprint of a summarized video's transcript; failures are logged, not raised."""
+        if fingerprint is None:
+            return
+        try:
+            await run_in_threadpool(self.lsh_index.add, video_id, fingerprint)
+        except Exception as e:
+            logger.warning(f"Failed to store transcript fingerprint of {video_id}: {str(e)}")
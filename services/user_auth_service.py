@@ -3,9 +3,10 @@
 from typing import Optional
 
 from models.user import User
-from repositories.repository_interfaces import  IUserRepository
-from services.service_interfaces import IUserAuthService
+from repositories.repository_interfaces import IAsyncUserRepository, IUserRepository
+from services.service_interfaces import IAsyncUserAuthService, IUserAuthService
 from utils.auth_utils import DEFAULT_SECRET_KEY, AuthenticationUtils
+from utils.bulkhead import BCRYPT, run_in_bulkhead
 
 
 class UserAlreadyExistsError(ValueError):
@@ -98,3 +99,93 @@ class UserAuthService(IUserAuthService):
 
         user.email = new_email
         return self.user_repository.update(user)
+
+
+class AsyncUserAuthService(IAsyncUserAuthService):
+    """Async implementation of user authentication on top of an IAsyncUserRepository.
+
+    Repository calls are awaited and bcrypt runs on its own bulkhead, so neither blocks the event loop.
+    """
+
+    def __init__(
+        self, user_repository: IAsyncUserRepository, secret_key: str = DEFAULT_SECRET_KEY
+    ):
+        """Initialize the AsyncUserAuthService.
+
+        Args:
+            user_repository: Async repository for user data operations.
+            secret_key: Secret key for JWT token generation and verification.
+        """
+        self.user_repository = user_repository
+        self.secret_key = secret_key
+
+    async def register_user(self, username: str, email: str, password: str) -> User:
+        """Register a new user after checking for existing username and email.
+
+        Args:
+            username: The desired username.
+            email: The user's email address.
+            password: The user's password (will be hashed).
+        Returns: The created User object.
+        Raises: UserAlreadyExistsError if username or email is already in use.
+        """
+        if await self.user_repository.get_by_identifier(username):
+            raise UserAlreadyExistsError(f"User with username '{username}' already exists")
+
+        if await self.user_repository.get_by_email(email):
+            raise UserAlreadyExistsError(f"User with email '{email}' already exists")
+
+        hashed_password = await run_in_bulkhead(BCRYPT, AuthenticationUtils.hash_password, password)
+        user = User(user_id=None, user_name=username, email=email, password_hash=hashed_password)
+        return await self.user_repository.create(user)
+
+    async def authenticate_user(self, identifier: str, password: str) -> Optional[User]:
+        """Authenticate a user by identifier (username or email) and password.
+
+        Args:
+            identifier: The username or email of the user.
+            password: The password to verify.
+        Returns: The authenticated User object if successful, None otherwise.
+        """
+        user = await self.user_repository.get_by_identifier(identifier)
+        if user and await run_in_bulkhead(BCRYPT, AuthenticationUtils.verify_password, password, user.password_hash):
+            return user
+        return None
+
+    async def authenticate_user_by_token(self, token: str) -> Optional[User]:
+        """Authenticate a user using a JWT token.
+
+        Args:
+            token: The JWT token to verify.
+        Returns: The authenticated User object if successful, None otherwise.
+        """
+        username = AuthenticationUtils.verify_jwt_token(token, secret_key=self.secret_key)
+        return await self.user_repository.get_by_identifier(username) if username else None
+
+    def generate_token(self, user: User) -> str:
+        """Generate a JWT token for the given user."""
+        return AuthenticationUtils.generate_jwt_token(user.user_name, secret_key=self.secret_key)
+
+    async def get_user(self, identifier: str) -> Optional[User]:
+        """Retrieve a user by their identifier (username or email)."""
+        return await self.user_repository.get_by_identifier(identifier)
+
+    async def get_user_by_email(self, email: str) -> Optional[User]:
+        """Retrieve a user by their email address."""
+        return await self.user_repository.get_by_email(email)
+
+    async def update_user_email(self, user: User, new_email: str) -> User:
+        """Update a user's email address.
+
+        Args:
+            user: The User object to update.
+            new_email: The new email address.
+        Returns: The updated User object.
+        Raises: ValueError if the new email is already in use by another user.
+        """
+        existing_email_user = await self.user_repository.get_by_email(new_email)
+        if existing_email_user and existing_email_user.user_id != user.user_id:
+            raise ValueError(f"Email '{new_email}' is already in use")
+
+        user.email = new_email
+        return await self.user_repository.update(user)
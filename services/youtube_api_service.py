@@ -1,23 +1,23 @@
 """Implementation of YouTube API service."""
 
-import os
 from typing import Dict, List, Union
 
-from dotenv import load_dotenv
-# noinspection PyPackageRequirements
-from googleapiclient.discovery import build
-# noinspection PyPackageRequirements
-from googleapiclient.errors import HttpError
-from youtube_transcript_api import YouTubeTranscriptApi
-
 from services.service_interfaces import IYouTubeAPIService
+from utils.bulkhead import YOUTUBE_DATA, YOUTUBE_TRANSCRIPT
+from utils.deadline import remaining_seconds
+from utils.lazy_import import LazyImport
+from utils.metrics import UPSTREAM_ERRORS
+from utils.settings import get_settings
+from utils.tracing import span
 
-load_dotenv()
+# The SDKs are imported when the first video is summarized, not at startup
+build = LazyImport("googleapiclient.discovery", "build")
+YouTubeTranscriptApi = LazyImport("youtube_transcript_api", "YouTubeTranscriptApi")
 
 
 class YouTubeAPIService(IYouTubeAPIService):
     def __init__(self, youtube_transcript_api=None, youtube_build=None):
-        self.api_key = os.getenv("YOUTUBE_API_KEY")
+        self.api_key = get_settings().youtube_api_key
         if self.api_key:
             print(f"YouTube API Key: {self.api_key[:5]}...")
         else:
@@ -29,10 +29,13 @@ class YouTubeAPIService(IYouTubeAPIService):
     def get_youtube_transcript(
             self, video_id: str, include_timestamps: bool = True
     ) -> Union[List[Dict[str, Union[str, float]]], List[str]]:
+        # The transcript API takes no timeout; within a request, run_stage stops waiting at the deadline
         try:
-            transcript = self.youtube_transcript_api.get_transcript(video_id)
+            with span("youtube.get_transcript", video_id=video_id):
+                transcript = self.youtube_transcript_api.get_transcript(video_id)
             return transcript if include_timestamps else [segment["text"] for segment in transcript]
         except Exception as e:
+            UPSTREAM_ERRORS.labels(dependency=YOUTUBE_TRANSCRIPT, error=type(e).__name__).inc()
             print(f"Error fetching transcript: {str(e)}")
             return []
 
@@ -40,10 +43,21 @@ class YouTubeAPIService(IYouTubeAPIService):
         if not self.api_key:
             print("YouTube API key not found in environment variables.")
             return {}
+        # noinspection PyPackageRequirements
+        from googleapiclient.errors import HttpError
 
         try:
-            youtube = self.youtube_build("youtube", "v3", developerKey=self.api_key)
-            video_response = youtube.videos().list(part="snippet,statistics", id=video_id).execute()
+            # Within a request, give up when the request's deadline for this stage passes (see utils.deadline)
+            timeout = remaining_seconds()
+            if timeout is None:
+                youtube = self.youtube_build("youtube", "v3", developerKey=self.api_key)
+            else:
+                import httplib2
+                youtube = self.youtube_build(
+                    "youtube", "v3", developerKey=self.api_key, http=httplib2.Http(timeout=timeout)
+                )
+            with span("youtube.videos.list", video_id=video_id):
+                video_response = youtube.videos().list(part="snippet,statistics", id=video_id).execute()
 
             if not video_response["items"]:
                 raise ValueError(f"No video found with id: {video_id}")
@@ -64,11 +78,14 @@ class YouTubeAPIService(IYouTubeAPIService):
             }
 
         except KeyError as e:
+            UPSTREAM_ERRORS.labels(dependency=YOUTUBE_DATA, error="KeyError").inc()
             print(f"Error fetching video metadata: {str(e)}")
             return {}
         except HttpError as e:
+            UPSTREAM_ERRORS.labels(dependency=YOUTUBE_DATA, error=f"HttpError {e.resp.status}").inc()
             print(f"HTTP error occurred: {str(e)}")
             return {}
         except Exception as e:
+            UPSTREAM_ERRORS.labels(dependency=YOUTUBE_DATA, error=type(e).__name__).inc()
             print(f"Error fetching video metadata: {str(e)}")
             return {}
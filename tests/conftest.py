@@ -4,8 +4,8 @@ import ast
 import logging
 import os
 from datetime import datetime, timedelta
-from typing import Dict
-from unittest.mock import patch, Mock
+from typing import Dict, Optional
+from unittest.mock import MagicMock, patch, Mock
 
 import pytest
 from dotenv import load_dotenv
@@ -14,13 +14,25 @@ from jose import jwt
 from openai import OpenAI
 
 from main import app
+from models.user import User
+from repositories.async_repository_adapter import AsyncUserRepositoryAdapter
+from repositories.repository_provider import get_async_repository
 from repositories.user_json_repository import UserJsonRepository
+from services.dependencies import get_current_user, get_openai_service, get_youtube_service
+from services.openai_api_service import OpenAIAPIService
 from services.user_auth_service import UserAuthService
+from services.youtube_api_service import YouTubeAPIService
 from scripts import bootstrap_db
+from utils.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
 
+def make_user(name: str, user_id: Optional[int] = None) -> User:
+    """Create a user with a name-derived email, not stored yet unless user_id is given."""
+    return User(user_id=user_id, user_name=name, email=f"{name}@example.com", password_hash="hashed_password")
+
+
 @pytest.fixture
 def client(mock_env_variables, mock_token_provider):
     """Create a test client for the FastAPI application with mocked JWT token validation.
@@ -38,6 +50,38 @@ def client(mock_env_variables, mock_token_provider):
             yield test_client
 
 
+@pytest.fixture
+def summarize_client(user_repository, mock_youtube_data):
+    """Create a test client for /summarize, for user "alice" with mocked YouTube and OpenAI services.
+
+    The services answer with the mock YouTube transcript and metadata and the summary "A summary.".
+    Tests and their modules' fixtures adapt them through the client's youtube_service and
+    openai_service attributes, and can add dependency overrides of their own: all overrides are
+    cleared when the test ends.
+
+    Yields: An instance of TestClient for the FastAPI application.
+    """
+    user_repository.create(User(user_id=None, user_name="alice", email="alice@example.com", password_hash="hashed"))
+    youtube_service = MagicMock(spec=YouTubeAPIService)
+    youtube_service.get_youtube_transcript.return_value = mock_youtube_data["transcript"]
+    youtube_service.get_video_metadata.return_value = mock_youtube_data["metadata"]
+    openai_service = MagicMock(spec=OpenAIAPIService)
+    openai_service.summarize_text.return_value = "A summary."
+    openai_service.last_usage = None
+
+    app.dependency_overrides[get_async_repository] = lambda: AsyncUserRepositoryAdapter(user_repository)
+    app.dependency_overrides[get_current_user] = lambda: "alice"
+    app.dependency_overrides[get_youtube_service] = lambda: youtube_service
+    app.dependency_overrides[get_openai_service] = lambda: openai_service
+    try:
+        with TestClient(app) as test_client:
+            test_client.youtube_service = youtube_service
+            test_client.openai_service = openai_service
+            yield test_client
+    finally:
+        app.dependency_overrides.clear()
+
+
 @pytest.fixture(scope="session")
 def setup_database():
     """Bootstrap the database before running the tests.
@@ -165,22 +209,35 @@ def mock_env_variables(monkeypatch, mock_api_key_provider, mock_token_provider):
     monkeypatch.setenv("ALGORITHM", mock_token_provider.algorithm)
     monkeypatch.setenv("ACCESS_TOKEN_EXPIRE_MINUTES", str(mock_token_provider.expire_minutes))
 
+    # Settings are loaded once per process; read them again with the variables above
+    get_settings.cache_clear()
+
     return mock_api_key_provider, mock_token_provider
 
 
+@pytest.fixture(autouse=True)
+def data_file_paths(monkeypatch, tmp_path):
+    """Keep the data files the application writes while handling requests out of the working directory."""
+    monkeypatch.setenv("SUMMARY_JSON_PATH", str(tmp_path / "summaries.jsonl"))
+    monkeypatch.setenv("SEARCH_INDEX_PATH", str(tmp_path / "search_documents.jsonl"))
+    monkeypatch.setenv("VECTOR_INDEX_DIR", str(tmp_path / "vector_index"))
+    monkeypatch.setenv("TRANSCRIPT_FINGERPRINTS_PATH", str(tmp_path / "transcript_fingerprints.jsonl"))
+
+
 @pytest.fixture
 def user_repository():
     """Provide a UserJsonRepository instance for testing.
 
     Yields: A repository instance for user operations.
-    Cleanup: After the test, the temporary JSON file used for testing is removed.
+    Cleanup: After the test, the temporary JSON files used for testing are removed.
     """
     test_file = "test_users.json"
     repo = UserJsonRepository(test_file)
     yield repo
     # Clean up after test
-    if os.path.exists(test_file):
-        os.remove(test_file)
+    for path in (test_file, repo.journal_path, repo.lock_path):
+        if os.path.exists(path):
+            os.remove(path)
 
 
 @pytest.fixture
@@ -0,0 +1,135 @@
+"""Tests for the admission control of /summarize."""
+
+import asyncio
+
+import pytest
+
+from main import app
+from services.admission_control_service import (
+    BASE_REQUEST_BYTES, AdmissionController, AdmissionRejectedError, MemoryBudget, estimate_summarize_memory
+)
+from services.dependencies import get_summarize_admission_controller, get_summarize_memory_budget
+
+
+def test_queue_is_bounded_and_fifo():
+    """Test that excess requests wait in arrival order and that a full queue rejects at once."""
+    async def scenario():
+        controller = AdmissionController("test", max_in_flight=1, max_queue=2, queue_timeout=5)
+        order = []
+
+        async def request(name):
+            admitted_at = await controller.acquire()
+            order.append(name)
+            await asyncio.sleep(0.01)
+            controller.release(admitted_at)
+
+        first = await controller.acquire()
+        waiting = [asyncio.ensure_future(request(name)) for name in ("second", "third")]
+        await asyncio.sleep(0)
+        assert (controller.in_flight, controller.queue_depth) == (1, 2)
+
+        with pytest.raises(AdmissionRejectedError) as rejected:
+            await controller.acquire()
+        assert rejected.value.reason == "queue_full"
+        assert rejected.value.retry_after >= 1
+
+        controller.release(first)
+        await asyncio.gather(*waiting)
+        assert order == ["second", "third"]
+        assert (controller.in_flight, controller.queue_depth) == (0, 0)
+
+    asyncio.run(scenario())
+
+
+def test_queue_timeout_and_cancelled_waiters_give_up_their_place():
+    """Test that waiters time out, and that a cancelled waiter does not take a slot."""
+    async def scenario():
+        controller = AdmissionController("test", max_in_flight=1, max_queue=2, queue_timeout=0.05)
+        first = await controller.acquire()
+
+        with pytest.raises(AdmissionRejectedError) as rejected:
+            await controller.acquire()
+        assert rejected.value.reason == "queue_timeout"
+
+        cancelled = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert controller.queue_depth == 0
+
+        controller.release(first)
+        assert controller.in_flight == 0
+        controller.release(await controller.acquire())
+
+    asyncio.run(scenario())
+
+
+def test_memory_budget_admits_by_size_in_arrival_order():
+    """Test that requests wait until their bytes fit, without small ones overtaking a large one."""
+    async def scenario():
+        budget = MemoryBudget("test", budget_bytes=100, max_queue=5, queue_timeout=5)
+        first = await budget.acquire(60)
+
+        with pytest.raises(AdmissionRejectedError) as rejected:
+            await budget.acquire(101)
+        assert rejected.value.reason == "too_large"
+
+        large = asyncio.ensure_future(budget.acquire(50))
+        small = asyncio.ensure_future(budget.acquire(30))
+        await asyncio.sleep(0)
+        # 30 bytes would fit next to the first request, but the larger request arrived earlier
+        assert (budget.reserved, budget.queue_depth) == (60, 2)
+
+        budget.release(first, 60)
+        budget.release(await large, 50)
+        budget.release(await small, 30)
+        assert (budget.in_flight, budget.reserved) == (0, 0)
+
+    asyncio.run(scenario())
+
+
+def test_memory_estimate_grows_with_transcript_length():
+    """Test that the estimate covers a base amount plus a multiple of the transcript length."""
+    short = estimate_summarize_memory(["hello world"])
+    long = estimate_summarize_memory(["hello world"] * 10000)
+    assert BASE_REQUEST_BYTES < short < long
+    assert long - BASE_REQUEST_BYTES > 10 * 11 * 10000
+
+
+@pytest.fixture
+def saturated_client(summarize_client):
+    """Provide the /summarize test client with one slot, no queue and a memory budget no transcript fits."""
+    controller = AdmissionController("summarize", max_in_flight=1, max_queue=0)
+    app.dependency_overrides[get_summarize_admission_controller] = lambda: controller
+    app.dependency_overrides[get_summarize_memory_budget] = lambda: MemoryBudget("summarize_memory", budget_bytes=10)
+    summarize_client.controller = controller
+    return summarize_client
+
+
+def test_summarize_is_shed_with_503_when_saturated(saturated_client):
+    """Test that a request beyond the limit gets a fast 503 with Retry-After and no upstream call."""
+    admitted_at = asyncio.run(saturated_client.controller.acquire())
+    response = saturated_client.post(
+        "/summarize",
+        json={"video_url": "https://www.youtube.com/watch?v=py5byOOHZM8", "summary_length": 100,
+              "used_model": "gpt-4o-mini"},
+    )
+
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    saturated_client.youtube_service.get_youtube_transcript.assert_not_called()
+    saturated_client.controller.release(admitted_at)
+    assert saturated_client.controller.in_flight == 0
+
+
+def test_summarize_refuses_transcripts_beyond_the_memory_budget(saturated_client):
+    """Test that a transcript whose estimate exceeds the worker's whole budget gets 413 and frees its slot."""
+    response = saturated_client.post(
+        "/summarize",
+        json={"video_url": "https://www.youtube.com/watch?v=py5byOOHZM8", "summary_length": 100,
+              "used_model": "gpt-4o-mini"},
+    )
+
+    assert response.status_code == 413
+    assert saturated_client.controller.in_flight == 0
@@ -0,0 +1,74 @@
+"""Tests for the async user repository path and AsyncUserAuthService."""
+
+import asyncio
+import os
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from models.user import User
+from repositories.async_repository_adapter import AsyncUserRepositoryAdapter
+from repositories.user_async_db_repository import AsyncUserDBRepository
+from services.dependencies import get_current_user
+from services.user_auth_service import AsyncUserAuthService, UserAlreadyExistsError
+from utils.db_utils import to_async_database_url
+
+
+@pytest.fixture
+def async_user_auth_service(user_repository, mock_token_provider):
+    """Provide an AsyncUserAuthService on top of the JSON test repository."""
+    return AsyncUserAuthService(
+        AsyncUserRepositoryAdapter(user_repository), secret_key=mock_token_provider.secret_key
+    )
+
+
+def test_async_register_and_authenticate(async_user_auth_service):
+    """Test registration, password and token authentication on the async path."""
+    async def scenario():
+        user = await async_user_auth_service.register_user("testuser", "test@example.com", "password123")
+        with pytest.raises(UserAlreadyExistsError):
+            await async_user_auth_service.register_user("testuser", "other@example.com", "password456")
+
+        assert (await async_user_auth_service.authenticate_user("testuser", "password123")).user_name == "testuser"
+        assert await async_user_auth_service.authenticate_user("testuser", "wrongpassword") is None
+
+        token = async_user_auth_service.generate_token(user)
+        assert (await async_user_auth_service.authenticate_user_by_token(token)).user_name == "testuser"
+        assert await async_user_auth_service.authenticate_user_by_token("invalid_token") is None
+
+    asyncio.run(scenario())
+
+
+def test_get_current_user_async(async_user_auth_service):
+    """Test that get_current_user resolves the user name through the async service."""
+    async def scenario():
+        user = await async_user_auth_service.register_user("testuser", "test@example.com", "password123")
+        token = async_user_auth_service.generate_token(user)
+        assert await get_current_user(token=token, auth_service=async_user_auth_service) == "testuser"
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.db
+def test_async_db_repository(setup_database):
+    """Test creating, retrieving and deleting a user through AsyncUserDBRepository."""
+    async def scenario():
+        engine = create_async_engine(to_async_database_url(os.getenv("DATABASE_URL")))
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        try:
+            async with session_factory() as session:
+                repository = AsyncUserDBRepository(session)
+                user = User(user_id=None, user_name="asyncuser", email="async@example.com", password_hash="hash")
+                await repository.create(user)
+
+                reloaded_user = await repository.get_by_identifier("asyncuser")
+                assert reloaded_user.email == "async@example.com"
+                assert (await repository.get_by_email("async@example.com")).user_id == reloaded_user.user_id
+                assert (await repository.get_by_id(reloaded_user.user_id)).user_name == "asyncuser"
+
+                await repository.delete(reloaded_user)
+                assert await repository.get_by_identifier("asyncuser") is None
+        finally:
+            await engine.dispose()
+
+    asyncio.run(scenario())
@@ -0,0 +1,123 @@
+"""Tests for the bulk user repository operations and the NDJSON user export."""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from main import app
+from models.user import Base, User
+from repositories.repository_provider import get_repository
+from repositories.user_db_repository import UserDBRepository, _copy_field
+from repositories.user_sqlite_repository import UserSQLiteRepository
+from services.dependencies import get_current_user
+from utils.db_utils import LazySession
+from utils.sqlite_utils import get_sqlite_session_factory
+
+
+def make_users(count: int, prefix: str = "user"):
+    """Create count users with name-derived emails."""
+    return [
+        User(user_id=None, user_name=f"{prefix}{i}", email=f"{prefix}{i}@example.com", password_hash="hashed")
+        for i in range(count)
+    ]
+
+
+def test_json_create_many_writes_once(user_repository, monkeypatch):
+    """Test that create_many rewrites users.json once and rejects a batch with a duplicate."""
+    writes = []
+    original_commit = user_repository._commit
+
+    def counting_commit(*records):
+        writes.append(records)
+        original_commit(*records)
+
+    monkeypatch.setattr(user_repository, "_commit", counting_commit)
+
+    user_repository.create_many(make_users(50))
+    assert len(writes) == 1
+    assert len(user_repository.get_all()) == 50
+
+    with pytest.raises(ValueError):
+        user_repository.create_many(make_users(1, "new") + make_users(1))
+    assert user_repository.get_by_identifier("new0") is None
+
+
+def test_json_get_many_and_iter_all(user_repository):
+    """Test that get_many skips unknown names and iter_all yields every user."""
+    user_repository.create_many(make_users(5))
+
+    found = user_repository.get_many(["user1", "user3", "nobody"])
+    assert sorted(user.user_name for user in found) == ["user1", "user3"]
+    assert sorted(user.user_name for user in user_repository.iter_all(batch_size=2)) == [f"user{i}" for i in range(5)]
+
+
+def test_sqlite_bulk_operations(tmp_path):
+    """Test create_many, get_many and paged iter_all on the SQLite repository."""
+    repository = UserSQLiteRepository(get_sqlite_session_factory(str(tmp_path / "users.db")))
+    created = repository.create_many(make_users(25))
+    assert all(user.user_id is not None for user in created)
+
+    assert len(repository.get_many([f"user{i}" for i in range(0, 25, 2)])) == 13
+    assert [user.user_id for user in repository.iter_all(batch_size=10)] == sorted(u.user_id for u in created)
+    with pytest.raises(ValueError):
+        repository.create_many(make_users(1))
+
+
+def test_db_iter_all_releases_connection_per_page(tmp_path):
+    """Test that UserDBRepository.iter_all pages by user_id and holds no connection between pages."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'users.db'}")
+    Base.metadata.create_all(engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    repository = UserDBRepository(LazySession(sessionmaker(bind=engine, expire_on_commit=False)))
+    repository.create_many(make_users(25))
+    statements.clear()
+
+    user_names = []
+    for user in repository.iter_all(batch_size=10):
+        assert engine.pool.checkedout() == 0
+        user_names.append(user.user_name)
+    assert len(user_names) == 25
+    assert len([statement for statement in statements if statement.lstrip().startswith("SELECT")]) == 3
+    assert [user.user_name for user in repository.get_many(["user0", "user24", "nobody"])] == ["user0", "user24"]
+    engine.dispose()
+
+
+def test_copy_field_distinguishes_null_from_empty():
+    """Test the COPY CSV rendering of NULL, empty strings and quotes."""
+    assert _copy_field(None) == "\\N"
+    assert _copy_field("") == '""'
+    assert _copy_field('a"b') == '"a""b"'
+
+
+@pytest.fixture
+def export_client(user_repository, monkeypatch):
+    """Provide a test client whose current user is "admin" and whose repository is the test JSON repository."""
+    monkeypatch.setenv("ADMIN_USERS", "admin")
+    app.dependency_overrides[get_repository] = lambda: user_repository
+    app.dependency_overrides[get_current_user] = lambda: "admin"
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+
+
+def test_export_streams_ndjson_without_secrets(export_client, user_repository):
+    """Test that the export returns one JSON object per user without password hashes or tokens."""
+    user_repository.create_many(make_users(3))
+
+    response = export_client.get("/admin/users/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    assert [user["user_name"] for user in exported] == ["user0", "user1", "user2"]
+    assert all("password_hash" not in user and "token" not in user for user in exported)
+
+
+def test_export_requires_admin(export_client, monkeypatch):
+    """Test that users not listed in ADMIN_USERS are rejected."""
+    monkeypatch.setenv("ADMIN_USERS", "someone_else")
+    assert export_client.get("/admin/users/export").status_code == 403
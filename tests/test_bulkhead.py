@@ -0,0 +1,114 @@
+"""Tests for the bulkheads isolating the thread pools of upstream dependencies."""
+
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from services.dependencies import get_user_auth_service2
+from utils import bulkhead as bulkhead_module
+from utils.auth_utils import AuthenticationUtils
+from utils.bulkhead import YOUTUBE_TRANSCRIPT, Bulkhead, BulkheadFullError
+from utils.deadline import deadline_scope, remaining_seconds
+
+
+def test_full_bulkhead_rejects_without_affecting_others():
+    """Test that a saturated bulkhead fails fast while another bulkhead keeps serving calls."""
+    async def scenario():
+        youtube = Bulkhead("youtube", max_workers=1, max_queue=1)
+        bcrypt = Bulkhead("bcrypt", max_workers=1, max_queue=0)
+        unblock = threading.Event()
+        running = asyncio.ensure_future(youtube.run(unblock.wait))
+        queued = asyncio.ensure_future(youtube.run(unblock.wait))
+        await asyncio.sleep(0.05)
+        assert (youtube.active, youtube.queued) == (1, 1)
+
+        with pytest.raises(BulkheadFullError) as full:
+            await youtube.run(unblock.wait)
+        assert full.value.name == "youtube"
+        assert await bcrypt.run(sum, [1, 2]) == 3
+
+        unblock.set()
+        assert await asyncio.gather(running, queued) == [True, True]
+        assert (youtube.active, youtube.queued) == (0, 0)
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_queued_call_never_runs():
+    """Test that cancelling a call still waiting for a thread drops it from the queue."""
+    async def scenario():
+        bulkhead = Bulkhead("test", max_workers=1, max_queue=1)
+        unblock = threading.Event()
+        calls = []
+        running = asyncio.ensure_future(bulkhead.run(unblock.wait))
+        queued = asyncio.ensure_future(bulkhead.run(calls.append, "queued"))
+        await asyncio.sleep(0.05)
+
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        assert bulkhead.queued == 0
+        unblock.set()
+        await running
+        assert calls == []
+
+    asyncio.run(scenario())
+
+
+def test_context_is_copied_into_the_thread():
+    """Test that the request deadline is visible to the function running on the bulkhead."""
+    async def scenario():
+        with deadline_scope(10):
+            assert 9 < await Bulkhead("test", max_workers=1, max_queue=0).run(remaining_seconds) <= 10
+
+    asyncio.run(scenario())
+
+
+def test_summarize_answers_503_when_the_upstream_bulkhead_is_full(monkeypatch, summarize_client):
+    """Test that /summarize fails fast with 503 and Retry-After when the transcript bulkhead is saturated."""
+    saturated = Bulkhead(YOUTUBE_TRANSCRIPT, max_workers=1, max_queue=0)
+    saturated._active = 1
+    monkeypatch.setitem(bulkhead_module._bulkheads, YOUTUBE_TRANSCRIPT, saturated)
+
+    response = summarize_client.post(
+        "/summarize",
+        json={"video_url": "https://www.youtube.com/watch?v=py5byOOHZM8", "summary_length": 100,
+              "used_model": "gpt-4o-mini"},
+    )
+
+    assert summarize_client.get("/health").status_code == 200
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    summarize_client.youtube_service.get_youtube_transcript.assert_not_called()
+
+
+def test_register_and_login_run_bcrypt_on_its_bulkhead(user_auth_service, monkeypatch):
+    """Test that /register and /token hash and verify passwords on the bcrypt bulkhead, not the event loop."""
+    threads = []
+    hash_password, verify_password = AuthenticationUtils.hash_password, AuthenticationUtils.verify_password
+
+    def recording(func):
+        def wrapper(*args):
+            threads.append(threading.current_thread().name)
+            return func(*args)
+        return staticmethod(wrapper)
+
+    monkeypatch.setattr(AuthenticationUtils, "hash_password", recording(hash_password))
+    monkeypatch.setattr(AuthenticationUtils, "verify_password", recording(verify_password))
+    app.dependency_overrides[get_user_auth_service2] = lambda: user_auth_service
+    try:
+        with TestClient(app) as client:
+            registered = client.post(
+                "/register", json={"username": "alice", "email": "alice@example.com", "password": "password123"}
+            )
+            login = client.post("/token", data={"username": "alice", "password": "password123"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert registered.status_code == 200
+    assert login.status_code == 200
+    assert len(threads) == 2
+    assert all(name.startswith("bulkhead-bcrypt") for name in threads)
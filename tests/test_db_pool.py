@@ -0,0 +1,64 @@
+"""Tests for the connection pool configuration and instrumentation."""
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, exc, text
+
+from utils.db_pool import (
+    InstrumentedQueuePool, instrument_engine, pool_options_from_env, statement_timeout_connect_args
+)
+
+
+def sample(name: str, pool: str) -> float:
+    """Read a metric sample for the given pool label (0 if absent)."""
+    return REGISTRY.get_sample_value(name, {"pool": pool}) or 0.0
+
+
+def test_pool_options_from_env(monkeypatch):
+    """Test that pool settings are read from the environment."""
+    monkeypatch.setenv("DB_POOL_SIZE", "7")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "3")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "false")
+    options = pool_options_from_env()
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_size"] == 7
+    assert options["max_overflow"] == 3
+    assert options["pool_pre_ping"] is False
+
+
+def test_statement_timeout_connect_args(monkeypatch):
+    """Test the per-driver statement timeout settings."""
+    monkeypatch.setenv("DB_STATEMENT_TIMEOUT_MS", "2500")
+    assert statement_timeout_connect_args("postgresql://u:p@h/db") == {"options": "-c statement_timeout=2500"}
+    assert statement_timeout_connect_args("postgresql+asyncpg://u:p@h/db") == {
+        "server_settings": {"statement_timeout": "2500"}
+    }
+    assert statement_timeout_connect_args("sqlite:///users.db") == {}
+    monkeypatch.setenv("DB_STATEMENT_TIMEOUT_MS", "0")
+    assert statement_timeout_connect_args("postgresql://u:p@h/db") == {}
+
+
+def test_pool_metrics(tmp_path):
+    """Test checked-out, wait time, timeout and invalidation metrics."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05,
+    )
+    instrument_engine(engine, "test")
+    waits_before = sample("db_pool_checkout_wait_seconds_count", "test")
+
+    connection = engine.connect()
+    connection.execute(text("SELECT 1"))
+    assert sample("db_pool_checked_out_connections", "test") == 1
+    assert sample("db_pool_size", "test") == 1
+
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    assert sample("db_pool_timeouts_total", "test") == 1
+
+    connection.invalidate()
+    connection.close()
+    assert sample("db_pool_checked_out_connections", "test") == 0
+    assert sample("db_pool_invalidations_total", "test") == 1
+    assert sample("db_pool_checkout_wait_seconds_count", "test") == waits_before + 2
+    engine.dispose()
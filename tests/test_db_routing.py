@@ -0,0 +1,87 @@
+"""Tests for read/write routing between a primary and read replicas."""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models.user import Base, User
+from repositories.user_db_repository import UserDBRepository
+from tests.conftest import make_user
+from utils import db_routing
+from utils.db_routing import RecentWrites, ReplicaRouter, RoutingSession
+from utils.db_utils import LazySession
+
+
+@pytest.fixture
+def router(tmp_path):
+    """Provide a router with SQLite databases standing in for the primary and one replica."""
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    Base.metadata.create_all(primary)
+    Base.metadata.create_all(replica)
+    yield ReplicaRouter(primary, [replica])
+    primary.dispose()
+    replica.dispose()
+
+
+@pytest.fixture(autouse=True)
+def fresh_recent_writes(monkeypatch):
+    """Give every test its own recent-writes tracker."""
+    monkeypatch.setattr(db_routing, "recent_writes", RecentWrites())
+
+
+@pytest.fixture
+def repository(router):
+    """Provide a UserDBRepository on routing sessions."""
+    session_factory = sessionmaker(
+        class_=RoutingSession, autoflush=False, expire_on_commit=False, info={"router": router}
+    )
+    return UserDBRepository(LazySession(session_factory))
+
+
+def test_reads_go_to_replica_and_writes_to_primary(router, repository):
+    """Test that a row present only on the replica is found, and creates land on the primary."""
+    with sessionmaker(bind=router.replicas[0])() as replica_session:
+        replica_session.add(make_user("replicated"))
+        replica_session.commit()
+
+    assert repository.get_by_identifier("replicated") is not None
+
+    repository.create(make_user("alice"))
+    with sessionmaker(bind=router.primary)() as primary_session:
+        assert primary_session.query(User).filter_by(user_name="alice").count() == 1
+    with sessionmaker(bind=router.replicas[0])() as replica_session:
+        assert replica_session.query(User).filter_by(user_name="alice").count() == 0
+
+
+def test_read_after_write_uses_primary(repository):
+    """Test that a user written by this worker is read back although the replica lags behind."""
+    created = repository.create(make_user("alice"))
+    assert repository.get_by_identifier("alice").user_id == created.user_id
+    assert repository.get_by_email("alice@example.com").user_id == created.user_id
+    assert repository.get_by_id(created.user_id).user_name == "alice"
+
+
+def test_replica_miss_falls_back_to_primary(monkeypatch, repository):
+    """Test that a user written by another worker (not pinned here) is still found via the primary."""
+    repository.create(make_user("alice"))
+    monkeypatch.setattr(db_routing, "recent_writes", RecentWrites())
+
+    assert not db_routing.recently_written(("user_name", "alice"))
+    assert repository.get_by_identifier("alice") is not None
+
+
+def test_lagging_replica_is_taken_out_of_rotation(router):
+    """Test that reads go to the primary when no replica is within the staleness budget."""
+    assert router.engine_for_read() is router.replicas[0]
+    # SQLite has no replication functions, so the lag check fails and the replica is marked unhealthy
+    router.check_lag()
+    assert router.engine_for_read() is router.primary
+
+
+def test_recent_writes_expire():
+    """Test that keys are only pinned for the TTL."""
+    recent_writes = RecentWrites(ttl_seconds=0)
+    recent_writes.mark("alice", None)
+    assert not recent_writes.contains("alice")
+    assert not recent_writes.contains(None)
@@ -0,0 +1,143 @@
+"""Tests for request deadlines and cancellation of /summarize."""
+
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+from openai import DefaultHttpxClient, OpenAI
+
+from main import app
+from services.admission_control_service import AdmissionController, MemoryBudget
+from services.dependencies import get_summarize_admission_controller, get_summarize_memory_budget
+from services.openai_api_service import OpenAIAPIService
+from utils.deadline import (
+    ClientDisconnectedError, DeadlineExceededError, deadline_scope, remaining_seconds, request_deadline, run_stage
+)
+
+
+def test_stages_get_a_share_of_the_remaining_time():
+    """Test that a stage sees its share of the deadline as remaining time, inside its worker thread."""
+    async def scenario():
+        with deadline_scope(10):
+            stage_remaining = await run_stage("transcript", 0.3, remaining_seconds)
+            assert 2.5 < stage_remaining <= 3
+            assert remaining_seconds() > 9
+        assert remaining_seconds() is None
+
+    asyncio.run(scenario())
+
+
+def test_nested_scope_cannot_extend_the_deadline():
+    """Test that a scope keeps an earlier deadline of the enclosing scope."""
+    with deadline_scope(1):
+        with deadline_scope(60) as seconds:
+            assert seconds <= 1
+
+
+def test_stage_past_its_deadline_is_abandoned():
+    """Test that a slow stage raises DeadlineExceededError when its share of the time is up."""
+    async def scenario():
+        with deadline_scope(0.2):
+            started = time.monotonic()
+            with pytest.raises(DeadlineExceededError) as exceeded:
+                await run_stage("summary", 1.0, time.sleep, 2)
+            assert exceeded.value.stage == "summary"
+            assert time.monotonic() - started < 1
+
+    asyncio.run(scenario())
+
+
+def test_stage_is_abandoned_when_the_client_disconnects():
+    """Test that the dependency watches the connection and that the running stage stops waiting."""
+    disconnect = asyncio.Event()
+
+    class DisconnectingRequest:
+        headers = {"X-Request-Timeout": "30"}
+
+        async def receive(self):
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+    async def scenario():
+        dependency = request_deadline(DisconnectingRequest())
+        assert await dependency.__anext__() == 30
+        asyncio.get_running_loop().call_later(0.05, disconnect.set)
+        started = time.monotonic()
+        with pytest.raises(ClientDisconnectedError):
+            await run_stage("transcript", 0.3, time.sleep, 2)
+        assert time.monotonic() - started < 1
+        await dependency.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_abandoned_stage_finishes_when_its_thread_returns():
+    """Test that on_finished waits for the thread of an abandoned call, and runs at once for a call never started."""
+    finished = []
+
+    async def scenario():
+        with deadline_scope(0.1):
+            with pytest.raises(DeadlineExceededError):
+                await run_stage("llm", 1.0, time.sleep, 0.5, on_finished=lambda: finished.append("llm"))
+            assert finished == []
+            await asyncio.sleep(0.6)
+            assert finished == ["llm"]
+        with deadline_scope(0.01), pytest.raises(DeadlineExceededError):
+            await run_stage("llm", 1.0, time.sleep, 0.5, on_finished=lambda: finished.append("expired"))
+        assert finished == ["llm", "expired"]
+
+    asyncio.run(scenario())
+
+
+def test_llm_call_is_not_retried_under_a_deadline(mock_youtube_data):
+    """Test that the OpenAI SDK does not retry when a deadline is set, as each attempt gets the whole timeout."""
+    attempts = []
+
+    def rate_limited(request):
+        attempts.append(request)
+        return httpx.Response(429, headers={"retry-after-ms": "1"}, json={"error": {"message": "Rate limited"}})
+
+    client = OpenAI(api_key="test", http_client=DefaultHttpxClient(transport=httpx.MockTransport(rate_limited)))
+    service = OpenAIAPIService(client=client)
+    with deadline_scope(5):
+        assert service.summarize_text("text", mock_youtube_data["metadata"], 50, "gpt-4o-mini") == ""
+    assert len(attempts) == 1
+
+
+@pytest.fixture
+def slow_client(summarize_client, mock_youtube_data):
+    """Provide the /summarize test client, whose transcript fetch takes a second."""
+    finished = threading.Event()
+
+    def slow_transcript(video_id, include_timestamps=True):
+        time.sleep(1)
+        finished.set()
+        return mock_youtube_data["transcript"]
+
+    summarize_client.youtube_service.get_youtube_transcript.side_effect = slow_transcript
+    controller = AdmissionController("summarize", max_in_flight=1, max_queue=0)
+    app.dependency_overrides[get_summarize_admission_controller] = lambda: controller
+    app.dependency_overrides[get_summarize_memory_budget] = lambda: MemoryBudget("summarize_memory")
+    summarize_client.controller = controller
+    yield summarize_client
+    finished.wait()
+
+
+def test_summarize_answers_504_when_the_deadline_passes(slow_client):
+    """Test that the header's deadline cuts a slow upstream call short, frees the slot and skips the LLM."""
+    started = time.monotonic()
+    response = slow_client.post(
+        "/summarize",
+        json={"video_url": "https://www.youtube.com/watch?v=py5byOOHZM8", "summary_length": 100,
+              "used_model": "gpt-4o-mini"},
+        headers={"X-Request-Timeout": "0.3"},
+    )
+
+    assert response.status_code == 504
+    assert "transcript" in response.json()["detail"]
+    assert time.monotonic() - started < 1
+    assert slow_client.controller.in_flight == 0
+    slow_client.openai_service.summarize_text.assert_not_called()
+
@@ -0,0 +1,110 @@
+"""Tests for the journaled storage mode and concurrent writers of UserJsonRepository."""
+
+import json
+import os
+import threading
+
+import pytest
+
+from repositories.user_json_repository import UserJsonRepository
+from tests.conftest import make_user
+
+
+@pytest.fixture
+def users_file(tmp_path):
+    """Provide a path for a users snapshot in a temporary directory."""
+    return str(tmp_path / "users.json")
+
+
+def test_journal_appends_instead_of_rewriting(users_file):
+    """Mutations go to the journal and leave the snapshot untouched."""
+    repo = UserJsonRepository(users_file, journaled=True)
+    user = make_user("alice")
+    repo.create(user)
+    user.email = "alice@new.example.com"
+    repo.update(user)
+    repo.create(make_user("bob"))
+    repo.delete(make_user("bob"))
+
+    assert not os.path.exists(users_file)
+    with open(repo.journal_path) as journal:
+        assert [json.loads(line)["op"] for line in journal] == ["put", "put", "put", "delete"]
+
+    # A second instance (another worker) sees the same state by replaying the journal
+    other = UserJsonRepository(users_file, journaled=True)
+    assert other.get_by_email("alice@new.example.com").user_name == "alice"
+    assert other.get_by_identifier("bob") is None
+
+
+def test_journal_tail_is_replayed_incrementally(users_file):
+    """A reader picks up records appended by another writer."""
+    reader = UserJsonRepository(users_file, journaled=True)
+    writer = UserJsonRepository(users_file, journaled=True)
+    writer.create(make_user("alice"))
+    assert reader.get_by_identifier("alice") is not None
+    writer.create(make_user("bob"))
+    assert reader.get_by_email("bob@example.com") is not None
+    assert len(reader.get_all()) == 2
+
+
+def test_torn_journal_record_is_ignored_and_overwritten(users_file):
+    """A partial record left by a crashed writer is skipped and truncated by the next write."""
+    repo = UserJsonRepository(users_file, journaled=True)
+    repo.create(make_user("alice"))
+    with open(repo.journal_path, "a") as journal:
+        journal.write('{"op": "put", "user": {"user_na')
+
+    other = UserJsonRepository(users_file, journaled=True)
+    assert [user.user_name for user in other.get_all()] == ["alice"]
+    other.create(make_user("bob"))
+    assert {user.user_name for user in UserJsonRepository(users_file, journaled=True).get_all()} == {"alice", "bob"}
+
+
+def test_compaction_folds_journal_into_snapshot(users_file):
+    """Once the journal passes the threshold it is compacted into the snapshot."""
+    repo = UserJsonRepository(users_file, journaled=True, compact_threshold_bytes=500)
+    for i in range(5):
+        repo.create(make_user(f"user{i}"))
+    repo.delete(make_user("user0"))
+    assert repo._compaction_thread is not None
+    repo._compaction_thread.join(timeout=5)
+
+    assert os.path.getsize(repo.journal_path) < 500
+    with open(users_file) as snapshot:
+        assert "user0" in json.load(snapshot)
+
+    fresh = UserJsonRepository(users_file, journaled=True)
+    assert {user.user_name for user in fresh.get_all()} == {f"user{i}" for i in range(1, 5)}
+    # The original instance notices the compaction and stays consistent
+    assert {user.user_name for user in repo.get_all()} == {f"user{i}" for i in range(1, 5)}
+
+
+@pytest.mark.parametrize("journaled", [False, True])
+def test_concurrent_writers_do_not_lose_updates(users_file, journaled):
+    """Writers with separate repository instances (as separate workers would have) lose no users."""
+    def register_users(worker: int):
+        repo = UserJsonRepository(users_file, journaled=journaled, compact_threshold_bytes=2000)
+        for i in range(20):
+            repo.create(make_user(f"w{worker}u{i}"))
+
+    threads = [threading.Thread(target=register_users, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    repo = UserJsonRepository(users_file, journaled=journaled)
+    assert len(repo.get_all()) == 80
+
+
+def test_ids_of_deleted_users_survive_compaction(users_file):
+    """The last assigned id is kept in the snapshot, so compacting away a deleted user does not free its id."""
+    repo = UserJsonRepository(users_file, journaled=True, compact_threshold_bytes=1)
+    repo.create(make_user("alice"))
+    bob = repo.create(make_user("bob"))
+    repo.delete(bob)
+    repo._compaction_thread.join(timeout=5)
+    repo.compact()
+
+    assert os.path.getsize(repo.journal_path) == 0
+    assert UserJsonRepository(users_file, journaled=True).create(make_user("carol")).user_id == bob.user_id + 1
@@ -1,12 +1,15 @@
 """Tests for the JSON-based User model and UserAuthService."""
 
+import json
 import logging
 import os
+from unittest.mock import patch
 
 import pytest
 
 from models.user import User
 from services.user_auth_service import UserAlreadyExistsError
+from repositories.user_json_repository import UserJsonRepository
 from tests.conftest import user_auth_service, user_repository
 from utils.auth_utils import AuthenticationUtils
 
@@ -83,6 +86,50 @@ def test_delete_user(user_repository):
     assert user_repository.get_by_identifier("testuser") is None
 
 
+def test_get_user_by_id(user_repository):
+    """Test retrieving a user by ID through the in-memory id index."""
+    user = User(user_id=42, user_name="testuser", email="test@example.com", password_hash="hashed_password")
+    user_repository.create(user)
+    assert user_repository.get_by_id(42).user_name == "testuser"
+    assert user_repository.get_by_id(43) is None
+
+
+def test_email_index_follows_updates(user_repository):
+    """Test that the email index is rebuilt when a user's email changes."""
+    user = User(user_id=None, user_name="testuser", email="old@example.com", password_hash="hashed_password")
+    user_repository.create(user)
+    user.email = "new@example.com"
+    user_repository.update(user)
+    assert user_repository.get_by_email("old@example.com") is None
+    assert user_repository.get_by_email("new@example.com").user_name == "testuser"
+
+
+def test_file_parsed_only_when_changed(user_repository):
+    """Test that lookups do not re-parse the file unless it changed on disk."""
+    user_repository.create(
+        User(user_id=None, user_name="testuser", email="test@example.com", password_hash="hashed_password")
+    )
+    with patch("repositories.user_json_repository.json.load", wraps=json.load) as json_load:
+        for _ in range(5):
+            assert user_repository.get_by_identifier("testuser") is not None
+        assert json_load.call_count == 0
+
+        # A write from another process (simulated by a second repository instance) triggers one reload
+        other_repository = UserJsonRepository(user_repository.file_path)
+        other_repository.create(
+            User(user_id=None, user_name="otheruser", email="other@example.com", password_hash="hashed_password")
+        )
+        assert user_repository.get_by_identifier("otheruser") is not None
+        assert user_repository.get_by_email("other@example.com") is not None
+        assert json_load.call_count == 2  # one parse by each repository
+
+
+def test_shared_repository_is_process_wide():
+    """Test that shared() returns one repository per file path."""
+    assert UserJsonRepository.shared("test_users.json") is UserJsonRepository.shared("./test_users.json")
+    assert UserJsonRepository.shared("test_users.json") is not UserJsonRepository.shared("other_users.json")
+
+
 def test_register_user(user_auth_service):
     """Test user registration using UserAuthService."""
     user = user_auth_service.register_user(
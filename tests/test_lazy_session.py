@@ -0,0 +1,58 @@
+"""Tests for lazy session acquisition with UserDBRepository."""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models.user import Base, User
+from repositories.user_db_repository import UserDBRepository
+from utils.db_utils import LazySession
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Provide an engine on a fresh SQLite database with the users table."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'lazy.db'}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_connection_only_held_during_repository_work(engine):
+    """Test that no connection is checked out before first use or after each repository call."""
+    session_factory = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    session = LazySession(session_factory)
+    repository = UserDBRepository(session)
+    assert engine.pool.checkedout() == 0
+
+    created = repository.create(
+        User(user_id=None, user_name="testuser", email="test@example.com", password_hash="hashed_password")
+    )
+    assert engine.pool.checkedout() == 0
+    assert created.user_id is not None
+
+    user = repository.get_by_identifier("testuser")
+    assert engine.pool.checkedout() == 0
+    assert user.email == "test@example.com"
+
+    user.email = "new@example.com"
+    repository.update(user)
+    assert repository.get_by_email("new@example.com").user_id == created.user_id
+
+    repository.delete(user)
+    assert repository.get_by_id(created.user_id) is None
+    assert engine.pool.checkedout() == 0
+    session.close()
+
+
+def test_lazy_session_not_opened_when_unused(engine):
+    """Test that a LazySession never creates a session if nothing uses it."""
+    created = []
+
+    def session_factory():
+        created.append(True)
+        return sessionmaker(bind=engine)()
+
+    session = LazySession(session_factory)
+    session.close()
+    assert created == []
@@ -0,0 +1,109 @@
+"""Tests for the fair scheduling of LLM calls."""
+
+import asyncio
+
+import pytest
+
+from services.llm_scheduler_service import BATCH, INTERACTIVE, FairScheduler, parse_user_limits
+from utils.deadline import DeadlineExceededError, deadline_scope
+
+
+async def _settle():
+    """Let started calls wake up (a short sleep runs every callback that is ready)."""
+    await asyncio.sleep(0.001)
+
+
+async def _run_calls(scheduler, calls, order):
+    """Start calls (user, priority) in order, each holding its slot until the test releases it."""
+    async def call(user_name, priority):
+        await scheduler.acquire(user_name, priority)
+        order.append((user_name, priority))
+
+    tasks = [asyncio.ensure_future(call(user_name, priority)) for user_name, priority in calls]
+    await _settle()
+    return tasks
+
+
+def test_interactive_call_overtakes_a_queued_batch():
+    """Test that a new interactive call gets the next free slot ahead of another user's queued batch."""
+    async def scenario():
+        scheduler = FairScheduler(max_concurrency=1, max_per_user=1)
+        order = []
+        tasks = await _run_calls(scheduler, [("batch-user", BATCH)] * 5, order)
+        tasks += await _run_calls(scheduler, [("alice", INTERACTIVE)], order)
+        assert scheduler.queue_depth(BATCH) == 4 and scheduler.queue_depth(INTERACTIVE) == 1
+
+        for _ in range(2):
+            running = order[-1]
+            scheduler.release(*running)
+            await _settle()
+        assert order[:2] == [("batch-user", BATCH), ("alice", INTERACTIVE)]
+
+        while scheduler.in_flight:
+            scheduler.release(*order[-1])
+            await _settle()
+        await asyncio.gather(*tasks)
+        assert len(order) == 6
+
+    asyncio.run(scenario())
+
+
+def test_backlogged_priorities_share_slots_by_weight():
+    """Test that backlogged interactive and batch queues are served in proportion to their weights."""
+    async def scenario():
+        scheduler = FairScheduler(max_concurrency=1, max_per_user=1)
+        order = []
+        tasks = await _run_calls(scheduler, [("nightly", BATCH)] * 10 + [("alice", INTERACTIVE)] * 10, order)
+        for _ in range(10):
+            scheduler.release(*order[-1])
+            await _settle()
+        # The first batch call started before alice arrived; then 4 interactive calls per batch call
+        assert [user for user, _ in order[1:11]].count("alice") == 8
+
+        while scheduler.in_flight:
+            scheduler.release(*order[-1])
+            await _settle()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+
+
+def test_users_are_capped_but_spare_slots_are_used():
+    """Test that a user runs at most their limit at once while the other slots serve others."""
+    async def scenario():
+        scheduler = FairScheduler(max_concurrency=3, max_per_user=1, user_limits={"importer": 2})
+        order = []
+        tasks = await _run_calls(scheduler, [("importer", BATCH)] * 4 + [("alice", INTERACTIVE)] * 2, order)
+        assert order == [("importer", BATCH), ("importer", BATCH), ("alice", INTERACTIVE)]
+        assert scheduler.queue_depth() == 3
+
+        while scheduler.in_flight:
+            scheduler.release(*order[0])
+            order.pop(0)
+            await _settle()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+
+
+def test_wait_ends_at_the_deadline():
+    """Test that a call waiting past the request's deadline gives up its place."""
+    async def scenario():
+        scheduler = FairScheduler(max_concurrency=1)
+        await scheduler.acquire("alice", INTERACTIVE)
+        with deadline_scope(0.05):
+            with pytest.raises(DeadlineExceededError):
+                await scheduler.acquire("bob", INTERACTIVE)
+        assert scheduler.queue_depth() == 0
+        scheduler.release("alice", INTERACTIVE)
+        assert scheduler.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_parse_user_limits():
+    """Test the LLM_USER_CONCURRENCY format."""
+    assert parse_user_limits("alice=4, nightly-import=1,") == {"alice": 4, "nightly-import": 1}
+    assert parse_user_limits("") == {}
+    with pytest.raises(ValueError):
+        parse_user_limits("alice")
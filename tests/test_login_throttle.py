@@ -0,0 +1,155 @@
+"""Tests for login throttling: attempt repositories, LoginThrottleService and the /token endpoint."""
+
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from main import app
+from models.login_attempt import LoginAttempt
+from repositories.login_attempt_db_repository import LoginAttemptDBRepository
+from repositories.login_attempt_memory_repository import LoginAttemptMemoryRepository
+from repositories.repository_interfaces import ILoginAttemptRepository
+from services.dependencies import get_login_throttle_service, get_user_auth_service2
+from services.login_throttle_service import LoginThrottleService
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def sqlite_session_factory():
+    """Provide a sessionmaker bound to an in-memory SQLite database with the login_attempts table."""
+    engine = create_engine("sqlite://")
+    LoginAttempt.__table__.create(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def test_memory_repository_sliding_window():
+    """Attempts beyond the limit are rejected until the oldest attempt leaves the window."""
+    clock = FakeClock()
+    repo = LoginAttemptMemoryRepository(clock=clock)
+
+    assert repo.hit("k", limit=2, window_seconds=60) == 0
+    clock.now += 10
+    assert repo.hit("k", limit=2, window_seconds=60) == 0
+    clock.now += 10
+    assert repo.hit("k", limit=2, window_seconds=60) == pytest.approx(40)
+
+    # The first attempt expires after 60 seconds, which frees one slot
+    clock.now += 40
+    assert repo.hit("k", limit=2, window_seconds=60) == 0
+    assert repo.hit("k", limit=2, window_seconds=60) > 0
+
+    repo.reset("k")
+    assert repo.hit("k", limit=2, window_seconds=60) == 0
+
+
+def test_db_repository_sliding_window(sqlite_session_factory):
+    """The database-backed repository enforces the same limits."""
+    repo = LoginAttemptDBRepository(sqlite_session_factory)
+
+    assert repo.hit("k", limit=2, window_seconds=60) == 0
+    assert repo.hit("k", limit=2, window_seconds=60) == 0
+    retry_after = repo.hit("k", limit=2, window_seconds=60)
+    assert 0 < retry_after <= 60
+    assert repo.hit("other", limit=2, window_seconds=60) == 0
+
+    repo.reset("k")
+    assert repo.hit("k", limit=2, window_seconds=60) == 0
+
+
+def test_throttle_service_limits_identifier_and_ip():
+    """The identifier limit applies across IPs, the IP limit across identifiers."""
+    service = LoginThrottleService(
+        LoginAttemptMemoryRepository(), max_attempts_per_identifier=2, max_attempts_per_ip=3
+    )
+
+    assert service.check("alice", "10.0.0.1") == 0
+    assert service.check("Alice", "10.0.0.2") == 0
+    assert service.check("alice", "10.0.0.3") > 0
+
+    assert service.check("bob", "10.0.0.9") == 0
+    assert service.check("carol", "10.0.0.9") == 0
+    assert service.check("dave", "10.0.0.9") == 0
+    assert service.check("erin", "10.0.0.9") > 0
+
+
+def test_throttle_keys_fit_the_column_for_oversized_usernames():
+    """Identifier keys have a fixed length however long the username a client sends."""
+    repository = MagicMock(spec=ILoginAttemptRepository)
+    repository.hit.return_value = 0
+    service = LoginThrottleService(repository)
+
+    service.check("a" * 10_000, "10.0.0.1")
+    service.check(" " + "A" * 10_000 + " ", "10.0.0.2")
+
+    keys = [call.args[0] for call in repository.hit.call_args_list]
+    assert all(len(key) <= LoginAttempt.__table__.c.throttle_key.type.length for key in keys)
+    # Keys are (ip, identifier) per check; the identifier is normalized before hashing
+    assert keys[1] == keys[3]
+
+
+def test_throttle_service_success_resets_identifier():
+    """A successful login clears the identifier's window."""
+    service = LoginThrottleService(
+        LoginAttemptMemoryRepository(), max_attempts_per_identifier=2, max_attempts_per_ip=100
+    )
+
+    service.check("alice", "10.0.0.1")
+    service.record_result("alice", success=False)
+    service.check("alice", "10.0.0.1")
+    service.record_result("alice", success=True)
+
+    assert service.check("alice", "10.0.0.1") == 0
+
+
+def test_token_endpoint_throttled(client: TestClient):
+    """A throttled login returns 429 with Retry-After and never reaches authentication."""
+    throttle_service = MagicMock()
+    throttle_service.check.return_value = 12.3
+    auth_service = MagicMock()
+
+    app.dependency_overrides[get_login_throttle_service] = lambda: throttle_service
+    app.dependency_overrides[get_user_auth_service2] = lambda: auth_service
+    try:
+        response = client.post("/token", data={"username": "testuser", "password": "password123"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "13"
+    auth_service.authenticate_user.assert_not_called()
+
+
+def test_token_endpoint_throttles_off_the_event_loop(client: TestClient):
+    """The throttle's (possibly database-backed) calls run on the database bulkhead, not the event loop."""
+    threads = []
+    throttle_service = MagicMock()
+    throttle_service.check.side_effect = lambda *args: threads.append(threading.current_thread().name) or 0.0
+    throttle_service.record_result.side_effect = lambda *args, **kwargs: threads.append(
+        threading.current_thread().name
+    )
+    auth_service = MagicMock()
+
+    app.dependency_overrides[get_login_throttle_service] = lambda: throttle_service
+    app.dependency_overrides[get_user_auth_service2] = lambda: auth_service
+    try:
+        response = client.post("/token", data={"username": "testuser", "password": "password123"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert len(threads) == 2
+    assert all(name.startswith("bulkhead-database") for name in threads)
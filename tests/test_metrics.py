@@ -0,0 +1,91 @@
+"""Tests for the Prometheus metrics and the /metrics endpoint."""
+
+import os
+import subprocess
+import sys
+import time
+from unittest.mock import Mock
+
+from fastapi import BackgroundTasks, FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from main import app
+from services.openai_api_service import OpenAIAPIService
+from utils.request_metrics import RequestMetricsMiddleware
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _sample(name, labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_requests_are_counted_per_route_template():
+    """Test that /metrics exposes request counts and latencies labelled with the route template."""
+    health = {"method": "GET", "route": "/health", "status": "200"}
+    unmatched = {"method": "GET", "route": "unmatched", "status": "404"}
+    before = _sample("http_requests_total", health), _sample("http_requests_total", unmatched)
+
+    with TestClient(app) as client:
+        client.get("/health")
+        client.get("/no/such/page")
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_bucket{le="0.005",method="GET",route="/health"}' in response.text
+    assert _sample("http_requests_total", health) == before[0] + 1
+    assert _sample("http_requests_total", unmatched) == before[1] + 1
+
+
+def test_background_tasks_are_not_part_of_the_request_duration():
+    """Test that a request is timed until its response is sent, not until its background tasks are done."""
+    background_app = FastAPI()
+    background_app.add_middleware(RequestMetricsMiddleware)
+
+    @background_app.post("/background-work")
+    async def background_work(background_tasks: BackgroundTasks):
+        background_tasks.add_task(time.sleep, 0.5)
+        return {}
+
+    labels = {"method": "POST", "route": "/background-work"}
+    before = _sample("http_request_duration_seconds_sum", labels)
+    with TestClient(background_app) as client:
+        assert client.post("/background-work").status_code == 200
+
+    assert _sample("http_request_duration_seconds_count", labels) >= 1
+    assert _sample("http_request_duration_seconds_sum", labels) - before < 0.25
+
+
+def test_token_usage_is_counted_per_model(mock_openai_client, mock_youtube_data):
+    """Test that the tokens reported by the LLM API are added up per model and kind."""
+    response = Mock()
+    response.choices = [Mock()]
+    response.choices[0].message.content = "A summary."
+    response.usage = Mock(prompt_tokens=120, completion_tokens=30, total_tokens=150)
+    mock_openai_client.chat.completions.create.return_value = response
+    labels = {"model": "gpt-4o-mini", "kind": "prompt"}
+    before = _sample("llm_tokens_total", labels)
+
+    OpenAIAPIService(client=mock_openai_client).summarize_text("text", mock_youtube_data["metadata"], 50, "gpt-4o-mini")
+
+    assert _sample("llm_tokens_total", labels) == before + 120
+    assert _sample("llm_tokens_total", {"model": "gpt-4o-mini", "kind": "completion"}) >= 30
+
+
+def test_metrics_of_all_workers_are_aggregated(tmp_path):
+    """Test that with PROMETHEUS_MULTIPROC_DIR, the metrics of every worker process are added up."""
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    record = (
+        "from utils.metrics import HTTP_REQUESTS;"
+        "HTTP_REQUESTS.labels(method='GET', route='/health', status='200').inc()"
+    )
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", record], cwd=PROJECT_DIR, env=env, check=True)
+
+    render = "from utils.metrics import render_metrics; print(render_metrics()[0].decode())"
+    output = subprocess.run(
+        [sys.executable, "-c", render], cwd=PROJECT_DIR, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    assert 'http_requests_total{method="GET",route="/health",status="200"} 2.0' in output
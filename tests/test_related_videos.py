@@ -0,0 +1,79 @@
+"""Tests for the memory-mapped vector index and the related videos endpoint."""
+
+import numpy as np
+import pytest
+
+from utils import vector_index
+from utils.vector_index import VectorIndex, vectorize
+
+DOCUMENTS = {
+    "space1": "Black holes bend light and swallow stars near the galaxy center",
+    "space2": "Telescopes watch stars and galaxies; black holes hide in the center",
+    "cook1": "Boil pasta in salted water and stir the tomato sauce",
+    "cook2": "A tomato sauce recipe: garlic, olive oil and fresh basil for pasta",
+}
+
+
+def test_vectorize_is_normalized_and_stable():
+    """Test that vectors have unit length and do not depend on the process (no salted hash())."""
+    vector = vectorize("Neural networks learn representations", 64)
+    assert vector.dtype == np.float32
+    assert np.isclose(np.linalg.norm(vector), 1.0)
+    assert np.array_equal(vector, vectorize("neural NETWORKS learn representations", 64))
+    assert not vectorize("the and of", 64).any()
+
+
+def test_query_returns_similar_documents_first(tmp_path):
+    """Test top-k queries, duplicate keys and unknown keys."""
+    index = VectorIndex(str(tmp_path), dimensions=256)
+    for key, text in DOCUMENTS.items():
+        assert index.add(key, text, {"video_title": key.title()})
+    assert not index.add("space1", "a different text")
+
+    related = index.query_key("space1", 2)
+    assert related[0][0] == {"key": "space2", "video_title": "Space2"}
+    assert related[0][1] > related[1][1]
+    assert [metadata["key"] for metadata, _ in index.query_key("cook1", 1)] == ["cook2"]
+    assert index.query_key("unknown", 3) is None
+    assert len(index.query_key("cook2", 10)) == 3
+
+
+def test_index_grows_and_is_shared_between_instances(tmp_path, monkeypatch):
+    """Test that the matrix file grows past its capacity and a second instance sees the new rows."""
+    monkeypatch.setattr(vector_index, "INITIAL_CAPACITY", 2)
+    writer, reader = VectorIndex(str(tmp_path), dimensions=128), VectorIndex(str(tmp_path), dimensions=128)
+    writer.add("space1", DOCUMENTS["space1"])
+    assert reader.query_key("space1", 5) == []
+    for key in ("space2", "cook1", "cook2"):
+        writer.add(key, DOCUMENTS[key])
+    assert len(reader) == 4
+    assert reader.query_key("space1", 1)[0][0]["key"] == "space2"
+    reader.add("cook3", "pasta with tomato")
+    assert len(writer) == 5
+
+
+@pytest.fixture
+def related_client(summarize_client):
+    """Provide the /summarize test client, with a distinct transcript per video."""
+    # Distinct transcripts, so that no summary is reused for a near-duplicate
+    summarize_client.youtube_service.get_youtube_transcript.side_effect = (
+        lambda video_id, **kwargs: [f"transcript of {video_id}"]
+    )
+    return summarize_client
+
+
+def test_summarized_videos_get_related_videos(related_client):
+    """Test that summarize updates the index and the endpoint returns the most similar video first."""
+    video_ids = {"space1": "aaaaaaaaaaa", "space2": "bbbbbbbbbbb", "cook1": "ccccccccccc"}
+    for key, video_id in video_ids.items():
+        related_client.openai_service.summarize_text.return_value = DOCUMENTS[key]
+        response = related_client.post(
+            "/summarize",
+            json={"video_url": f"https://www.youtube.com/watch?v={video_id}", "summary_length": 100,
+                  "used_model": "gpt-4o-mini"},
+        )
+        assert response.status_code == 200
+
+    related = related_client.get("/videos/aaaaaaaaaaa/related", params={"limit": 1}).json()["related"]
+    assert [video["video_id"] for video in related] == ["bbbbbbbbbbb"]
+    assert related_client.get("/videos/unknownvid1/related").status_code == 404
@@ -0,0 +1,141 @@
+"""Tests for full-text search: the inverted index, the search repositories and the endpoint."""
+
+import time
+from datetime import datetime
+
+import pytest
+
+from models.summary import Summary
+from models.transcript import Transcript
+from models.user import User
+from repositories.search_db_repository import SearchDBRepository
+from repositories.search_index_repository import SearchIndexRepository
+from repositories.summary_db_repository import SummaryDBRepository
+from utils import db_utils
+from utils.inverted_index import InvertedIndex, highlight, tokenize
+
+
+def make_summary(summary_id: int, user_id: int, video_id: str, text: str, title: str = None) -> Summary:
+    """Create a stored summary of video_id."""
+    return Summary(
+        summary_id=summary_id, user_id=user_id, video_id=video_id, video_title=title or f"Video {video_id}",
+        summary_length=100, used_model="gpt-4o-mini", summary=text, word_count=len(text.split()),
+        created_at=datetime(2026, 1, 1),
+    )
+
+
+def test_inverted_index_ranks_by_bm25():
+    """Test that more matching terms and more occurrences rank higher, stop words are ignored and filters apply."""
+    index = InvertedIndex()
+    index.add("the quantum computer uses qubits")
+    index.add("a classical computer")
+    index.add("qubits qubits and more qubits")
+
+    assert tokenize("The Quantum-Computer") == ["quantum", "computer"]
+    assert [doc for doc, _ in index.search("qubits computer", 3)] == [0, 2, 1]
+    assert [doc for doc, _ in index.search("qubits", 3)] == [2, 0]
+    assert index.search("the and", 3) == []
+    assert [doc for doc, _ in index.search("qubits", 3, accept=lambda doc: doc != 2)] == [0]
+
+
+def test_highlight_picks_the_window_with_most_matches():
+    """Test that the snippet is taken around the matches and marks them up like ts_headline."""
+    text = " ".join(["filler"] * 50 + ["Neural", "networks", "learn"] + ["filler"] * 50)
+    snippet = highlight(text, {"neural", "learn"}, max_words=10)
+    assert "<b>Neural</b> networks <b>learn</b>" in snippet
+    assert snippet.startswith("... ") and snippet.endswith(" ...")
+
+
+def test_highlight_of_a_long_transcript_is_fast():
+    """Test that a long transcript full of matches is highlighted in bounded time, around its first matches."""
+    text = " ".join(["filler"] * 1000 + ["neural", "learn", "filler", "filler"] * 24000)
+    started = time.perf_counter()
+    snippet = highlight(text, {"neural", "learn"}, max_words=10)
+    assert time.perf_counter() - started < 0.5
+    assert snippet == (
+        "... filler filler filler <b>neural</b> <b>learn</b> filler filler <b>neural</b> <b>learn</b> filler ..."
+    )
+
+
+@pytest.fixture
+def search_repository(tmp_path):
+    """Provide a SearchIndexRepository on a fresh file."""
+    return SearchIndexRepository(str(tmp_path / "search_documents.jsonl"))
+
+
+def test_index_repository_searches_own_summaries_and_all_transcripts(search_repository):
+    """Test that other users' summaries are hidden, transcripts are shared and indexed once."""
+    search_repository.index(make_summary(1, 1, "vid1", "Alice learns about black holes"), "black holes swallow light")
+    search_repository.index(make_summary(2, 2, "vid1", "Bob's notes on black holes"), "black holes swallow light")
+    search_repository.index(make_summary(3, 2, "vid2", "Cooking pasta"), "boil the water, add salt")
+
+    hits = search_repository.search(1, "black holes", 10)
+    assert sorted((hit.source, hit.summary_id) for hit in hits) == [("summary", 1), ("transcript", None)]
+    assert all("<b>black</b> <b>holes</b>" in hit.snippet for hit in hits)
+    assert [hit.video_id for hit in search_repository.search(2, "salt", 10)] == ["vid2"]
+    assert search_repository.search(1, "pasta", 10) == []
+
+
+def test_index_repository_sees_other_processes_documents(tmp_path):
+    """Test that a second instance (standing in for another worker) picks up appended documents."""
+    path = str(tmp_path / "search_documents.jsonl")
+    writer, reader = SearchIndexRepository(path), SearchIndexRepository(path)
+    writer.index(make_summary(1, 1, "vid1", "Telescopes and galaxies"), "distant galaxies")
+    assert {hit.source for hit in reader.search(1, "galaxies", 10)} == {"summary", "transcript"}
+    reader.index(make_summary(2, 1, "vid1", "More galaxies"), "distant galaxies")
+    assert len(writer.search(1, "galaxies", 10)) == 3
+
+
+@pytest.mark.db
+def test_db_repository_ranks_and_highlights(setup_database):
+    """Test the tsvector search against Postgres."""
+    with db_utils.SessionLocal() as session:
+        session.add(User(user_name="search_user", email="search_user@example.com", password_hash="hashed"))
+        session.commit()
+        user_id = session.query(User).filter_by(user_name="search_user").one().user_id
+    try:
+        repository = SearchDBRepository(db_utils.SessionLocal)
+        summary = Summary(
+            user_id=user_id, video_id="searchvid", video_title="Black holes", summary_length=100,
+            used_model="gpt-4o-mini", summary="Notes on event horizons", word_count=4,
+        )
+        SummaryDBRepository(db_utils.SessionLocal).add(summary)
+        repository.index(summary, "Nothing escapes the event horizon of a black hole")
+
+        hits = repository.search(user_id, "event horizon", 10)
+        assert {hit.source for hit in hits} == {"summary", "transcript"}
+        assert all("<b>" in hit.snippet for hit in hits)
+    finally:
+        with db_utils.SessionLocal() as session:
+            # The user's summaries are deleted by ON DELETE CASCADE
+            session.query(User).filter_by(user_name="search_user").delete()
+            session.query(Transcript).filter_by(video_id="searchvid").delete()
+            session.commit()
+
+
+@pytest.fixture
+def search_client(summarize_client):
+    """Provide the /summarize test client, with a transcript and summary about photosynthesis."""
+    summarize_client.youtube_service.get_youtube_transcript.return_value = [
+        "welcome to the lecture", "on photosynthesis in plants"
+    ]
+    summarize_client.openai_service.summarize_text.return_value = "Plants turn sunlight into sugar."
+    return summarize_client
+
+
+def test_summarized_videos_are_searchable(search_client):
+    """Test that summarize indexes the summary and transcript, and /search finds both."""
+    response = search_client.post(
+        "/summarize",
+        json={"video_url": "https://www.youtube.com/watch?v=py5byOOHZM8", "summary_length": 100,
+              "used_model": "gpt-4o-mini"},
+    )
+    assert response.status_code == 200
+
+    results = search_client.get("/search", params={"q": "photosynthesis"}).json()["results"]
+    assert [(result["source"], result["video_id"]) for result in results] == [("transcript", "py5byOOHZM8")]
+    assert "<b>photosynthesis</b>" in results[0]["snippet"]
+    results = search_client.get("/search", params={"q": "sunlight"}).json()["results"]
+    assert [result["source"] for result in results] == ["summary"]
+    assert results[0]["summary_id"] is not None
+    assert search_client.get("/search", params={"q": ""}).status_code == 422
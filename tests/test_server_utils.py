@@ -0,0 +1,44 @@
+"""Tests for the uvicorn settings of the launch modes."""
+
+import os
+from unittest.mock import patch
+
+from utils.server_utils import DEFAULT_GRACEFUL_SHUTDOWN_SECONDS, get_server_options, prepare_multiprocess_metrics
+
+
+def test_development_mode_is_a_single_reloading_process(monkeypatch):
+    """Test that development mode keeps uvicorn's defaults apart from reload."""
+    monkeypatch.delenv("PORT", raising=False)
+    assert get_server_options(False) == {"host": "0.0.0.0", "port": 8000, "reload": True}
+    assert get_server_options(False, reload=False)["reload"] is False
+
+
+def test_production_mode(monkeypatch):
+    """Test worker count precedence, the fallback event loop and parser, and graceful shutdown."""
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    monkeypatch.delenv("GRACEFUL_SHUTDOWN_SECONDS", raising=False)
+    with patch("utils.server_utils.available_cpus", return_value=6), \
+            patch("utils.server_utils._installed", return_value=False):
+        options = get_server_options(True)
+        assert options["workers"] == 6
+        assert (options["loop"], options["http"], options["reload"]) == ("asyncio", "h11", False)
+        assert options["timeout_graceful_shutdown"] == DEFAULT_GRACEFUL_SHUTDOWN_SECONDS
+
+        monkeypatch.setenv("WEB_CONCURRENCY", "3")
+        assert get_server_options(True)["workers"] == 3
+        assert get_server_options(True, workers=2)["workers"] == 2
+
+    with patch("utils.server_utils._installed", return_value=True):
+        options = get_server_options(True, workers=1)
+        assert (options["loop"], options["http"]) == ("uvloop", "httptools")
+
+
+def test_multiprocess_metrics_start_from_an_empty_directory(monkeypatch, tmp_path):
+    """Test that the metric files of an earlier server are removed and the workers get the directory."""
+    (tmp_path / "counter_1234.db").write_bytes(b"stale")
+    (tmp_path / "README").write_text("kept")
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+
+    assert prepare_multiprocess_metrics() == str(tmp_path)
+    assert sorted(os.listdir(tmp_path)) == ["README"]
+    assert os.environ["PROMETHEUS_MULTIPROC_DIR"] == str(tmp_path)
@@ -0,0 +1,128 @@
+"""Tests for the slow request log and the /debug/slow endpoint."""
+
+import time
+
+import httpx
+import pytest
+from fastapi import BackgroundTasks, FastAPI
+from fastapi.testclient import TestClient
+from openai import DefaultHttpxClient, OpenAI
+
+from services import openai_api_service
+from services.openai_api_service import OpenAIAPIService
+from utils import slow_requests
+from utils.slow_requests import SlowRequestLog
+from utils.tracing import Span, Trace, TracingMiddleware, _current_span, span
+
+
+def _finished_request(name: str, duration_ms: float) -> Span:
+    root = Span(name, Trace(), None)
+    root.end()
+    root.end_ns = root.start_ns + int(duration_ms * 1e6)
+    return root
+
+
+def test_log_keeps_the_latest_slow_requests():
+    """Test that only requests above the threshold are kept, the oldest dropped when the buffer is full."""
+    log = SlowRequestLog(threshold_seconds=1.0, max_entries=2)
+
+    assert not log.record(_finished_request("GET /fast", 999))
+    for name in ("GET /a", "GET /b", "GET /c"):
+        assert log.record(_finished_request(name, 1500))
+
+    assert [entry["name"] for entry in log.entries()] == ["GET /c", "GET /b"]
+    assert [entry["name"] for entry in log.entries(limit=1)] == ["GET /c"]
+    assert not SlowRequestLog(threshold_seconds=0, max_entries=0).record(_finished_request("GET /a", 1))
+
+
+def test_background_tasks_do_not_make_a_request_slow(monkeypatch):
+    """Test that a request is recorded by the time its response took, not its background tasks."""
+    log = SlowRequestLog(threshold_seconds=0.25, max_entries=10)
+    monkeypatch.setattr(slow_requests, "_slow_request_log", log)
+    background_app = FastAPI()
+    background_app.add_middleware(TracingMiddleware)
+
+    @background_app.post("/background-work")
+    async def background_work(background_tasks: BackgroundTasks):
+        background_tasks.add_task(time.sleep, 0.5)
+        return {}
+
+    with TestClient(background_app) as client:
+        assert client.post("/background-work").status_code == 200
+
+    assert log.entries() == []
+
+
+@pytest.fixture
+def slow_client(summarize_client, monkeypatch):
+    """Provide the /summarize test client, recording every request as slow, for an admin with token usage."""
+    monkeypatch.setattr(slow_requests, "_slow_request_log", SlowRequestLog(threshold_seconds=0, max_entries=10))
+    monkeypatch.setenv("ADMIN_USERS", "alice")
+    summarize_client.openai_service.last_usage = {"prompt_tokens": 1200, "completion_tokens": 80, "total_tokens": 1280}
+    return summarize_client
+
+
+def test_slow_summarize_request_is_listed_with_its_breakdown(slow_client, mock_youtube_data):
+    """Test that /debug/slow shows a slow request's stages, transcript length, model, tokens and cache outcome."""
+    response = slow_client.post(
+        "/summarize",
+        json={"video_url": "https://www.youtube.com/watch?v=py5byOOHZM8", "summary_length": 100,
+              "used_model": "gpt-4o-mini"},
+    )
+    assert response.status_code == 200
+
+    listing = slow_client.get("/debug/slow").json()
+
+    assert listing["threshold_seconds"] == 0
+    entry = next(entry for entry in listing["requests"] if entry["route"] == "/summarize")
+    assert entry["name"] == "POST /summarize"
+    assert entry["status"] == 200
+    assert entry["retries"] == 0
+    assert entry["attributes"] == {
+        "transcript_chars": len(" ".join(mock_youtube_data["transcript"])),
+        "model": "gpt-4o-mini",
+        "summary_reuse": "miss",
+        "prompt_tokens": 1200,
+        "completion_tokens": 80,
+        "total_tokens": 1280,
+    }
+    stages = [stage["name"] for stage in entry["stages"]]
+    for stage in ("admission", "transcript", "metadata", "reuse_lookup", "llm_queue", "llm"):
+        assert stage in stages
+    assert all(0 <= stage["offset_ms"] <= entry["duration_ms"] for stage in entry["stages"])
+
+
+def test_slow_requests_require_admin(slow_client, monkeypatch):
+    """Test that users not listed in ADMIN_USERS cannot read the slow request log."""
+    monkeypatch.setenv("ADMIN_USERS", "someone_else")
+    assert slow_client.get("/debug/slow").status_code == 403
+
+
+def test_retries_of_the_llm_api_are_counted(mock_youtube_data):
+    """Test that a call the OpenAI SDK had to retry adds to the request's retry count."""
+    responses = iter([
+        httpx.Response(429, headers={"retry-after-ms": "1"}, json={"error": {"message": "Rate limited"}}),
+        httpx.Response(200, json={
+            "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": "A summary."}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12},
+        }),
+    ])
+    http_client = DefaultHttpxClient(
+        transport=httpx.MockTransport(lambda request: next(responses)),
+        event_hooks={"request": [openai_api_service._count_attempt]},
+    )
+    service = OpenAIAPIService(client=OpenAI(api_key="test", http_client=http_client, max_retries=2))
+    trace = Trace()
+    root = Span("POST /summarize", trace, None)
+    token = _current_span.set(root)
+    try:
+        with span("llm"):
+            summary = service.summarize_text("text", mock_youtube_data["metadata"], 50, "gpt-4o-mini")
+    finally:
+        _current_span.reset(token)
+
+    assert summary == "A summary."
+    assert trace.attributes["retries"] == 1
+    assert next(s for s in trace.finished if s.name == "openai.chat.completions").attributes["http.attempts"] == 2
@@ -0,0 +1,106 @@
+"""Tests for the SQLite-based UserSQLiteRepository and the users.json migration script."""
+
+import sqlite3
+
+import pytest
+
+from models.summary import Summary
+from repositories.summary_db_repository import SummaryDBRepository
+from repositories.summary_json_repository import SummaryJsonRepository
+from repositories.user_json_repository import UserJsonRepository
+from repositories.user_sqlite_repository import UserSQLiteRepository
+from scripts.migrate_json_to_sqlite import migrate_json_to_sqlite
+from tests.conftest import make_user
+from utils.sqlite_utils import get_sqlite_session_factory
+
+
+@pytest.fixture
+def sqlite_path(tmp_path):
+    """Provide a path for a SQLite database in a temporary directory."""
+    return str(tmp_path / "users.db")
+
+
+@pytest.fixture
+def sqlite_repository(sqlite_path):
+    """Provide a UserSQLiteRepository on a fresh database."""
+    return UserSQLiteRepository(get_sqlite_session_factory(sqlite_path))
+
+
+def test_crud(sqlite_repository):
+    """Test create, lookups, update and delete."""
+    created = sqlite_repository.create(make_user("alice"))
+    assert created.user_id is not None
+
+    assert sqlite_repository.get_by_identifier("alice").email == "alice@example.com"
+    assert sqlite_repository.get_by_email("alice@example.com").user_name == "alice"
+    assert sqlite_repository.get_by_id(created.user_id).user_name == "alice"
+
+    user = sqlite_repository.get_by_identifier("alice")
+    user.email = "alice@new.example.com"
+    sqlite_repository.update(user)
+    assert sqlite_repository.get_by_email("alice@new.example.com").user_id == created.user_id
+
+    sqlite_repository.delete(user)
+    assert sqlite_repository.get_by_identifier("alice") is None
+    assert sqlite_repository.get_all() == []
+
+
+def test_duplicate_user_raises_value_error(sqlite_repository):
+    """Test that unique constraints surface as ValueError, like the JSON repository."""
+    sqlite_repository.create(make_user("alice"))
+    with pytest.raises(ValueError):
+        sqlite_repository.create(make_user("alice"))
+
+
+def test_wal_mode_and_indexes(sqlite_repository, sqlite_path):
+    """Test that the database uses WAL journaling and indexes user_name and email."""
+    sqlite_repository.create(make_user("alice"))
+    connection = sqlite3.connect(sqlite_path)
+    try:
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        plan = " ".join(
+            row[-1] for row in connection.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM users WHERE email = ?", ("alice@example.com",)
+            )
+        )
+        assert "USING INDEX" in plan
+        plan = " ".join(
+            row[-1] for row in connection.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM users WHERE user_name = ?", ("alice",)
+            )
+        )
+        assert "USING INDEX" in plan
+    finally:
+        connection.close()
+
+
+def test_migrate_json_to_sqlite(tmp_path, sqlite_path):
+    """Test copying users from a journaled JSON store, skipping users that already exist."""
+    json_path = str(tmp_path / "users.json")
+    json_repository = UserJsonRepository(json_path, journaled=True)
+    json_repository.create(make_user("alice"))
+    json_repository.create(make_user("bob"))
+
+    assert migrate_json_to_sqlite(json_path, sqlite_path) == 2
+    assert migrate_json_to_sqlite(json_path, sqlite_path) == 0
+
+    sqlite_repository = UserSQLiteRepository(get_sqlite_session_factory(sqlite_path))
+    assert {user.user_name for user in sqlite_repository.get_all()} == {"alice", "bob"}
+
+
+def test_migration_keeps_user_ids_and_summaries(tmp_path, sqlite_path):
+    """Test that migrated users keep their ids (despite a deleted user before them) and their summaries."""
+    json_path, summaries_path = str(tmp_path / "users.json"), str(tmp_path / "summaries.jsonl")
+    json_repository = UserJsonRepository(json_path)
+    json_repository.delete(json_repository.create(make_user("deleted")))
+    alice = json_repository.create(make_user("alice"))
+    summary = SummaryJsonRepository(summaries_path).add(Summary(
+        user_id=alice.user_id, video_id="video0", video_title="Video 0", summary_length=100,
+        used_model="gpt-4o-mini", summary="Alice's summary", word_count=2,
+    ))
+
+    assert migrate_json_to_sqlite(json_path, sqlite_path, summaries_path) == 1
+
+    session_factory = get_sqlite_session_factory(sqlite_path)
+    assert UserSQLiteRepository(session_factory).get_by_identifier("alice").user_id == alice.user_id == 2
+    assert SummaryDBRepository(session_factory).get(alice.user_id, summary.summary_id).summary == "Alice's summary"
@@ -0,0 +1,39 @@
+"""Tests that importing the application stays fast and leaves the heavy SDKs unloaded."""
+
+import os
+import re
+import subprocess
+import sys
+
+# Seconds importing main may take; generous, since CI machines are slow and shared
+IMPORT_TIME_BUDGET_SECONDS = 5.0
+# Imported when first used (see utils/lazy_import.py), never at startup
+LAZY_MODULES = ("openai", "googleapiclient", "youtube_transcript_api", "jose", "uvicorn")
+
+_IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def import_times():
+    """Import main in a fresh interpreter and return (module, cumulative microseconds, depth) per import."""
+    project_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=project_dir, env={**os.environ, "CI": "true"}, capture_output=True, text=True, check=True,
+    )
+    return [
+        (match.group(4), int(match.group(2)), len(match.group(3)) // 2)
+        for match in map(_IMPORT_TIME_LINE.match, result.stderr.splitlines()) if match
+    ]
+
+
+def test_import_time_budget():
+    """Test the import time of main and report where it goes (run with -s to see the report)."""
+    times = import_times()
+    total_seconds = next(cumulative for module, cumulative, _ in times if module == "main") / 1e6
+    top_level = sorted(((cumulative, module) for module, cumulative, depth in times if depth == 1), reverse=True)
+    report = "\n".join(f"{cumulative / 1e3:8.1f} ms  {module}" for cumulative, module in top_level[:10])
+    print(f"\nImporting main took {total_seconds:.2f}s; slowest imports of main:\n{report}")
+
+    loaded = sorted({module.split(".")[0] for module, _, _ in times} & set(LAZY_MODULES))
+    assert loaded == [], f"Imported at startup: {loaded}"
+    assert total_seconds < IMPORT_TIME_BUDGET_SECONDS, report
@@ -0,0 +1,151 @@
+"""Tests for the stored summary history: repositories, cursors and endpoints."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.summary import Summary
+from models.user import User
+from repositories import repository_provider
+from repositories.repository_provider import get_search_repository, get_summary_repository
+from repositories.summary_db_repository import SummaryDBRepository
+from repositories.summary_json_repository import SummaryJsonRepository
+from repositories.user_json_repository import UserJsonRepository
+from repositories.user_sqlite_repository import UserSQLiteRepository
+from services.summary_history_service import decode_cursor, encode_cursor
+from utils.sqlite_utils import get_sqlite_session_factory
+
+START = datetime(2026, 1, 1)
+
+
+def make_summary(user_id: int, index: int, created_at: datetime = None) -> Summary:
+    """Create a summary of video "video<index>"."""
+    return Summary(
+        user_id=user_id, video_id=f"video{index}", video_title=f"Video {index}", summary_length=100,
+        used_model="gpt-4o-mini", summary=f"Summary {index}", word_count=2,
+        created_at=created_at or START + timedelta(minutes=index),
+    )
+
+
+def page_through(repository, user_id: int, limit: int):
+    """Collect the video ids of all pages of a user's listing."""
+    pages, before = [], None
+    while True:
+        page = repository.list_for_user(user_id, limit, before)
+        if not page:
+            return pages
+        pages.append([summary.video_id for summary in page])
+        before = (page[-1].created_at, page[-1].summary_id)
+
+
+@pytest.fixture
+def sqlite_summary_repository(tmp_path):
+    """Provide a SummaryDBRepository on SQLite with users 1 and 2."""
+    session_factory = get_sqlite_session_factory(str(tmp_path / "users.db"))
+    UserSQLiteRepository(session_factory).create_many([
+        User(user_id=None, user_name=name, email=f"{name}@example.com", password_hash="hashed")
+        for name in ("alice", "bob")
+    ])
+    return SummaryDBRepository(session_factory)
+
+
+@pytest.fixture
+def json_summary_repository(tmp_path):
+    """Provide a SummaryJsonRepository on a fresh file."""
+    return SummaryJsonRepository(str(tmp_path / "summaries.jsonl"))
+
+
+@pytest.mark.parametrize("repository_fixture", ["sqlite_summary_repository", "json_summary_repository"])
+def test_keyset_pagination(request, repository_fixture):
+    """Test newest-first pages, ties on created_at, ownership checks and the summary text of get."""
+    repository = request.getfixturevalue(repository_fixture)
+    for index in range(5):
+        repository.add(make_summary(1, index))
+    # Two summaries created at the same instant are ordered by summary_id
+    repository.add(make_summary(1, 5, created_at=START + timedelta(minutes=4)))
+    stored = repository.add(make_summary(2, 6))
+
+    assert page_through(repository, 1, 2) == [["video5", "video4"], ["video3", "video2"], ["video1", "video0"]]
+    assert repository.get(2, stored.summary_id).summary == "Summary 6"
+    assert repository.get(1, stored.summary_id) is None
+
+
+def test_json_repository_sees_other_processes_appends(tmp_path):
+    """Test that a second instance (standing in for another worker) picks up appended summaries."""
+    path = str(tmp_path / "summaries.jsonl")
+    writer, reader = SummaryJsonRepository(path), SummaryJsonRepository(path)
+    writer.add(make_summary(1, 0))
+    assert [summary.video_id for summary in reader.list_for_user(1, 10)] == ["video0"]
+    writer.add(make_summary(1, 1))
+    assert [summary.video_id for summary in reader.list_for_user(1, 10)] == ["video1", "video0"]
+    assert reader.add(make_summary(1, 2)).summary_id == 3
+
+
+def test_deleted_users_summaries_are_gone_and_their_id_is_not_reused(tmp_path):
+    """Test that a JSON user's summaries and search documents go with them, and a new user gets a new id."""
+    users = UserJsonRepository(str(tmp_path / "users.json"), on_delete=repository_provider._delete_json_user_data)
+    summaries, search = get_summary_repository(), get_search_repository()
+    users.create(User(user_id=None, user_name="alice", email="alice@example.com", password_hash="hashed"))
+    bob = users.create(User(user_id=None, user_name="bob", email="bob@example.com", password_hash="hashed"))
+    stored = summaries.add(make_summary(bob.user_id, 0))
+    search.index(stored)
+
+    users.delete(bob)
+    carol = users.create(User(user_id=None, user_name="carol", email="carol@example.com", password_hash="hashed"))
+
+    assert carol.user_id != bob.user_id
+    assert summaries.get(bob.user_id, stored.summary_id) is None
+    assert search.search(bob.user_id, "Summary", 10) == []
+    # A fresh instance (another worker, or after a restart) does not hand out the id either
+    reloaded = UserJsonRepository(str(tmp_path / "users.json"))
+    dave = reloaded.create(User(user_id=None, user_name="dave", email="dave@example.com", password_hash="hashed"))
+    assert dave.user_id == carol.user_id + 1
+
+
+def test_cursor_round_trip():
+    """Test that cursors decode to the position they were made from and garbage is rejected."""
+    summary = make_summary(1, 0)
+    summary.summary_id = 42
+    assert decode_cursor(encode_cursor(summary)) == (summary.created_at, 42)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+@pytest.fixture
+def history_client(summarize_client, mock_youtube_data):
+    """Provide the /summarize test client, with a distinct transcript per video and token usage."""
+    # Distinct transcripts, so that no summary is reused for a near-duplicate
+    summarize_client.youtube_service.get_youtube_transcript.side_effect = lambda video_id, **kwargs: (
+        mock_youtube_data["transcript"] if video_id == "py5byOOHZM8" else [f"transcript of {video_id}"]
+    )
+    summarize_client.openai_service.summarize_text.return_value = "A short summary."
+    summarize_client.openai_service.last_usage = {"prompt_tokens": 900, "completion_tokens": 100, "total_tokens": 1000}
+    return summarize_client
+
+
+def test_summaries_are_stored_and_reopened_without_llm_call(history_client):
+    """Test that summarize stores the summary and the history endpoints serve it back."""
+    for video_id in ("py5byOOHZM8", "dQw4w9WgXcQ"):
+        response = history_client.post(
+            "/summarize",
+            json={"video_url": f"https://www.youtube.com/watch?v={video_id}", "summary_length": 100,
+                  "used_model": "gpt-4o-mini"},
+        )
+        assert response.status_code == 200
+
+    first_page = history_client.get("/summaries", params={"limit": 1}).json()
+    assert [item["video_id"] for item in first_page["items"]] == ["dQw4w9WgXcQ"]
+    assert "summary" not in first_page["items"][0]
+    second_page = history_client.get("/summaries", params={"limit": 1, "cursor": first_page["next_cursor"]}).json()
+    assert [item["video_id"] for item in second_page["items"]] == ["py5byOOHZM8"]
+    assert second_page["next_cursor"] is None
+
+    summary_id = second_page["items"][0]["summary_id"]
+    stored = history_client.get(f"/summaries/{summary_id}").json()
+    assert stored["summary"] == "A short summary."
+    assert stored["total_tokens"] == 1000
+    assert stored["summary_seconds"] is not None
+    assert history_client.openai_service.summarize_text.call_count == 2
+
+    assert history_client.get("/summaries/9999").status_code == 404
+    assert history_client.get("/summaries", params={"cursor": "garbage"}).status_code == 400
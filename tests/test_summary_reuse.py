@@ -0,0 +1,109 @@
+"""Tests for near-duplicate transcript detection and the reuse of stored summaries."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from models.summary import Summary
+from models.user import User
+from repositories.summary_db_repository import SummaryDBRepository
+from repositories.summary_json_repository import SummaryJsonRepository
+from repositories.user_sqlite_repository import UserSQLiteRepository
+from services.summary_reuse_service import transcript_fingerprint
+from utils.minhash import LshIndex, similarity
+from utils.sqlite_utils import get_sqlite_session_factory
+
+TRANSCRIPT = [
+    f"in part {index} of this lecture we look at how convolutional networks detect edges and shapes"
+    for index in range(60)
+]
+
+
+def test_fingerprints_of_reuploads_are_similar():
+    """Test that annotations and a trimmed intro keep the similarity high, other content does not."""
+    original = transcript_fingerprint(" ".join(TRANSCRIPT))
+    reupload = transcript_fingerprint("[Music] " + " ".join(TRANSCRIPT[2:]).upper() + " (applause)")
+    other = transcript_fingerprint(" ".join(f"step {index} of the pasta recipe adds salt" for index in range(60)))
+
+    assert similarity(original, reupload) > 0.9
+    assert similarity(original, other) < 0.2
+    assert transcript_fingerprint("[Music]") is None
+
+
+def test_lsh_index_finds_near_duplicates_across_instances(tmp_path):
+    """Test that a second instance (standing in for another worker) finds signatures added by the first."""
+    path = str(tmp_path / "fingerprints.jsonl")
+    writer, reader = LshIndex(path), LshIndex(path)
+    assert writer.add("original", transcript_fingerprint(" ".join(TRANSCRIPT)))
+    assert not writer.add("original", transcript_fingerprint("something else entirely"))
+
+    matches = reader.query(transcript_fingerprint(" ".join(TRANSCRIPT[1:])), 0.9)
+    assert [key for key, _ in matches] == ["original"]
+    assert reader.query(transcript_fingerprint("a completely unrelated transcript"), 0.9) == []
+
+
+@pytest.fixture
+def sqlite_summary_repository(tmp_path):
+    """Provide a SummaryDBRepository on SQLite with user 1."""
+    session_factory = get_sqlite_session_factory(str(tmp_path / "users.db"))
+    UserSQLiteRepository(session_factory).create_many([
+        User(user_id=None, user_name="alice", email="alice@example.com", password_hash="hashed")
+    ])
+    return SummaryDBRepository(session_factory)
+
+
+@pytest.fixture
+def json_summary_repository(tmp_path):
+    """Provide a SummaryJsonRepository on a fresh file."""
+    return SummaryJsonRepository(str(tmp_path / "summaries.jsonl"))
+
+
+@pytest.mark.parametrize("repository_fixture", ["sqlite_summary_repository", "json_summary_repository"])
+def test_find_latest_for_video(request, repository_fixture):
+    """Test that the newest summary with matching length and model is found."""
+    repository = request.getfixturevalue(repository_fixture)
+    start = datetime(2026, 1, 1)
+    for minutes, length, text in ((0, 100, "old"), (5, 100, "new"), (10, 300, "long")):
+        repository.add(Summary(
+            user_id=1, video_id="video1", summary_length=length, used_model="gpt-4o-mini", summary=text,
+            word_count=1, created_at=start + timedelta(minutes=minutes),
+        ))
+
+    assert repository.find_latest_for_video("video1", 100, "gpt-4o-mini").summary == "new"
+    assert repository.find_latest_for_video("video1", 100, "gpt-4o") is None
+    assert repository.find_latest_for_video("video2", 100, "gpt-4o-mini") is None
+
+
+@pytest.fixture
+def reuse_client(summarize_client):
+    """Provide the /summarize test client, where the videos "reupload001" and "original001" have the same transcript."""
+    summarize_client.youtube_service.get_youtube_transcript.side_effect = lambda video_id, **kwargs: (
+        ["[Music]"] + TRANSCRIPT if video_id == "reupload001" else TRANSCRIPT
+    )
+    summarize_client.openai_service.summarize_text.return_value = "Convolutional networks detect edges."
+    return summarize_client
+
+
+def summarize(client: TestClient, video_id: str, summary_length: int = 100):
+    """Request a summary of video_id."""
+    return client.post(
+        "/summarize",
+        json={"video_url": f"https://www.youtube.com/watch?v={video_id}", "summary_length": summary_length,
+              "used_model": "gpt-4o-mini"},
+    )
+
+
+def test_reupload_is_served_from_stored_summary(reuse_client):
+    """Test that the LLM is only called again when the parameters differ."""
+    assert summarize(reuse_client, "original001").status_code == 200
+    response = summarize(reuse_client, "reupload001")
+
+    assert response.status_code == 200
+    assert response.json()["summary"] == "Convolutional networks detect edges."
+    assert reuse_client.openai_service.summarize_text.call_count == 1
+    # The reused summary is part of the user's history as well
+    assert len(reuse_client.get("/summaries").json()["items"]) == 2
+
+    assert summarize(reuse_client, "reupload001", summary_length=300).status_code == 200
+    assert reuse_client.openai_service.summarize_text.call_count == 2
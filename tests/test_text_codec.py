@@ -0,0 +1,101 @@
+"""Tests for the zstd dictionary codec of stored texts."""
+
+import random
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models.summary import Summary
+from models.text_dictionary import TextDictionary
+from repositories.summary_json_repository import SummaryJsonRepository
+from utils.text_codec import FORMAT_RAW, FORMAT_ZSTD, DatabaseDictionaryStore, FileDictionaryStore, TextCodec
+
+WORDS = ["model", "network", "training", "data", "layer", "gradient", "loss", "video", "example", "result"]
+
+
+def sample_texts(count: int, seed: int = 1):
+    """Return summaries sharing boilerplate, like the ones produced by the LLM."""
+    rng = random.Random(seed)
+    return [
+        "In this video, the speaker explains how the " + " ".join(rng.choice(WORDS) for _ in range(12))
+        + ". The key takeaway is that " + " ".join(rng.choice(WORDS) for _ in range(8))
+        + f" matters. Overall, the video gives a clear introduction ({index})."
+        for index in range(count)
+    ]
+
+
+@pytest.fixture
+def codec(tmp_path):
+    """Provide a codec on an empty dictionary store."""
+    return TextCodec(FileDictionaryStore(str(tmp_path / "dictionaries")))
+
+
+def test_round_trip_without_dictionary(codec):
+    """Test that texts survive encoding without a trained dictionary, tiny ones stored raw."""
+    text = "A summary that repeats itself. " * 20
+    blob = codec.encode(text)
+    assert blob[0] == FORMAT_ZSTD
+    assert len(blob) < len(text)
+    assert codec.decode(blob) == text
+
+    assert codec.encode("Hi")[0] == FORMAT_RAW
+    assert codec.decode(codec.encode("Hi")) == "Hi"
+    assert codec.decode(codec.encode("")) == ""
+    assert codec.decode("plain text from before the migration") == "plain text from before the migration"
+
+
+def test_dictionary_improves_ratio_and_old_blobs_stay_readable(codec):
+    """Test that a trained dictionary shrinks small texts and that retraining keeps older blobs decodable."""
+    texts = sample_texts(300)
+    text = sample_texts(1, seed=99)[0]
+    plain_blob = codec.encode(text)
+
+    first_id = codec.dictionary_store.train(texts, dict_size=4096)
+    codec._checked_at = float("-inf")
+    first_blob = codec.encode(text)
+    assert len(first_blob) < len(plain_blob)
+
+    second_id = codec.dictionary_store.train(sample_texts(300, seed=2), dict_size=2048)
+    codec._checked_at = float("-inf")
+    assert second_id != first_id
+    assert codec.dictionary_store.current_id() == second_id
+
+    # A fresh codec (another worker) reads blobs made with either dictionary
+    other = TextCodec(FileDictionaryStore(codec.dictionary_store.directory))
+    assert [other.decode(blob) for blob in (plain_blob, first_blob, codec.encode(text))] == [text] * 3
+
+
+def test_database_store_shares_dictionaries_through_the_table():
+    """Test that dictionaries trained into the table are current for, and readable by, every other store."""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    TextDictionary.__table__.create(engine)
+    session_factory = sessionmaker(bind=engine)
+    codec = TextCodec(DatabaseDictionaryStore(session_factory))
+    text = sample_texts(1, seed=99)[0]
+    assert codec.dictionary_store.current_id() is None
+
+    first_id = codec.dictionary_store.train(sample_texts(300), dict_size=4096)
+    codec._checked_at = float("-inf")
+    first_blob = codec.encode(text)
+    second_id = codec.dictionary_store.train(sample_texts(300, seed=2), dict_size=2048)
+
+    other = TextCodec(DatabaseDictionaryStore(session_factory))
+    assert other.dictionary_store.current_id() == second_id != first_id
+    assert other.decode(first_blob) == text
+    with pytest.raises(KeyError):
+        other.dictionary_store.get(12345)
+    engine.dispose()
+
+
+def test_json_summaries_are_stored_compressed(tmp_path):
+    """Test that the JSONL file of the json summary repository contains no plain summary text."""
+    repository = SummaryJsonRepository(str(tmp_path / "summaries.jsonl"))
+    text = "The lecture explains gradient descent step by step. " * 10
+    summary = repository.add(Summary(
+        user_id=1, video_id="video1", summary_length=100, used_model="gpt-4o-mini", summary=text, word_count=80,
+    ))
+
+    assert "gradient descent" not in (tmp_path / "summaries.jsonl").read_text()
+    assert repository.get(1, summary.summary_id).summary == text
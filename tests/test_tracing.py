@@ -0,0 +1,107 @@
+"""Tests for request tracing, the Server-Timing header and the OTLP/JSON export."""
+
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+from fastapi import BackgroundTasks, FastAPI
+from fastapi.testclient import TestClient
+
+from main import app
+from scripts.trace_collector import format_trace, make_handler, spans_of
+from utils import slow_requests, tracing
+from utils.slow_requests import SlowRequestLog
+from utils.tracing import TracingMiddleware, parse_traceparent, span
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+TRACEPARENT = f"00-{TRACE_ID}-00f067aa0ba902b7-01"
+
+
+def test_parse_traceparent():
+    """Test that valid W3C traceparent headers are parsed and invalid ones ignored."""
+    assert parse_traceparent(TRACEPARENT) == (TRACE_ID, "00f067aa0ba902b7", True)
+    assert parse_traceparent(f"00-{TRACE_ID}-00f067aa0ba902b7-00")[2] is False
+    assert parse_traceparent(f"00-{'0' * 32}-00f067aa0ba902b7-01") is None
+    assert parse_traceparent("garbage") is None
+    assert parse_traceparent(None) is None
+
+
+def test_summarize_reports_its_stages_in_server_timing(summarize_client):
+    """Test that the stages of /summarize are listed in Server-Timing, continuing the caller's trace."""
+    response = summarize_client.post(
+        "/summarize",
+        json={"video_url": "https://www.youtube.com/watch?v=py5byOOHZM8", "summary_length": 100,
+              "used_model": "gpt-4o-mini"},
+        headers={"traceparent": TRACEPARENT},
+    )
+
+    assert response.status_code == 200
+    entries = [entry.strip() for entry in response.headers["Server-Timing"].split(",")]
+    names = [entry.split(";")[0] for entry in entries]
+    for stage in ("admission", "extract", "transcript", "metadata", "reuse_lookup", "llm_queue", "llm", "total"):
+        assert stage in names
+    assert all(";dur=" in entry for entry in entries if not entry.startswith("traceparent"))
+    assert f'traceparent;desc="00-{TRACE_ID}-' in response.headers["Server-Timing"]
+
+
+def test_background_tasks_are_not_added_to_the_sent_trace(monkeypatch):
+    """Test that spans opened after the response was sent do not join the request's trace."""
+    log = SlowRequestLog(threshold_seconds=0, max_entries=10)
+    monkeypatch.setattr(slow_requests, "_slow_request_log", log)
+    background_spans = []
+    background_app = FastAPI()
+    background_app.add_middleware(TracingMiddleware)
+
+    def background_work():
+        with span("database.add") as background_span:
+            background_spans.append(background_span)
+
+    @background_app.post("/background-work")
+    async def endpoint(background_tasks: BackgroundTasks):
+        with span("respond"):
+            background_tasks.add_task(background_work)
+        return {}
+
+    with TestClient(background_app) as client:
+        assert client.post("/background-work").status_code == 200
+
+    assert background_spans == [None]
+    assert [stage["name"] for stage in log.entries()[0]["stages"]] == ["respond"]
+
+
+def test_traces_are_exported_as_otlp_json(monkeypatch, tmp_path):
+    """Test that with OTEL_EXPORTER_OTLP_ENDPOINT, finished traces reach the collector in OTLP/JSON."""
+    output = tmp_path / "traces.jsonl"
+    collector = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(str(output)))
+    threading.Thread(target=collector.serve_forever, daemon=True).start()
+    monkeypatch.setenv("OTEL_EXPORTER_OTLP_ENDPOINT", f"http://127.0.0.1:{collector.server_port}")
+    monkeypatch.setattr(tracing, "_exporter", None)
+    try:
+        with TestClient(app) as client:
+            client.get("/health", headers={"traceparent": TRACEPARENT})
+        deadline = time.monotonic() + 5
+        while not output.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        collector.shutdown()
+
+    spans = spans_of(json.loads(output.read_text().splitlines()[0]))
+    assert [(span["name"], span["traceId"], span["parentSpanId"]) for span in spans] == [
+        ("GET /health", TRACE_ID, "00f067aa0ba902b7")
+    ]
+    assert spans[0]["kind"] == tracing.SPAN_KIND_SERVER
+    assert int(spans[0]["endTimeUnixNano"]) >= int(spans[0]["startTimeUnixNano"])
+
+
+def test_collector_prints_children_under_their_parent():
+    """Test the waterfall of the local collector."""
+    spans = [
+        {"spanId": "a", "name": "POST /summarize", "startTimeUnixNano": "0", "endTimeUnixNano": "9000000"},
+        {"spanId": "b", "parentSpanId": "a", "name": "llm", "startTimeUnixNano": "2000000",
+         "endTimeUnixNano": "8000000", "status": {"code": 2, "message": "DeadlineExceededError: llm"}},
+    ]
+    assert format_trace(spans) == [
+        "      0.0ms       9.0ms  POST /summarize",
+        "      2.0ms       6.0ms    llm  [DeadlineExceededError: llm]",
+    ]
@@ -0,0 +1,88 @@
+"""Tests for the per-worker user cache and its invalidation."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from repositories.repository_interfaces import IUserRepository
+from repositories.user_cached_repository import CachedUserRepository
+from tests.conftest import make_user
+from utils import db_routing
+from utils.db_routing import RecentWrites
+from utils.user_cache import UserCache, handle_user_change, user_change_payload
+
+
+@pytest.fixture
+def cache():
+    """Provide an empty cache."""
+    return UserCache(ttl_seconds=60)
+
+
+def test_lookups_by_name_email_and_id(cache):
+    """Test that a cached user is found by every key and handed out as a copy."""
+    cache.put(make_user("alice", user_id=1))
+
+    assert cache.get("user_name", "alice").user_id == 1
+    assert cache.get("email", "alice@example.com").user_id == 1
+    user = cache.get("user_id", 1)
+    user.email = "changed@example.com"
+    assert cache.get("user_id", 1).email == "alice@example.com"
+    assert cache.get("user_name", "bob") is None
+
+
+def test_invalidate_drops_all_keys_of_renamed_user(cache):
+    """Test that invalidating by id also removes the old name and email keys."""
+    cache.put(make_user("alice", user_id=1))
+    cache.invalidate(user_id=1, user_name="alicia", email="alicia@example.com")
+
+    assert cache.get("user_name", "alice") is None
+    assert cache.get("email", "alice@example.com") is None
+
+
+def test_entries_expire_and_are_evicted():
+    """Test the TTL and the LRU size limit."""
+    expired = UserCache(ttl_seconds=0)
+    expired.put(make_user("alice", user_id=1))
+    assert expired.get("user_id", 1) is None
+
+    small = UserCache(ttl_seconds=60, max_entries=1)
+    small.put(make_user("alice", user_id=1))
+    small.put(make_user("bob", user_id=2))
+    assert small.get("user_name", "alice") is None
+    assert small.get("user_name", "bob") is not None
+
+
+def test_put_skipped_after_concurrent_invalidation(cache):
+    """Test that a user read before an invalidation is not cached."""
+    generation = cache.generation
+    cache.invalidate(user_id=1)
+    cache.put(make_user("alice", user_id=1), generation)
+    assert cache.get("user_id", 1) is None
+
+
+def test_notification_invalidates_and_pins_to_primary(monkeypatch, cache):
+    """Test that a user_changes payload drops the user and routes its next read to the primary."""
+    monkeypatch.setattr(db_routing, "recent_writes", RecentWrites())
+    cache.put(make_user("alice", user_id=1))
+
+    handle_user_change(cache, user_change_payload(make_user("alice", user_id=1)))
+
+    assert cache.get("user_name", "alice") is None
+    assert db_routing.recently_written(("user_name", "alice"))
+
+
+def test_cached_repository_reads_through_once(cache):
+    """Test that repeated lookups hit the wrapped repository once and writes invalidate."""
+    inner = MagicMock(spec=IUserRepository)
+    inner.get_by_identifier.return_value = make_user("alice", user_id=1)
+    repository = CachedUserRepository(inner, cache)
+
+    assert repository.get_by_identifier("alice").user_id == 1
+    assert repository.get_by_identifier("alice").user_id == 1
+    assert repository.get_by_id(1).user_name == "alice"
+    inner.get_by_identifier.assert_called_once_with("alice")
+    inner.get_by_id.assert_not_called()
+
+    repository.update(make_user("alice", user_id=1))
+    repository.get_by_identifier("alice")
+    assert inner.get_by_identifier.call_count == 2
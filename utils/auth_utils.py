@@ -7,18 +7,19 @@ and jose for JWT operations.
 
 from datetime import datetime, timedelta
 import logging
-import os
 from typing import Optional
 
 import bcrypt
-from dotenv import load_dotenv
-from jose import jwt
+
+from utils.lazy_import import LazyImport
+from utils.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
-load_dotenv()
+# jose (and the cryptography backend it loads) is imported when the first token is created or verified
+jwt = LazyImport("jose.jwt")
 
-DEFAULT_SECRET_KEY = os.getenv("SECRET_KEY")
+DEFAULT_SECRET_KEY = get_settings().secret_key
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 12 * 60  # 12 hours
 
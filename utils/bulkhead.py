@@ -0,0 +1,173 @@
+"""Bulkheads: a bounded thread pool per upstream dependency.
+
+Blocking calls used to share the default thread pool, so one slow dependency (a YouTube slowdown,
+say) could take every thread and starve logins and health checks. Each dependency now runs on
+its own pool with its own queue limit; when both are full, further calls fail fast with
+BulkheadFullError (503) instead of queueing behind the slow dependency.
+
+The pools are sized per worker process from the environment, BULKHEAD_<NAME>_WORKERS and
+BULKHEAD_<NAME>_QUEUE (e.g. BULKHEAD_OPENAI_WORKERS), defaulting to DEFAULT_BULKHEAD_SIZES.
+Context variables (e.g. the request deadline, see utils.deadline) are copied into the thread.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Tuple, TypeVar
+
+from utils.metrics import (
+    BULKHEAD_ACTIVE, BULKHEAD_QUEUE_WAIT_SECONDS, BULKHEAD_QUEUED, BULKHEAD_REJECTIONS, STAGE_DURATION_SECONDS
+)
+from utils.server_utils import available_cpus
+from utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+YOUTUBE_TRANSCRIPT = "youtube_transcript"
+YOUTUBE_DATA = "youtube_data"
+OPENAI = "openai"
+BCRYPT = "bcrypt"
+DATABASE = "database"
+
+# (threads, calls allowed to wait for a thread) per bulkhead
+DEFAULT_BULKHEAD_SIZES: Dict[str, Tuple[int, int]] = {
+    YOUTUBE_TRANSCRIPT: (8, 32),
+    YOUTUBE_DATA: (8, 32),
+    OPENAI: (8, 32),
+    # bcrypt is CPU-bound: more threads than CPUs only adds latency to every login
+    BCRYPT: (available_cpus(), 64),
+    # DB_POOL_SIZE + DB_MAX_OVERFLOW: more threads would only wait for a connection
+    DATABASE: (15, 128),
+}
+
+_bulkheads: Dict[str, "Bulkhead"] = {}
+_bulkheads_lock = threading.Lock()
+
+
+class BulkheadFullError(Exception):
+    """Raised when a bulkhead's threads and queue are all taken; it should be answered with 503."""
+
+    def __init__(self, name: str):
+        """Initialize the error.
+
+        Args:
+            name: The saturated bulkhead.
+        """
+        super().__init__(f"Too many pending {name} calls")
+        self.name = name
+
+
+class Bulkhead:
+    """A thread pool of max_workers threads that lets at most max_queue more calls wait."""
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        """Initialize the bulkhead.
+
+        Args:
+            name: The dependency, used as the label of the metrics and in thread names.
+            max_workers: Calls run at once.
+            max_queue: Calls allowed to wait for a thread.
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"bulkhead-{name}")
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queued = 0
+
+    @property
+    def active(self) -> int:
+        """The number of calls running."""
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        """The number of calls waiting for a thread."""
+        return self._queued
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking function on the bulkhead's threads.
+
+        Cancelling the call before it has started takes it off the queue.
+
+        Returns: The function's result.
+        Raises: BulkheadFullError if all threads are busy and max_queue calls are waiting.
+        """
+        with self._lock:
+            if self._active + self._queued >= self.max_workers + self.max_queue:
+                BULKHEAD_REJECTIONS.labels(bulkhead=self.name).inc()
+                logger.warning(f"Bulkhead {self.name} is full: {self._active} running, {self._queued} queued")
+                raise BulkheadFullError(self.name)
+            self._queued += 1
+        self._update_gauges()
+
+        call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+        submitted_at = time.monotonic()
+
+        def run_call() -> T:
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+            self._update_gauges()
+            BULKHEAD_QUEUE_WAIT_SECONDS.labels(bulkhead=self.name).observe(time.monotonic() - submitted_at)
+            try:
+                return call()
+            finally:
+                with self._lock:
+                    self._active -= 1
+                self._update_gauges()
+
+        future = self._executor.submit(run_call)
+        future.add_done_callback(self._forget_if_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def _forget_if_cancelled(self, future: Future) -> None:
+        """Take a call that was cancelled before it started off the queue count."""
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+            self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        BULKHEAD_ACTIVE.labels(bulkhead=self.name).set(self._active)
+        BULKHEAD_QUEUED.labels(bulkhead=self.name).set(self._queued)
+
+
+def get_bulkhead(name: str) -> Bulkhead:
+    """Return the worker's bulkhead for a dependency, creating it on first use.
+
+    Args:
+        name: One of the names in DEFAULT_BULKHEAD_SIZES, or another dependency (sized 8 and 32 by default).
+    """
+    bulkhead = _bulkheads.get(name)
+    if bulkhead is None:
+        with _bulkheads_lock:
+            bulkhead = _bulkheads.get(name)
+            if bulkhead is None:
+                default_workers, default_queue = DEFAULT_BULKHEAD_SIZES.get(name, (8, 32))
+                bulkhead = _bulkheads[name] = Bulkhead(
+                    name,
+                    max_workers=int(os.getenv(f"BULKHEAD_{name.upper()}_WORKERS", default_workers)),
+                    max_queue=int(os.getenv(f"BULKHEAD_{name.upper()}_QUEUE", default_queue)),
+                )
+    return bulkhead
+
+
+async def run_in_bulkhead(name: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking function on the named bulkhead (like run_in_threadpool, on the dependency's own pool).
+
+    The call, including the wait for a thread, is timed as the request stage of the same name and
+    traced as <name>.<function>, e.g. database.list_for_user.
+
+    Raises: BulkheadFullError if the bulkhead is saturated.
+    """
+    with span(f"{name}.{getattr(func, '__name__', 'call')}"), STAGE_DURATION_SECONDS.labels(stage=name).time():
+        return await get_bulkhead(name).run(func, *args, **kwargs)
@@ -0,0 +1,127 @@
+"""Connection pool configuration and instrumentation for the SQLAlchemy engines.
+
+Pool sizing, pre-ping, recycling and the statement timeout are read from the environment:
+- DB_POOL_SIZE: connections kept open per worker (default 5)
+- DB_MAX_OVERFLOW: extra connections allowed under load (default 10)
+- DB_POOL_TIMEOUT: seconds to wait for a free connection before failing (default 30)
+- DB_POOL_RECYCLE: seconds after which a connection is replaced (default 1800)
+- DB_POOL_PRE_PING: test connections on checkout (default true)
+- DB_STATEMENT_TIMEOUT_MS: server-side limit for every statement, 0 disables it (default 10000)
+
+Checked-out connections, overflow, checkout wait time, timeouts and invalidations are exported
+as Prometheus metrics labelled with the pool name.
+"""
+
+import os
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from utils.metrics import (
+    DB_POOL_CHECKED_OUT, DB_POOL_CHECKOUT_WAIT_SECONDS, DB_POOL_INVALIDATIONS, DB_POOL_OVERFLOW, DB_POOL_SIZE,
+    DB_POOL_TIMEOUTS
+)
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_MAX_OVERFLOW = 10
+DEFAULT_POOL_TIMEOUT = 30.0
+DEFAULT_POOL_RECYCLE = 1800
+DEFAULT_STATEMENT_TIMEOUT_MS = 10000
+
+
+class _InstrumentedPoolMixin:
+    """Times every checkout (waiting for a free slot, connecting, pre-ping) and counts pool timeouts."""
+
+    metrics_name = "default"
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            DB_POOL_TIMEOUTS.labels(pool=self.metrics_name).inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT_SECONDS.labels(pool=self.metrics_name).observe(time.perf_counter() - start)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics_name = self.metrics_name
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """QueuePool exporting checkout metrics."""
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool exporting checkout metrics."""
+
+
+def pool_options_from_env(async_engine: bool = False) -> Dict[str, Any]:
+    """Return create_engine keyword arguments for the pool, read from the environment.
+
+    Args:
+        async_engine: Build options for create_async_engine instead of create_engine.
+    Returns: Keyword arguments for create_engine/create_async_engine.
+    """
+    return {
+        "poolclass": InstrumentedAsyncAdaptedQueuePool if async_engine else InstrumentedQueuePool,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", DEFAULT_POOL_SIZE)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", DEFAULT_MAX_OVERFLOW)),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", DEFAULT_POOL_TIMEOUT)),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", DEFAULT_POOL_RECYCLE)),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+    }
+
+
+def statement_timeout_connect_args(database_url: str) -> Dict[str, Any]:
+    """Return connect_args that make Postgres cancel any statement running longer than DB_STATEMENT_TIMEOUT_MS.
+
+    The timeout is set once per connection, so it costs no extra round trip per request.
+
+    Args:
+        database_url: The (sync or async) database URL the engine is created for.
+    Returns: connect_args for the URL's driver, empty for non-Postgres databases or a disabled timeout.
+    """
+    timeout_ms = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", DEFAULT_STATEMENT_TIMEOUT_MS))
+    url = make_url(database_url)
+    if timeout_ms <= 0 or url.get_backend_name() != "postgresql":
+        return {}
+    if url.get_driver_name() == "asyncpg":
+        return {"server_settings": {"statement_timeout": str(timeout_ms)}}
+    return {"options": f"-c statement_timeout={timeout_ms}"}
+
+
+def instrument_engine(engine: Engine, pool_name: str) -> None:
+    """Label the engine's pool for metrics and track checked-out connections, overflow and invalidations.
+
+    Args:
+        engine: The (sync) engine; pass async_engine.sync_engine for async engines.
+        pool_name: Value of the "pool" metrics label.
+    """
+    pool = engine.pool
+    pool.metrics_name = pool_name
+    if hasattr(pool, "size"):
+        DB_POOL_SIZE.labels(pool=pool_name).set(pool.size())
+
+    def _on_checkout(*_args):
+        DB_POOL_CHECKED_OUT.labels(pool=pool_name).inc()
+        current_pool = engine.pool
+        if hasattr(current_pool, "overflow"):
+            DB_POOL_OVERFLOW.labels(pool=pool_name).set(max(current_pool.overflow(), 0))
+
+    def _on_checkin(*_args):
+        # The checkin event fires before the pool's own counters are updated, so track the count here
+        DB_POOL_CHECKED_OUT.labels(pool=pool_name).dec()
+
+    def _count_invalidation(*_args):
+        DB_POOL_INVALIDATIONS.labels(pool=pool_name).inc()
+
+    event.listen(engine, "checkout", _on_checkout)
+    event.listen(engine, "checkin", _on_checkin)
+    event.listen(engine, "invalidate", _count_invalidation)
+    event.listen(engine, "soft_invalidate", _count_invalidation)
@@ -0,0 +1,188 @@
+"""Read/write routing between the Postgres primary and read replicas.
+
+When DATABASE_REPLICA_URLS is set, sessions are created as RoutingSession: plain SELECTs go to a
+replica, everything else (flushes, INSERT/UPDATE/DELETE, raw SQL) goes to the primary. A replica is
+only used while its replication lag is within DB_REPLICA_MAX_STALENESS_SECONDS. Lag is measured by
+a background thread, so no request pays for the check.
+
+Read-after-write consistency is handled in two ways:
+- Keys (user names, emails, ids) written by this worker are read from the primary for the length
+  of the staleness budget (see mark_written / recently_written).
+- Repositories retry lookups that miss on a replica against the primary, which covers writes made
+  by other workers (e.g. logging in right after registering).
+"""
+
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Hashable, Iterator, List, Optional
+
+from sqlalchemy import Select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_STALENESS_SECONDS = 5.0
+LAG_CHECK_INTERVAL_SECONDS = 2.0
+
+# Zero when the replica has replayed everything it received, otherwise the age of the last replayed transaction
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class RecentWrites:
+    """Remembers recently written keys so reads for them can go to the primary."""
+
+    def __init__(self, ttl_seconds: float = DEFAULT_MAX_STALENESS_SECONDS):
+        """Initialize the tracker.
+
+        Args:
+            ttl_seconds: How long a written key is pinned to the primary.
+        """
+        self.ttl_seconds = ttl_seconds
+        self._written_at: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, *keys: Hashable) -> None:
+        """Record that keys were just written (None keys are ignored)."""
+        now = time.monotonic()
+        with self._lock:
+            if len(self._written_at) > 10000:
+                self._written_at = {
+                    key: written_at for key, written_at in self._written_at.items()
+                    if now - written_at < self.ttl_seconds
+                }
+            for key in keys:
+                if key is not None:
+                    self._written_at[key] = now
+
+    def contains(self, key: Hashable) -> bool:
+        """Return True if key was written within the TTL."""
+        written_at = self._written_at.get(key)
+        return written_at is not None and time.monotonic() - written_at < self.ttl_seconds
+
+
+recent_writes = RecentWrites()
+
+
+def mark_written(*keys: Hashable) -> None:
+    """Pin keys to the primary for the staleness budget after a write."""
+    recent_writes.mark(*keys)
+
+
+def recently_written(key: Hashable) -> bool:
+    """Return True if key was written by this worker within the staleness budget."""
+    return recent_writes.contains(key)
+
+
+class ReplicaRouter:
+    """Chooses the engine for reads among replicas whose lag is within the staleness budget."""
+
+    def __init__(
+        self,
+        primary: Engine,
+        replicas: List[Engine],
+        max_staleness_seconds: float = DEFAULT_MAX_STALENESS_SECONDS,
+        async_primary: Optional[Engine] = None,
+        async_replicas: Optional[List[Engine]] = None,
+    ):
+        """Initialize the router.
+
+        Args:
+            primary: Engine for the primary.
+            replicas: Engines for the replicas.
+            max_staleness_seconds: Maximum replication lag for a replica to receive reads.
+            async_primary: sync_engine of the async primary engine, for async sessions.
+            async_replicas: sync_engines of the async replica engines, in the same order as replicas.
+        """
+        self.primary = primary
+        self.replicas = replicas
+        self.max_staleness_seconds = max_staleness_seconds
+        self.async_primary = async_primary
+        self.async_replicas = async_replicas or []
+        self._healthy: List[bool] = [True] * len(replicas)
+        self._round_robin = itertools.count()
+        self._monitor: Optional[threading.Thread] = None
+
+    def start_monitor(self) -> None:
+        """Start the background thread that measures replica lag."""
+        if self._monitor is None:
+            self._monitor = threading.Thread(target=self._monitor_lag, name="replica-lag-monitor", daemon=True)
+            self._monitor.start()
+
+    def _monitor_lag(self) -> None:
+        while True:
+            self.check_lag()
+            time.sleep(LAG_CHECK_INTERVAL_SECONDS)
+
+    def check_lag(self) -> None:
+        """Measure every replica's lag and mark it healthy if within the staleness budget."""
+        for index, replica in enumerate(self.replicas):
+            try:
+                with replica.connect() as connection:
+                    lag = float(connection.execute(REPLICA_LAG_QUERY).scalar() or 0)
+                healthy = lag <= self.max_staleness_seconds
+            except Exception as e:
+                logger.warning(f"Replica {index} lag check failed: {str(e)}")
+                healthy = False
+            if healthy != self._healthy[index]:
+                logger.info(f"Replica {index} is now {'in' if healthy else 'out of'} rotation")
+            self._healthy[index] = healthy
+
+    def engine_for_read(self, use_async: bool = False) -> Engine:
+        """Return the next healthy replica, or the primary if none is within the staleness budget."""
+        healthy = [index for index, is_healthy in enumerate(self._healthy) if is_healthy]
+        if not healthy:
+            return self.engine_for_write(use_async)
+        index = healthy[next(self._round_robin) % len(healthy)]
+        return self.async_replicas[index] if use_async else self.replicas[index]
+
+    def engine_for_write(self, use_async: bool = False) -> Engine:
+        """Return the primary."""
+        return self.async_primary if use_async else self.primary
+
+
+class RoutingSession(Session):
+    """Session sending plain SELECTs to a replica and everything else to the primary.
+
+    The router is passed through the session's info dict (sessionmaker(info={"router": ...})); for
+    AsyncSession use async_sessionmaker(sync_session_class=RoutingSession, info={"router": ..., "async": True}).
+    """
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kw: Any) -> Engine:
+        router: ReplicaRouter = self.info["router"]
+        use_async = self.info.get("async", False)
+        if self._flushing or self.info.get("use_primary") or not isinstance(clause, Select):
+            return router.engine_for_write(use_async)
+        return router.engine_for_read(use_async)
+
+
+def routes_reads_to_replicas(session: Any) -> bool:
+    """Return True if session is a RoutingSession (or a lazy proxy around one)."""
+    info = getattr(session, "info", None)
+    return isinstance(info, dict) and "router" in info
+
+
+@contextmanager
+def use_primary(session: Any, enabled: bool = True) -> Iterator[None]:
+    """Send all statements of session to the primary within the with-block.
+
+    Args:
+        session: A Session, AsyncSession or lazy proxy; sessions without routing are left alone.
+        enabled: Only pin to the primary if True, so callers can pass a condition.
+    """
+    if not enabled or not routes_reads_to_replicas(session):
+        yield
+        return
+    info = session.info
+    previous = info.get("use_primary", False)
+    info["use_primary"] = True
+    try:
+        yield
+    finally:
+        info["use_primary"] = previous
@@ -2,38 +2,203 @@
 
 import logging
 import os
-from typing import Generator
+import threading
+from typing import Any, AsyncGenerator, Callable, Generator, Optional
 
-from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 
-logger = logging.getLogger(__name__)
+from utils.db_pool import instrument_engine, pool_options_from_env, statement_timeout_connect_args
+from utils.db_routing import DEFAULT_MAX_STALENESS_SECONDS, ReplicaRouter, RoutingSession, recent_writes
+from utils.settings import get_settings
 
-load_dotenv()  # Load environment variables from .env file
+logger = logging.getLogger(__name__)
 
 # Determine if we're running in a Continuous Integration (CI) environment
-IN_CI = os.getenv("CI") == "true" or os.getenv("GITHUB_ACTIONS") == "true"
+IN_CI = get_settings().in_ci
+
+# Get the database URL from the settings (environment variables or .env file)
+DATABASE_URL = get_settings().database_url
 
-# Get the database URL from environment variables
-DATABASE_URL = os.getenv("DATABASE_URL")
+# The engines and session factories below are created on first access (see _initialize_engines), not at
+# import, so starting a worker or the test suite does not load the database drivers or open pools. They
+# stay None when running in CI or without a database.
+_ENGINE_ATTRIBUTES = ("engine", "replica_router", "SessionLocal", "async_engine", "AsyncSessionLocal")
+_engines_lock = threading.Lock()
 
-# Initialize engine and SessionLocal to None; they'll be set up if not in CI
-engine = None
-SessionLocal = None
+
+def to_async_database_url(database_url: str) -> str:
+    """Return database_url with its driver switched to the asyncpg driver.
+
+    Args:
+        database_url: A postgresql:// (or postgresql+psycopg2://) URL.
+    Returns: The same URL using postgresql+asyncpg://.
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+    return url.render_as_string(hide_password=False)
 
 logger.info(f"IN_CI={IN_CI}")
 
-if not IN_CI:
-    # Set up the database connection for non-CI environments
-    if DATABASE_URL is None:
-        raise ValueError("DATABASE_URL is not set (we are not running in the CI environment)")
+if not IN_CI and DATABASE_URL is None and get_settings().repository_type == "postgres":
+    raise ValueError("DATABASE_URL is not set (we are not running in the CI environment)")
+
+
+def _create_engines() -> dict:
+    """Create the engines and session factories for DATABASE_URL and the replicas.
+
+    Returns: The values of the module attributes in _ENGINE_ATTRIBUTES.
+    """
+    engines = dict.fromkeys(_ENGINE_ATTRIBUTES)
+    if IN_CI or DATABASE_URL is None:
+        return engines
+
+    # Create the SQLAlchemy engine with the pool configured from the environment (see utils/db_pool.py)
+    engine = create_engine(
+        DATABASE_URL, connect_args=statement_timeout_connect_args(DATABASE_URL), **pool_options_from_env()
+    )
+    instrument_engine(engine, "sync")
+
+    # Create a sessionmaker, which will be used to create database sessions. Objects are not expired on
+    # commit, so users stay readable after their session has been released (see LazySession).
+    session_factory = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+    # Async counterparts, used by the async repository so queries don't block the event loop
+    async_database_url = to_async_database_url(DATABASE_URL)
+    async_engine = create_async_engine(
+        async_database_url,
+        connect_args=statement_timeout_connect_args(async_database_url),
+        **pool_options_from_env(async_engine=True),
+    )
+    instrument_engine(async_engine.sync_engine, "async")
+    async_session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    engines.update(
+        engine=engine,
+        SessionLocal=session_factory,
+        async_engine=async_engine,
+        AsyncSessionLocal=async_session_factory,
+    )
+
+    # Optional read replicas (comma-separated URLs): plain SELECTs are routed to them (see utils/db_routing.py)
+    replica_urls = get_settings().database_replica_urls
+    if replica_urls:
+        replica_engines = []
+        async_replica_engines = []
+        for index, replica_url in enumerate(replica_urls):
+            replica_engine = create_engine(
+                replica_url, connect_args=statement_timeout_connect_args(replica_url), **pool_options_from_env()
+            )
+            instrument_engine(replica_engine, f"replica-{index}")
+            replica_engines.append(replica_engine)
+
+            async_replica_url = to_async_database_url(replica_url)
+            async_replica_engine = create_async_engine(
+                async_replica_url,
+                connect_args=statement_timeout_connect_args(async_replica_url),
+                **pool_options_from_env(async_engine=True),
+            )
+            instrument_engine(async_replica_engine.sync_engine, f"replica-{index}-async")
+            async_replica_engines.append(async_replica_engine.sync_engine)
+
+        replica_router = ReplicaRouter(
+            engine,
+            replica_engines,
+            max_staleness_seconds=float(
+                os.getenv("DB_REPLICA_MAX_STALENESS_SECONDS", DEFAULT_MAX_STALENESS_SECONDS)
+            ),
+            async_primary=async_engine.sync_engine,
+            async_replicas=async_replica_engines,
+        )
+        replica_router.start_monitor()
+        recent_writes.ttl_seconds = replica_router.max_staleness_seconds
+        engines.update(
+            replica_router=replica_router,
+            SessionLocal=sessionmaker(
+                class_=RoutingSession, autocommit=False, autoflush=False, expire_on_commit=False,
+                info={"router": replica_router},
+            ),
+            AsyncSessionLocal=async_sessionmaker(
+                sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False,
+                info={"router": replica_router, "async": True},
+            ),
+        )
+        logger.info(f"Routing reads to {len(replica_urls)} replica(s)")
+    return engines
+
+
+def _engines() -> dict:
+    """Create the engines once and publish them as module attributes.
+
+    Returns: The values of the module attributes in _ENGINE_ATTRIBUTES.
+    """
+    with _engines_lock:
+        if "SessionLocal" not in globals():
+            globals().update(_create_engines())
+        return {name: globals()[name] for name in _ENGINE_ATTRIBUTES}
+
+
+def __getattr__(name: str) -> Any:
+    """Create the engines on first access of engine, SessionLocal, etc. (PEP 562)."""
+    if name in _ENGINE_ATTRIBUTES:
+        return _engines()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-    # Create the SQLAlchemy engine
-    engine = create_engine(DATABASE_URL)
 
-    # Create a sessionmaker, which will be used to create database sessions
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+class LazySession:
+    """Session proxy that checks out a connection on first use and gives it back as soon as asked.
+
+    The underlying Session is created on first attribute access. release() closes it, which returns
+    its connection to the pool while loaded objects stay usable (detached); the next access opens a
+    fresh session. Repositories call release() after each unit of work, so a request does not hold
+    a pooled connection while it waits on something else (e.g. an LLM call).
+    """
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        """Initialize the proxy with the sessionmaker to create sessions from."""
+        self._session_factory = session_factory
+        self._session: Optional[Session] = None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._session is None:
+            self._session = self._session_factory()
+        return getattr(self._session, name)
+
+    def release(self) -> None:
+        """Close the current session (if any), returning its connection to the pool."""
+        if self._session is not None:
+            session, self._session = self._session, None
+            session.close()
+
+    def close(self) -> None:
+        """Close the current session (if any)."""
+        self.release()
+
+
+class LazyAsyncSession:
+    """Async counterpart of LazySession for AsyncSession objects."""
+
+    def __init__(self, session_factory: Callable[[], AsyncSession]):
+        """Initialize the proxy with the async_sessionmaker to create sessions from."""
+        self._session_factory = session_factory
+        self._session: Optional[AsyncSession] = None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._session is None:
+            self._session = self._session_factory()
+        return getattr(self._session, name)
+
+    async def release(self) -> None:
+        """Close the current session (if any), returning its connection to the pool."""
+        if self._session is not None:
+            session, self._session = self._session, None
+            await session.close()
+
+    async def close(self) -> None:
+        """Close the current session (if any)."""
+        await self.release()
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -43,18 +208,21 @@ def get_db() -> Generator[Session, None, None]:
     This function is a generator that yields database sessions. It handles both CI
     and non-CI environments differently:
     - In CI: It yields a mock session to avoid actual database operations.
-    - In non-CI: It yields a real database session and ensures it's closed after use.
+    - In non-CI: It yields a lazy database session and ensures it's closed after use.
 
     Yields:
-        Session: Either a mock session (in CI) or a real SQLAlchemy session.
+        Session: Either a mock session (in CI) or a LazySession wrapping a real SQLAlchemy session.
 
     Usage:
         This function is typically used with FastAPI's dependency injection system.
         It ensures that each request gets its own database session, which is then
         closed when the request is complete, regardless of whether an exception occurred.
+        The session only checks out a connection when it is first used, and repositories
+        release it as soon as their work is done rather than at the end of the request.
     """
-    if IN_CI:
-        # In CI environment, yield a mock session to avoid actual DB operations
+    session_factory = _engines()["SessionLocal"]
+    if session_factory is None:
+        # In CI environment (or without Postgres), yield a mock session to avoid actual DB operations
         class MockSession:
             def close(self):
                 # Mock close method to mimic real session behavior
@@ -62,20 +230,43 @@ def get_db() -> Generator[Session, None, None]:
 
         yield MockSession()
     else:
-        # In non-CI environment, create and yield a real database session
-        db = SessionLocal()
+        # In non-CI environment, yield a lazy database session
+        db = LazySession(session_factory)
         try:
             yield db
         finally:
             # Ensure the database session is closed after the request is processed
             db.close()
 
+
+async def get_async_db() -> AsyncGenerator[Optional[AsyncSession], None]:
+    """
+    Async counterpart of get_db, handing out (lazy) AsyncSession objects.
+
+    Yields:
+        AsyncSession: A LazyAsyncSession wrapping a real async session, or None when no database is
+            configured (e.g. in CI).
+    """
+    session_factory = _engines()["AsyncSessionLocal"]
+    if session_factory is None:
+        yield None
+    else:
+        db = LazyAsyncSession(session_factory)
+        try:
+            yield db
+        finally:
+            await db.close()
+
 # Flow of operations:
 # 1. When this module is imported, it determines if it's running in a CI environment.
-# 2. If not in CI, it sets up the database engine and session maker.
+# 2. If not in CI and DATABASE_URL is set, the database engine and session maker are set up when they are first
+#    used. DATABASE_URL is only required for the postgres repository type; json and sqlite deployments run
+#    without it.
 # 3. The get_db() function is used as a dependency in FastAPI route functions.
 # 4. When a request comes in, get_db() either:
 #    a) Yields a mock session (in CI) to avoid real DB operations, or
-#    b) Creates a new database session, yields it, and ensures it's closed after use.
-# 5. This approach allows for easy testing in CI environments while providing
+#    b) Yields a LazySession, which checks out a connection on first use and is released by the
+#       repository after each unit of work, and ensures it's closed after use.
+# 5. get_async_db() does the same for async endpoints, yielding AsyncSession objects (or None without a database).
+# 6. This approach allows for easy testing in CI environments while providing
 #    proper database sessions in production or development environments.
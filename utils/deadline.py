@@ -0,0 +1,244 @@
+"""Request deadlines, split across pipeline stages and passed to upstream calls, and cancellation on disconnect.
+
+A request's deadline comes from the X-Request-Timeout header (seconds) or REQUEST_TIMEOUT_SECONDS. It
+is kept in a context variable, which run_in_threadpool copies into the worker thread, so a service
+can read the time left for its stage (remaining_seconds) and use it as the timeout of its upstream
+call without changing its signature. The event loop side stops waiting at the same moment; the
+upstream timeout makes the thread give up as well, instead of finishing work nobody waits for.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, TypeVar
+
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+
+from utils.bulkhead import Bulkhead
+from utils.metrics import STAGE_DURATION_SECONDS, UPSTREAM_ERRORS
+from utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+REQUEST_TIMEOUT_HEADER = "X-Request-Timeout"
+DEFAULT_REQUEST_TIMEOUT_SECONDS = 60.0
+MAX_REQUEST_TIMEOUT_SECONDS = 300.0
+# Stages get at least this long, so a nearly expired deadline fails fast instead of with a 0s upstream timeout
+MIN_STAGE_SECONDS = 0.05
+
+# Absolute deadline (time.monotonic()) of the work running in this context, None if there is none
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+# Set when the client of the request running in this context has disconnected
+_disconnected: ContextVar[Optional[asyncio.Event]] = ContextVar("disconnected", default=None)
+
+
+class DeadlineExceededError(Exception):
+    """Raised when a stage did not finish before the request's deadline."""
+
+    def __init__(self, stage: str):
+        """Initialize the error.
+
+        Args:
+            stage: The pipeline stage that ran out of time.
+        """
+        super().__init__(f"Deadline exceeded during {stage}")
+        self.stage = stage
+
+
+class ClientDisconnectedError(Exception):
+    """Raised when the client disconnected before the response was ready."""
+
+    def __init__(self, stage: str):
+        """Initialize the error.
+
+        Args:
+            stage: The pipeline stage that was abandoned.
+        """
+        super().__init__(f"Client disconnected before {stage} finished")
+        self.stage = stage
+
+
+def remaining_seconds() -> Optional[float]:
+    """Return the seconds left until the current deadline (at least 0), or None without a deadline."""
+    deadline = _deadline.get()
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[Optional[float]]:
+    """Run the block with a deadline seconds from now, or the current deadline if that is earlier.
+
+    Args:
+        seconds: Time the block may take; None keeps the current deadline.
+    Yields: The seconds until the deadline of the block, None without a deadline.
+    """
+    deadline = time.monotonic() + seconds if seconds is not None else None
+    current = _deadline.get()
+    if current is not None:
+        deadline = min(deadline, current) if deadline is not None else current
+    token = _deadline.set(deadline)
+    try:
+        yield deadline - time.monotonic() if deadline is not None else None
+    finally:
+        _deadline.reset(token)
+
+
+def request_timeout_seconds(request: Request) -> float:
+    """Return the timeout the client asked for in X-Request-Timeout, else REQUEST_TIMEOUT_SECONDS.
+
+    Values are clamped to MAX_REQUEST_TIMEOUT_SECONDS; invalid values fall back to the default.
+    """
+    default = float(os.getenv("REQUEST_TIMEOUT_SECONDS", DEFAULT_REQUEST_TIMEOUT_SECONDS))
+    header = request.headers.get(REQUEST_TIMEOUT_HEADER)
+    if header is None:
+        return default
+    try:
+        seconds = float(header)
+    except ValueError:
+        logger.warning(f"Ignoring invalid {REQUEST_TIMEOUT_HEADER} header: {header!r}")
+        return default
+    return min(max(seconds, MIN_STAGE_SECONDS), MAX_REQUEST_TIMEOUT_SECONDS) if seconds > 0 else default
+
+
+async def request_deadline(request: Request) -> AsyncIterator[float]:
+    """FastAPI dependency giving the request a deadline and watching for the client to disconnect.
+
+    The deadline and the disconnect event are set in the request's context, where run_stage and
+    the services it calls find them. The request body must be read before (FastAPI reads it before
+    resolving dependencies).
+
+    Yields: The seconds the request may take.
+    """
+    seconds = request_timeout_seconds(request)
+    _deadline.set(time.monotonic() + seconds)
+    disconnected = asyncio.Event()
+    _disconnected.set(disconnected)
+    watcher = asyncio.ensure_future(_watch_disconnect(request, disconnected))
+    try:
+        yield seconds
+    finally:
+        watcher.cancel()
+
+
+async def _watch_disconnect(request: Request, disconnected: asyncio.Event) -> None:
+    """Set disconnected once the client has gone away."""
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            disconnected.set()
+            return
+
+
+class _StageCall:
+    """A blocking call of a stage that reports on the event loop, exactly once, that it is over.
+
+    A call abandoned by its stage keeps running in its thread; resources it holds (an LLM scheduler
+    slot, say) must stay taken until the thread returns, not until the stage gives up.
+    """
+
+    def __init__(self, func: Callable[..., Any], on_finished: Optional[Callable[[], None]]):
+        """Initialize the call; must be created on the event loop.
+
+        Args:
+            func: The blocking function.
+            on_finished: Called on the event loop once the call is over, if given.
+        """
+        self._func = func
+        self._on_finished = on_finished
+        self._loop = asyncio.get_running_loop()
+        self._lock = threading.Lock()
+        self._state = "pending"
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        """Run the function in the worker thread, unless the stage was given up before it started."""
+        with self._lock:
+            if self._state != "pending":
+                return None
+            self._state = "running"
+        try:
+            return self._func(*args, **kwargs)
+        finally:
+            if self._on_finished is not None:
+                try:
+                    self._loop.call_soon_threadsafe(self._on_finished)
+                except RuntimeError:
+                    pass  # The event loop is closed: nobody is left to notify
+
+    def abandon(self) -> None:
+        """Give up on the call on the event loop; finish at once if it has not started, else when it returns."""
+        with self._lock:
+            if self._state != "pending":
+                return
+            self._state = "abandoned"
+        if self._on_finished is not None:
+            self._on_finished()
+
+
+async def run_stage(
+    stage: str,
+    share: float,
+    func: Callable[..., T],
+    *args: Any,
+    bulkhead: Optional[Bulkhead] = None,
+    on_finished: Optional[Callable[[], None]] = None,
+    **kwargs: Any,
+) -> T:
+    """Run a blocking upstream call in a thread with a share of the time left.
+
+    The call is abandoned when the stage's time is up or the client disconnects; the thread stops at
+    its upstream timeout (see remaining_seconds).
+
+    Args:
+        stage: Name of the stage, for errors and logs.
+        share: Fraction of the remaining time the stage may use (1 for the last stage).
+        func: The blocking function; it can read its own timeout with remaining_seconds().
+        bulkhead: The upstream's thread pool (see utils.bulkhead); the default thread pool if None.
+        on_finished: Called once on the event loop when the call is over: when its thread returns,
+            which may be after the stage was abandoned, or at once if it never started.
+    Returns: The function's result.
+    Raises: DeadlineExceededError if the stage did not finish in time, ClientDisconnectedError if the
+        client went away, BulkheadFullError if the bulkhead is saturated.
+    """
+    stage_call = _StageCall(func, on_finished)
+    try:
+        disconnected = _disconnected.get()
+        if disconnected is not None and disconnected.is_set():
+            raise ClientDisconnectedError(stage)
+        remaining = remaining_seconds()
+        if remaining is not None and remaining < MIN_STAGE_SECONDS:
+            raise DeadlineExceededError(stage)
+
+        stage_seconds = max(remaining * share, MIN_STAGE_SECONDS) if remaining is not None else None
+        with span(stage), STAGE_DURATION_SECONDS.labels(stage=stage).time(), deadline_scope(stage_seconds) as seconds:
+            call = (
+                bulkhead.run(stage_call, *args, **kwargs) if bulkhead is not None
+                else run_in_threadpool(stage_call, *args, **kwargs)
+            )
+            work = asyncio.ensure_future(call)
+            waiters = {work}
+            if disconnected is not None:
+                waiters.add(asyncio.ensure_future(disconnected.wait()))
+            try:
+                await asyncio.wait(waiters, timeout=seconds, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.cancel()
+            if not work.cancelled() and work.done():
+                return work.result()
+
+        if disconnected is not None and disconnected.is_set():
+            logger.info(f"Client disconnected during {stage}, abandoned the upstream call")
+            raise ClientDisconnectedError(stage)
+        logger.warning(f"Deadline exceeded during {stage} after {seconds:.1f}s")
+        UPSTREAM_ERRORS.labels(dependency=bulkhead.name if bulkhead is not None else stage, error="timeout").inc()
+        raise DeadlineExceededError(stage)
+    finally:
+        stage_call.abandon()
@@ -0,0 +1,141 @@
+"""File utilities for safe concurrent access from several worker processes.
+
+Provides an advisory inter-process file lock, an atomic whole-file write
+(write to a temporary file, fsync, rename over the target) and helpers for
+append-only JSONL files that several processes read incrementally.
+"""
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+FileSignature = Tuple[int, int, int]
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def file_lock(lock_path: str, shared: bool = False) -> Iterator[None]:
+    """Hold an advisory OS lock on lock_path for the duration of the with-block.
+
+    Args:
+        lock_path: Path of the lock file (created if missing).
+        shared: Take a shared (reader) lock instead of an exclusive one. Windows only supports
+            exclusive locks, so shared locks are exclusive there.
+    """
+    with open(lock_path, "a+") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def atomic_write_text(path: str, content: str) -> None:
+    """Replace the file at path with content so readers see either the old or the new file, never a mix.
+
+    Args:
+        path: Target file path.
+        content: Full new file content.
+    """
+    _atomic_write(path, content, "w")
+
+
+def atomic_write_bytes(path: str, content: bytes) -> None:
+    """Like atomic_write_text, for binary content."""
+    _atomic_write(path, content, "wb")
+
+
+def _atomic_write(path: str, content: Union[str, bytes], mode: str) -> None:
+    """Write content to a temporary file next to path, fsync it and rename it over path."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as temp_file:
+            temp_file.write(content)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def read_signature(path: str) -> Optional[FileSignature]:
+    """Return (mtime, size, inode) of path, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def read_jsonl(path: str, offset: int) -> Tuple[List[Dict], int]:
+    """Read complete JSONL records starting at offset.
+
+    A trailing line without newline is a write in progress (or torn by a crash) and is not consumed.
+
+    Returns: The records and the offset just past the last complete record.
+    """
+    records, end = read_jsonl_with_offsets(path, offset)
+    return [record for _, record in records], end
+
+
+def read_jsonl_with_offsets(path: str, offset: int) -> Tuple[List[Tuple[int, Dict]], int]:
+    """Like read_jsonl, but return each record together with the offset of its line (for read_jsonl_record)."""
+    if not os.path.exists(path):
+        return [], 0
+    with open(path, "rb") as file:
+        file.seek(offset)
+        data = file.read()
+    end = data.rfind(b"\n") + 1
+    records = []
+    position = 0
+    for line in data[:end].splitlines(keepends=True):
+        if line.strip():
+            records.append((offset + position, json.loads(line)))
+        position += len(line)
+    return records, offset + end
+
+
+def read_jsonl_record(path: str, offset: int) -> Dict:
+    """Read the single JSONL record whose line starts at offset."""
+    with open(path, "rb") as file:
+        file.seek(offset)
+        return json.loads(file.readline())
+
+
+def append_jsonl(path: str, records: List[Dict], offset: int) -> int:
+    """Append records to a JSONL file and fsync it (caller holds the exclusive file lock).
+
+    Anything past offset is a record torn by a crashed writer and is dropped first.
+
+    Args:
+        path: The JSONL file.
+        records: The records to append.
+        offset: End of the last complete record known to the caller.
+    Returns: The offset just past the appended records.
+    """
+    data = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+    with open(path, "ab") as file:
+        if file.tell() > offset:
+            file.truncate(offset)
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    return offset + len(data)
@@ -0,0 +1,133 @@
+"""In-memory inverted index with BM25 ranking and highlighted snippets.
+
+Used for full-text search when there is no Postgres (json and sqlite deployments). Only the
+posting lists of the query terms are visited, so a query costs time proportional to the number of
+matching documents rather than to the size of the corpus.
+"""
+
+import heapq
+import math
+import re
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Words too common to be worth indexing (the same idea as Postgres' english stop word list)
+STOP_WORDS = frozenset(
+    "a an and are as at be but by for from has have he i in is it its of on or she so that the their them "
+    "there they this to was we were what when which who will with you your".split()
+)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+SNIPPET_WORDS = 30
+# Characters of a document scanned for a snippet: starting a little before the first match, so a long
+# transcript costs no more than a short one
+HIGHLIGHT_MAX_CHARS = 10_000
+HIGHLIGHT_LEAD_CHARS = 200
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase index terms, dropping stop words."""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def highlight(text: str, terms: Set[str], max_words: int = SNIPPET_WORDS, max_chars: int = HIGHLIGHT_MAX_CHARS) -> str:
+    """Return the window of max_words words of text with the most query terms, matches wrapped in <b></b>.
+
+    Only max_chars characters of text are scanned, from shortly before the first match. The markup
+    matches the default of Postgres' ts_headline, so clients see the same format for both backends.
+    """
+    region_start = 0
+    if len(text) > max_chars and terms:
+        first = re.search(r"(?<!\w)(?:" + "|".join(map(re.escape, terms)) + r")(?!\w)", text, re.IGNORECASE)
+        if first is not None and first.start() > HIGHLIGHT_LEAD_CHARS:
+            region_start = first.start() - HIGHLIGHT_LEAD_CHARS
+    region_end = region_start + max_chars
+    words = list(TOKEN_PATTERN.finditer(text, region_start, min(region_end, len(text))))
+    if words and region_start > 0 and words[0].start() == region_start:
+        words = words[1:]  # probably the end of a word cut off by the region
+    if words and region_end < len(text) and words[-1].end() == region_end:
+        words = words[:-1]
+    if not words:
+        return ""
+    hits = [index for index, word in enumerate(words) if word.group().lower() in terms]
+    start = 0
+    if hits:
+        # Start the window at the hit that has the most other hits within max_words after it (two pointers)
+        best_count, end = 0, 0
+        for position, first_hit in enumerate(hits):
+            while end < len(hits) and hits[end] < first_hit + max_words:
+                end += 1
+            if end - position > best_count:
+                best_count, start = end - position, first_hit
+        start = max(0, min(start - 3, len(words) - max_words))
+    window = words[start:start + max_words]
+    parts = []
+    position = window[0].start()
+    for word in window:
+        parts.append(text[position:word.start()])
+        parts.append(f"<b>{word.group()}</b>" if word.group().lower() in terms else word.group())
+        position = word.end()
+    snippet = "".join(parts).strip()
+    prefix = "... " if start > 0 or region_start > 0 else ""
+    suffix = " ..." if start + max_words < len(words) or region_end < len(text) else ""
+    return prefix + snippet + suffix
+
+
+class InvertedIndex:
+    """Posting lists (term -> {document number: term frequency}) with BM25 scoring.
+
+    Documents are numbered in the order they are added; callers keep whatever they need per number.
+    """
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._lengths: List[int] = []
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, text: str) -> int:
+        """Index text as a new document.
+
+        Returns: The document number.
+        """
+        doc = len(self._lengths)
+        tokens = tokenize(text)
+        for token in tokens:
+            postings = self._postings.setdefault(token, {})
+            postings[doc] = postings.get(doc, 0) + 1
+        self._lengths.append(len(tokens))
+        self._total_length += len(tokens)
+        return doc
+
+    def search(
+        self, query: str, limit: int, accept: Optional[Callable[[int], bool]] = None
+    ) -> List[Tuple[int, float]]:
+        """Return the limit best (document number, BM25 score) pairs for query, best first.
+
+        Args:
+            query: Free text; a document matches if it contains any of the query terms.
+            limit: Maximum number of results.
+            accept: Optional filter on document numbers (e.g. documents visible to the user).
+        """
+        terms = set(tokenize(query))
+        if not terms or not self._lengths:
+            return []
+        document_count = len(self._lengths)
+        average_length = self._total_length / document_count
+        scores: Dict[int, float] = {}
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc, frequency in postings.items():
+                if accept is not None and not accept(doc):
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[doc] / average_length)
+                scores[doc] = scores.get(doc, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
@@ -0,0 +1,45 @@
+"""Lazy stand-ins for objects of heavy SDKs, imported on first use instead of at startup.
+
+The OpenAI, Google API and YouTube transcript SDKs take a noticeable part of the time to import
+main, but are only needed once a video is summarized. A module binds the name to a LazyImport,
+so the name stays a module attribute (and can be patched in tests) while the import is deferred.
+"""
+
+import importlib
+import threading
+from typing import Any, Optional
+
+
+class LazyImport:
+    """Proxy for a module, or an attribute of a module, that imports it on first use."""
+
+    def __init__(self, module_name: str, attribute: Optional[str] = None):
+        """Initialize the proxy.
+
+        Args:
+            module_name: The module to import.
+            attribute: The name of the object in the module; None to stand in for the module itself.
+        """
+        self._module_name = module_name
+        self._attribute = attribute
+        self._target: Any = None
+        self._lock = threading.Lock()
+
+    def resolve(self) -> Any:
+        """Import and return the real object."""
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    target = importlib.import_module(self._module_name)
+                    self._target = getattr(target, self._attribute) if self._attribute else target
+        return self._target
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.resolve(), name)
+
+    def __call__(self, *args, **kwargs) -> Any:
+        return self.resolve()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        name = f"{self._module_name}.{self._attribute}" if self._attribute else self._module_name
+        return f"<LazyImport {name}{' (loaded)' if self._target is not None else ''}>"
@@ -0,0 +1,220 @@
+"""Prometheus metrics shared across the application.
+
+All metric objects are defined here so that every module records into the same
+registry and metric names stay consistent.
+
+With several worker processes (main.py --prod), PROMETHEUS_MULTIPROC_DIR points every worker at
+a shared directory of metric files, and GET /metrics aggregates them (see render_metrics), so a
+scrape sees the whole server whichever worker answers it.
+"""
+
+import os
+from typing import Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram
+from prometheus_client import generate_latest, multiprocess
+
+# Requests by route
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by method, route template and status code.",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_DURATION_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time to answer HTTP requests (including streamed bodies), by method and route template.",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0),
+)
+
+# Stages of a request: extract, transcript, metadata and llm of /summarize, and the calls of the
+# database and bcrypt bulkheads
+STAGE_DURATION_SECONDS = Histogram(
+    "request_stage_duration_seconds",
+    "Time spent in a stage of request processing, by stage.",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+UPSTREAM_ERRORS = Counter(
+    "upstream_errors_total",
+    "Failed calls to upstream services, by dependency and error (exception name, or timeout).",
+    ["dependency", "error"],
+)
+
+# LLM usage
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Tokens reported by the LLM API, by model and kind (prompt, completion).",
+    ["model", "kind"],
+)
+
+# Login throttling
+LOGIN_ATTEMPTS = Counter(
+    "login_attempts_total",
+    "Login attempts by outcome (success, failure, throttled).",
+    ["outcome"],
+)
+LOGIN_THROTTLED = Counter(
+    "login_throttled_total",
+    "Login attempts rejected by the throttle, by the scope that tripped.",
+    ["scope"],
+)
+
+# Database connection pools
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Configured number of persistent connections per pool.",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Connections currently checked out of the pool.",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "Connections currently open beyond the pool size.",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKOUT_WAIT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent obtaining a connection from the pool (waiting, connecting, pre-ping).",
+    ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total",
+    "Checkouts that failed because the pool was exhausted for longer than DB_POOL_TIMEOUT.",
+    ["pool"],
+)
+DB_POOL_INVALIDATIONS = Counter(
+    "db_pool_invalidations_total",
+    "Connections invalidated (e.g. failed pre-ping or disconnect errors).",
+    ["pool"],
+)
+
+# User cache
+USER_CACHE_REQUESTS = Counter(
+    "user_cache_requests_total",
+    "User cache lookups by result (hit, miss).",
+    ["result"],
+)
+USER_CACHE_INVALIDATIONS = Counter(
+    "user_cache_invalidations_total",
+    "User cache invalidations by source (local write, Postgres notification).",
+    ["source"],
+)
+
+# Summaries reused for near-duplicate transcripts
+SUMMARY_REUSE = Counter(
+    "summary_reuse_total",
+    "Summarize requests by near-duplicate lookup result (hit, miss).",
+    ["result"],
+)
+
+# Admission control of expensive endpoints
+ADMISSION_IN_FLIGHT = Gauge(
+    "admission_in_flight_requests",
+    "Requests currently admitted, by controller.",
+    ["controller"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_RESERVED = Gauge(
+    "admission_reserved_units",
+    "Capacity reserved by admitted requests (requests, or bytes for memory budgets), by controller.",
+    ["controller"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_RESERVED_PER_REQUEST = Histogram(
+    "admission_reserved_bytes_per_request",
+    "Estimated peak memory reserved by admitted requests, by memory budget.",
+    ["controller"],
+    buckets=(2**20, 4 * 2**20, 16 * 2**20, 64 * 2**20, 128 * 2**20, 256 * 2**20, 512 * 2**20, 2**30),
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queue_depth",
+    "Requests waiting for admission, by controller.",
+    ["controller"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_QUEUE_WAIT_SECONDS = Histogram(
+    "admission_queue_wait_seconds",
+    "Time admitted requests waited in the queue.",
+    ["controller"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+ADMISSION_REJECTIONS = Counter(
+    "admission_rejections_total",
+    "Requests rejected, by controller and reason (too_large, queue_full, queue_timeout).",
+    ["controller", "reason"],
+)
+PROCESS_PEAK_RSS_BYTES = Gauge(
+    "process_peak_resident_memory_bytes",
+    "Peak resident memory of the worker so far, to compare with the reserved estimates.",
+    multiprocess_mode="max",
+)
+
+# Fair scheduling of LLM calls
+LLM_SCHEDULER_IN_FLIGHT = Gauge(
+    "llm_scheduler_in_flight_calls",
+    "LLM calls currently holding a slot, by priority.",
+    ["priority"],
+    multiprocess_mode="livesum",
+)
+LLM_SCHEDULER_QUEUE_DEPTH = Gauge(
+    "llm_scheduler_queue_depth",
+    "LLM calls waiting for a slot, by priority.",
+    ["priority"],
+    multiprocess_mode="livesum",
+)
+LLM_SCHEDULER_WAIT_SECONDS = Histogram(
+    "llm_scheduler_wait_seconds",
+    "Time LLM calls waited for their turn, by priority.",
+    ["priority"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+# Bulkheads: thread pools per upstream dependency
+BULKHEAD_ACTIVE = Gauge(
+    "bulkhead_active_calls",
+    "Calls running on the bulkhead's threads, by bulkhead.",
+    ["bulkhead"],
+    multiprocess_mode="livesum",
+)
+BULKHEAD_QUEUED = Gauge(
+    "bulkhead_queued_calls",
+    "Calls waiting for one of the bulkhead's threads, by bulkhead.",
+    ["bulkhead"],
+    multiprocess_mode="livesum",
+)
+BULKHEAD_QUEUE_WAIT_SECONDS = Histogram(
+    "bulkhead_queue_wait_seconds",
+    "Time calls waited for one of the bulkhead's threads, by bulkhead.",
+    ["bulkhead"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+BULKHEAD_REJECTIONS = Counter(
+    "bulkhead_rejections_total",
+    "Calls rejected because the bulkhead's threads and queue were full, by bulkhead.",
+    ["bulkhead"],
+)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Return the metrics in the Prometheus text format and its content type, aggregated over all
+    workers when PROMETHEUS_MULTIPROC_DIR is set."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_worker_stopped() -> None:
+    """Remove this worker's live gauges (multiprocess_mode="livesum") from the shared metrics."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
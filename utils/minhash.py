@@ -0,0 +1,143 @@
+"""MinHash fingerprints of texts and an LSH index to find near-identical texts.
+
+A text is reduced to the set of its word shingles (runs of SHINGLE_WORDS words). A MinHash
+signature keeps, for each of NUM_PERMUTATIONS hash functions, the smallest hash of any shingle; the
+fraction of positions where two signatures agree estimates the Jaccard similarity of the shingle
+sets. Clips, mirrors and re-encodes of a video share almost all shingles of their transcripts.
+
+The LSH index splits signatures into LSH_BANDS bands of LSH_ROWS values. Texts that agree on a
+whole band land in the same bucket, so a lookup only compares the signature with the few texts
+sharing a bucket instead of with every stored text. With 16 bands of 8 rows, pairs with a
+similarity of 0.9 become candidates with a probability above 99.9%, pairs below 0.5 rarely do.
+"""
+
+import os
+import threading
+import zlib
+from typing import ClassVar, Dict, List, Set, Tuple
+
+import numpy as np
+
+from utils.file_utils import append_jsonl, file_lock, read_jsonl, read_signature
+
+SHINGLE_WORDS = 5
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+
+# Universal hashing (a * x + b) mod p over 32-bit shingle hashes; a < 2^31 keeps a * x + b within 64 bits
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_random = np.random.RandomState(1)
+_PERMUTATION_A = _random.randint(1, 1 << 31, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_PERMUTATION_B = _random.randint(0, 1 << 31, size=NUM_PERMUTATIONS, dtype=np.uint64)
+# Shingles hashed at once, bounding the temporary (shingles x permutations) matrix
+_CHUNK_SIZE = 4096
+
+
+def minhash(words: List[str]) -> np.ndarray:
+    """Return the MinHash signature (NUM_PERMUTATIONS uint32 values) of the word shingles of words.
+
+    Args:
+        words: The normalized words of the text (see utils.text_utils.clean_transcript_words).
+    Returns: The signature; all values are the maximum if words is empty.
+    """
+    if len(words) <= SHINGLE_WORDS:
+        shingles = {" ".join(words)} if words else set()
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    hashes = np.fromiter(
+        (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64, count=len(shingles)
+    )
+    signature = np.full(NUM_PERMUTATIONS, _MAX_HASH, dtype=np.uint64)
+    for start in range(0, len(hashes), _CHUNK_SIZE):
+        chunk = hashes[start:start + _CHUNK_SIZE, np.newaxis]
+        permuted = ((chunk * _PERMUTATION_A + _PERMUTATION_B) % _MERSENNE_PRIME) & _MAX_HASH
+        np.minimum(signature, permuted.min(axis=0), out=signature)
+    return signature.astype(np.uint32)
+
+
+def similarity(signature: np.ndarray, other: np.ndarray) -> float:
+    """Return the estimated Jaccard similarity of the texts behind two signatures."""
+    return float(np.mean(signature == other))
+
+
+class LshIndex:
+    """Signatures of texts identified by a key, in an append-only JSONL file with in-memory LSH buckets.
+
+    Writers serialize on an inter-process file lock; every process reads the lines appended since
+    its last look, like the JSON summary repository.
+    """
+
+    _shared_instances: ClassVar[Dict[str, "LshIndex"]] = {}
+    _shared_instances_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(self, file_path: str):
+        """Initialize the index.
+
+        Args:
+            file_path: Path of the JSONL file with the signatures.
+        """
+        self.file_path = file_path
+        self.lock_path = file_path + ".lock"
+        self._lock = threading.RLock()
+        self._offset = 0
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._buckets: Dict[Tuple[int, bytes], List[str]] = {}
+
+    @classmethod
+    def shared(cls, file_path: str) -> "LshIndex":
+        """Return the process-wide index for file_path."""
+        key = os.path.abspath(file_path)
+        with cls._shared_instances_lock:
+            index = cls._shared_instances.get(key)
+            if index is None:
+                index = cls(file_path)
+                cls._shared_instances[key] = index
+            return index
+
+    @staticmethod
+    def _bands(signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        """Return the bucket keys of a signature, one per band."""
+        return [(band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes()) for band in range(LSH_BANDS)]
+
+    def _refresh(self) -> None:
+        """Read the signatures appended since the last refresh (caller holds the thread lock)."""
+        signature = read_signature(self.file_path)
+        if signature is None or signature[1] == self._offset:
+            return
+        records, self._offset = read_jsonl(self.file_path, self._offset)
+        for record in records:
+            self._index(record["key"], np.array(record["signature"], dtype=np.uint32))
+
+    def _index(self, key: str, signature: np.ndarray) -> None:
+        """Add a stored signature to the buckets (caller holds the thread lock)."""
+        self._signatures[key] = signature
+        for bucket in self._bands(signature):
+            self._buckets.setdefault(bucket, []).append(key)
+
+    def add(self, key: str, signature: np.ndarray) -> bool:
+        """Store the signature of key, unless key is stored already.
+
+        Returns: True if the signature was added.
+        """
+        with self._lock, file_lock(self.lock_path):
+            self._refresh()
+            if key in self._signatures:
+                return False
+            record = {"key": key, "signature": signature.tolist()}
+            self._offset = append_jsonl(self.file_path, [record], self._offset)
+            self._index(key, signature)
+            return True
+
+    def query(self, signature: np.ndarray, threshold: float) -> List[Tuple[str, float]]:
+        """Return the keys of texts with an estimated similarity of at least threshold, most similar first."""
+        with self._lock:
+            self._refresh()
+            candidates: Set[str] = set()
+            for bucket in self._bands(signature):
+                candidates.update(self._buckets.get(bucket, ()))
+            scored = [(key, similarity(signature, self._signatures[key])) for key in candidates]
+        return sorted(
+            ((key, score) for key, score in scored if score >= threshold), key=lambda item: item[1], reverse=True
+        )
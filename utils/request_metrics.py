@@ -0,0 +1,57 @@
+"""ASGI middleware counting and timing HTTP requests per route."""
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.metrics import HTTP_REQUEST_DURATION_SECONDS, HTTP_REQUESTS
+
+
+class RequestMetricsMiddleware:
+    """Records http_requests_total and http_request_duration_seconds for every HTTP request.
+
+    Requests are labelled with the route template (e.g. /summaries/{summary_id}) rather than the
+    path, so the number of series stays bounded; paths no route matched share "unmatched". A
+    plain ASGI middleware, so streamed responses are timed to their last chunk and the endpoint
+    still receives the client's disconnect (see utils.deadline). Background tasks, which run after
+    the last chunk is sent, are not part of the duration.
+    """
+
+    def __init__(self, app: ASGIApp):
+        """Initialize the middleware with the application it wraps."""
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+        recorded = False
+
+        def record() -> None:
+            nonlocal recorded
+            recorded = True
+            # The router stores the matched route in the scope
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUESTS.labels(method=scope["method"], route=route, status=str(status_code)).inc()
+            HTTP_REQUEST_DURATION_SECONDS.labels(method=scope["method"], route=route).observe(
+                time.perf_counter() - start
+            )
+
+        async def send_and_record_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                # The client has its answer; background tasks run after this and do not count
+                record()
+
+        try:
+            await self.app(scope, receive, send_and_record_status)
+        finally:
+            # Responses that never finished (errors, disconnects) are recorded when the application returns
+            if not recorded:
+                record()
@@ -0,0 +1,89 @@
+"""Uvicorn settings for the development and production launch modes of main.py.
+
+Production mode runs one worker process per available CPU, since a single Python process uses one
+core no matter how many the container has. uvloop and httptools are used when installed (pip install
+uvicorn[standard]); otherwise uvicorn's pure-Python asyncio loop and h11 parser are used.
+
+On SIGTERM, uvicorn stops accepting connections and each worker waits up to
+GRACEFUL_SHUTDOWN_SECONDS for in-flight requests (mostly LLM calls) before it exits; the container's
+stop timeout must be longer than that.
+
+The workers write their Prometheus metrics to files in PROMETHEUS_MULTIPROC_DIR, which
+prepare_multiprocess_metrics sets up before they start (see utils/metrics.py).
+"""
+
+import glob
+import importlib.util
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+DEFAULT_HOST = "0.0.0.0"
+DEFAULT_PORT = 8000
+# Longer than the 60s idle timeout of common load balancers, so they never reuse a connection we closed
+DEFAULT_KEEP_ALIVE_SECONDS = 75
+# Pending connections the kernel queues per listening socket while all workers are busy
+DEFAULT_BACKLOG = 2048
+# Concurrent connections per worker before uvicorn answers 503 instead of queueing more work
+DEFAULT_LIMIT_CONCURRENCY = 200
+# Summaries take up to a minute or two; give them time to finish on shutdown
+DEFAULT_GRACEFUL_SHUTDOWN_SECONDS = 120
+
+
+def _installed(module_name: str) -> bool:
+    """Return True if module_name can be imported."""
+    return importlib.util.find_spec(module_name) is not None
+
+
+def available_cpus() -> int:
+    """Return the number of CPUs this process may run on (respecting container CPU affinity)."""
+    try:
+        return len(os.sched_getaffinity(0)) or 1
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def get_server_options(production: bool, workers: Optional[int] = None, reload: bool = True) -> Dict[str, Any]:
+    """Return the keyword arguments for uvicorn.run.
+
+    Args:
+        production: Use the production settings below instead of a single auto-reloading process.
+        workers: Number of worker processes in production mode (default WEB_CONCURRENCY or the CPU count).
+        reload: Auto-reload on code changes in development mode.
+    Returns: The options, including host and port (HOST and PORT environment variables).
+    """
+    options: Dict[str, Any] = {
+        "host": os.getenv("HOST", DEFAULT_HOST),
+        "port": int(os.getenv("PORT", DEFAULT_PORT)),
+    }
+    if not production:
+        options["reload"] = reload
+        return options
+
+    options.update(
+        workers=workers or int(os.getenv("WEB_CONCURRENCY", 0)) or available_cpus(),
+        loop="uvloop" if _installed("uvloop") else "asyncio",
+        http="httptools" if _installed("httptools") else "h11",
+        timeout_keep_alive=int(os.getenv("KEEP_ALIVE_SECONDS", DEFAULT_KEEP_ALIVE_SECONDS)),
+        backlog=int(os.getenv("SERVER_BACKLOG", DEFAULT_BACKLOG)),
+        limit_concurrency=int(os.getenv("LIMIT_CONCURRENCY", DEFAULT_LIMIT_CONCURRENCY)),
+        timeout_graceful_shutdown=int(os.getenv("GRACEFUL_SHUTDOWN_SECONDS", DEFAULT_GRACEFUL_SHUTDOWN_SECONDS)),
+        reload=False,
+    )
+    return options
+
+
+def prepare_multiprocess_metrics() -> str:
+    """Point the workers' Prometheus client at a shared directory, emptied of the files of earlier runs.
+
+    Must run before the workers start, as prometheus_client reads PROMETHEUS_MULTIPROC_DIR on import.
+
+    Returns: The directory (PROMETHEUS_MULTIPROC_DIR, default prometheus_multiproc in the temp directory).
+    """
+    directory = os.getenv("PROMETHEUS_MULTIPROC_DIR") or os.path.join(tempfile.gettempdir(), "prometheus_multiproc")
+    os.makedirs(directory, exist_ok=True)
+    # Counters of a previous server would be added to this one's
+    for path in glob.glob(os.path.join(directory, "*.db")):
+        os.remove(path)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = directory
+    return directory
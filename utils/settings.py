@@ -0,0 +1,47 @@
+"""Application settings, loaded once per process from the environment and the .env file.
+
+Settings that are needed at startup (database URLs, secrets, API keys) live here, so the .env
+file is parsed once instead of by every module that needs a value. Tunables read by the
+dependency providers (pool sizes, cache sizes, file paths) are still read from the environment
+where they are used.
+"""
+
+import os
+from functools import lru_cache
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from pydantic import BaseModel
+
+
+class Settings(BaseModel):
+    """Process-wide configuration."""
+
+    # Running in a Continuous Integration (CI) environment: no database, json repositories only
+    in_ci: bool = False
+    repository_type: str = "json"
+    database_url: Optional[str] = None
+    database_replica_urls: List[str] = []
+    secret_key: Optional[str] = None
+    openai_api_key: Optional[str] = None
+    youtube_api_key: Optional[str] = None
+
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """Return the settings, loading the .env file (without overriding set variables) on the first call.
+
+    Tests that change the environment call get_settings.cache_clear() to have it read again.
+    """
+    load_dotenv()
+    return Settings(
+        in_ci=os.getenv("CI") == "true" or os.getenv("GITHUB_ACTIONS") == "true",
+        repository_type=os.getenv("USER_REPOSITORY_TYPE", "json"),
+        database_url=os.getenv("DATABASE_URL"),
+        database_replica_urls=[
+            url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+        ],
+        secret_key=os.getenv("SECRET_KEY"),
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        youtube_api_key=os.getenv("YOUTUBE_API_KEY"),
+    )
@@ -0,0 +1,118 @@
+"""In-memory log of slow requests, with the breakdown of where their time went.
+
+Latency histograms show that the tail is slow, not why one particular request was. Every traced
+request (see utils/tracing.py) that takes at least SLOW_REQUEST_THRESHOLD_SECONDS is kept in a
+ring buffer of the last SLOW_REQUEST_LOG_SIZE such requests (0 turns the log off), with its stage
+timings and the facts recorded about it: transcript length, model, token counts, cache outcomes
+and retries. Admins read the buffer at /debug/slow.
+
+The buffer lives in the worker process: with several workers, each answers with its own slow
+requests.
+"""
+
+import os
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from utils.tracing import Span
+
+DEFAULT_SLOW_REQUEST_THRESHOLD_SECONDS = 5.0
+DEFAULT_SLOW_REQUEST_LOG_SIZE = 100
+# Stages kept per request at most, so a request with thousands of spans cannot bloat the buffer
+MAX_STAGES_PER_REQUEST = 100
+
+
+class SlowRequestLog:
+    """Ring buffer of the latest requests slower than a threshold; safe to use from any thread."""
+
+    def __init__(
+        self,
+        threshold_seconds: float = DEFAULT_SLOW_REQUEST_THRESHOLD_SECONDS,
+        max_entries: int = DEFAULT_SLOW_REQUEST_LOG_SIZE,
+    ):
+        """Initialize the log.
+
+        Args:
+            threshold_seconds: Requests taking at least this long are recorded.
+            max_entries: Requests kept; when full, the oldest is dropped. 0 records nothing.
+        """
+        self.threshold_seconds = threshold_seconds
+        self.max_entries = max_entries
+        self._entries: Deque[Dict[str, Any]] = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+
+    def record(self, root: "Span") -> bool:
+        """Record a finished request if it was slow.
+
+        Args:
+            root: The ended root span of the request; its trace holds the stages.
+        Returns: Whether the request was recorded.
+        """
+        if not self.max_entries or root.duration_ms < self.threshold_seconds * 1000:
+            return False
+        entry = slow_request_entry(root)
+        with self._lock:
+            self._entries.append(entry)
+        return True
+
+    def entries(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return the recorded requests, newest first, at most limit of them."""
+        with self._lock:
+            entries = list(reversed(self._entries))
+        return entries[:limit] if limit is not None else entries
+
+    def clear(self) -> None:
+        """Forget the recorded requests."""
+        with self._lock:
+            self._entries.clear()
+
+
+def slow_request_entry(root: "Span") -> Dict[str, Any]:
+    """Return the log entry of a request: its outcome, stage timings and request-level attributes."""
+    stages = sorted((span for span in root.trace.finished if span is not root), key=lambda span: span.start_ns)
+    status = root.attributes.get("http.status_code")
+    return {
+        "trace_id": root.trace.trace_id,
+        "name": root.name,
+        "method": root.attributes.get("http.method"),
+        "route": root.attributes.get("http.route"),
+        # An exception that escaped the application is answered with 500 by the server
+        "status": status if status is not None or root.error is None else 500,
+        "error": root.error,
+        "started_at": datetime.fromtimestamp(root.start_ns / 1e9, timezone.utc).isoformat(),
+        "duration_ms": round(root.duration_ms, 1),
+        "retries": root.trace.attributes.get("retries", 0),
+        "attributes": dict(root.trace.attributes),
+        "stages": [
+            {
+                "name": stage.name,
+                "offset_ms": round((stage.start_ns - root.start_ns) / 1e6, 1),
+                "duration_ms": round(stage.duration_ms, 1),
+                "error": stage.error,
+                "attributes": dict(stage.attributes),
+            }
+            for stage in stages[:MAX_STAGES_PER_REQUEST]
+        ],
+    }
+
+
+_slow_request_log: Optional[SlowRequestLog] = None
+_slow_request_log_lock = threading.Lock()
+
+
+def get_slow_request_log() -> SlowRequestLog:
+    """Return the worker's slow request log, configured by SLOW_REQUEST_THRESHOLD_SECONDS and SLOW_REQUEST_LOG_SIZE."""
+    global _slow_request_log
+    if _slow_request_log is None:
+        with _slow_request_log_lock:
+            if _slow_request_log is None:
+                _slow_request_log = SlowRequestLog(
+                    threshold_seconds=float(
+                        os.getenv("SLOW_REQUEST_THRESHOLD_SECONDS", DEFAULT_SLOW_REQUEST_THRESHOLD_SECONDS)
+                    ),
+                    max_entries=int(os.getenv("SLOW_REQUEST_LOG_SIZE", DEFAULT_SLOW_REQUEST_LOG_SIZE)),
+                )
+    return _slow_request_log
@@ -0,0 +1,74 @@
+"""SQLite utility module for the sqlite user repository backend.
+
+Each worker process gets its own engine (and therefore its own connections), created lazily after
+the fork. Every connection is switched to WAL journaling so readers never block the single writer.
+"""
+
+import logging
+import os
+import threading
+from typing import Dict, Tuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from models.summary import Summary  # noqa: F401 (registers the table, so create_all creates it)
+from models.text_dictionary import TextDictionary  # noqa: F401
+from models.user import Base
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SQLITE_DATABASE_PATH = "users.db"
+
+# sqlite3 keeps this many compiled (prepared) statements per connection
+SQLITE_CACHED_STATEMENTS = 256
+
+_session_factories: Dict[Tuple[int, str], sessionmaker] = {}
+_session_factories_lock = threading.Lock()
+
+
+def create_sqlite_engine(db_path: str) -> Engine:
+    """Create an engine for the SQLite database at db_path and make sure the schema exists.
+
+    Args:
+        db_path: Path of the SQLite database file.
+    Returns: A SQLAlchemy Engine with WAL journaling enabled on every connection.
+    """
+    engine = create_engine(
+        f"sqlite:///{db_path}",
+        connect_args={"check_same_thread": False, "cached_statements": SQLITE_CACHED_STATEMENTS},
+    )
+
+    @event.listens_for(engine, "connect")
+    def _configure_connection(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # NORMAL is durable across application crashes in WAL mode and avoids an fsync per commit
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    # The users table carries unique indexes on user_name and email
+    Base.metadata.create_all(engine)
+    logger.info(f"SQLite engine created for {db_path}")
+    return engine
+
+
+def get_sqlite_session_factory(db_path: str = DEFAULT_SQLITE_DATABASE_PATH) -> sessionmaker:
+    """Return this worker's sessionmaker for db_path, creating the engine on first use.
+
+    Factories are keyed by process id, so a forked worker never reuses its parent's connections.
+    Sessions do not expire objects on commit, so users returned by the repository stay usable after
+    their session is closed.
+    """
+    key = (os.getpid(), os.path.abspath(db_path))
+    with _session_factories_lock:
+        session_factory = _session_factories.get(key)
+        if session_factory is None:
+            session_factory = sessionmaker(
+                bind=create_sqlite_engine(db_path), autoflush=False, expire_on_commit=False
+            )
+            _session_factories[key] = session_factory
+        return session_factory
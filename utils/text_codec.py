@@ -0,0 +1,295 @@
+"""Storage codec compressing stored texts with zstd and trained, versioned dictionaries.
+
+Transcripts and summaries are small and share a lot of boilerplate, so compressing each record on
+its own gains little. A dictionary trained on a sample of them (see scripts/train_text_dictionary.py)
+primes the compressor with that shared content and gives much better ratios for small records.
+
+Blob format (the first byte selects it):
+- RAW: b"\\x00" + UTF-8 text, used when compression does not pay off and for migrated plain text.
+- ZSTD: b"\\x01" + dictionary id (4 bytes, big endian; 0 = no dictionary) + zstd frame.
+
+Dictionaries are kept forever next to the blobs: in the text_dictionaries table for the postgres and
+sqlite repository types, the newest row being the one used for new blobs, and for the json type in
+TEXT_DICTIONARY_DIR as dict-<id>.zdict files, with a CURRENT file naming the one used for new blobs.
+Readers load any dictionary a blob refers to, so retraining never breaks old blobs, and workers pick
+up a new current dictionary within DICTIONARY_REFRESH_SECONDS.
+"""
+
+import base64
+import logging
+import os
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Union
+
+import zstandard
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+from models.text_dictionary import TextDictionary
+from utils.db_routing import use_primary
+from utils.file_utils import atomic_write_bytes, atomic_write_text
+from utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+FORMAT_RAW = 0
+FORMAT_ZSTD = 1
+_ZSTD_HEADER = struct.Struct(">BI")
+
+DEFAULT_DICTIONARY_DIR = "zstd_dictionaries"
+DEFAULT_COMPRESSION_LEVEL = 3
+DEFAULT_DICTIONARY_SIZE = 112640
+DICTIONARY_REFRESH_SECONDS = 60.0
+CURRENT_FILE = "CURRENT"
+
+
+class DictionaryStore(ABC):
+    """Versioned zstd dictionaries; subclasses decide where they are kept."""
+
+    def __init__(self):
+        """Initialize the store."""
+        self._dictionaries: Dict[int, zstandard.ZstdCompressionDict] = {}
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _load(self, dict_id: int) -> Optional[bytes]:
+        """Return the bytes of the dictionary with dict_id, None if it is not in the store."""
+        pass
+
+    @abstractmethod
+    def _save(self, dict_id: int, data: bytes) -> None:
+        """Store a dictionary and make it the current one."""
+        pass
+
+    @abstractmethod
+    def current_id(self) -> Optional[int]:
+        """Return the id of the dictionary used for new blobs, or None if none was trained yet."""
+        pass
+
+    def get(self, dict_id: int) -> zstandard.ZstdCompressionDict:
+        """Return the dictionary with dict_id.
+
+        Raises: KeyError if the dictionary is not in the store.
+        """
+        with self._lock:
+            dictionary = self._dictionaries.get(dict_id)
+            if dictionary is None:
+                data = self._load(dict_id)
+                if data is None:
+                    raise KeyError(f"zstd dictionary {dict_id} is not in the store")
+                dictionary = zstandard.ZstdCompressionDict(data)
+                self._dictionaries[dict_id] = dictionary
+            return dictionary
+
+    def train(self, samples: List[str], dict_size: int = DEFAULT_DICTIONARY_SIZE) -> int:
+        """Train a dictionary on sample texts, save it and make it the current one.
+
+        Args:
+            samples: Representative texts (a few thousand work well; zstd needs at least a handful).
+            dict_size: Maximum size of the dictionary in bytes.
+        Returns: The id of the new dictionary.
+        """
+        dictionary = zstandard.train_dictionary(dict_size, [sample.encode("utf-8") for sample in samples])
+        dict_id = dictionary.dict_id()
+        self._save(dict_id, dictionary.as_bytes())
+        logger.info(f"Trained zstd dictionary {dict_id} on {len(samples)} samples")
+        return dict_id
+
+
+class FileDictionaryStore(DictionaryStore):
+    """Dictionaries in a directory, for the json repository type: dict-<id>.zdict files and CURRENT."""
+
+    def __init__(self, directory: str):
+        """Initialize the store.
+
+        Args:
+            directory: Directory of the dictionary files (created when the first dictionary is saved).
+        """
+        super().__init__()
+        self.directory = directory
+
+    def _path(self, dict_id: int) -> str:
+        return os.path.join(self.directory, f"dict-{dict_id}.zdict")
+
+    def _load(self, dict_id: int) -> Optional[bytes]:
+        try:
+            with open(self._path(dict_id), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def _save(self, dict_id: int, data: bytes) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        atomic_write_bytes(self._path(dict_id), data)
+        atomic_write_text(os.path.join(self.directory, CURRENT_FILE), str(dict_id))
+
+    def current_id(self) -> Optional[int]:
+        """Return the id named by the CURRENT file, or None if none was trained yet."""
+        try:
+            with open(os.path.join(self.directory, CURRENT_FILE)) as file:
+                return int(file.read().strip())
+        except FileNotFoundError:
+            return None
+
+
+class DatabaseDictionaryStore(DictionaryStore):
+    """Dictionaries in the text_dictionaries table, next to the blobs, for the postgres and sqlite types.
+
+    Every worker and host sees the same dictionaries as the database; the newest row is the current
+    one. Reads go to the primary, so a blob written with a new dictionary is never read on a replica
+    that has not received the dictionary yet.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        """Initialize the store.
+
+        Args:
+            session_factory: Callable returning a new SQLAlchemy session.
+        """
+        super().__init__()
+        self.session_factory = session_factory
+
+    def _load(self, dict_id: int) -> Optional[bytes]:
+        with self.session_factory() as session, use_primary(session):
+            return session.scalar(select(TextDictionary.dictionary).where(TextDictionary.dict_id == dict_id))
+
+    def _save(self, dict_id: int, data: bytes) -> None:
+        with self.session_factory() as session:
+            # Training the same samples again gives the same id: that dictionary becomes the newest again
+            session.merge(TextDictionary(dict_id=dict_id, dictionary=data, created_at=datetime.utcnow()))
+            session.commit()
+
+    def current_id(self) -> Optional[int]:
+        """Return the id of the newest dictionary, or None if none was trained yet."""
+        query = select(TextDictionary.dict_id).order_by(TextDictionary.created_at.desc()).limit(1)
+        with self.session_factory() as session, use_primary(session):
+            return session.scalar(query)
+
+
+class TextCodec:
+    """Encodes texts to blobs and back (thread-safe; compressors are kept per thread)."""
+
+    def __init__(self, dictionary_store: DictionaryStore, level: int = DEFAULT_COMPRESSION_LEVEL):
+        """Initialize the codec.
+
+        Args:
+            dictionary_store: Where the dictionaries are kept.
+            level: zstd compression level of new blobs.
+        """
+        self.dictionary_store = dictionary_store
+        self.level = level
+        self._local = threading.local()
+        self._current_id: Optional[int] = None
+        self._checked_at = float("-inf")
+
+    def _current_dict_id(self) -> int:
+        """Return the id of the dictionary for new blobs (0 for none), re-reading CURRENT now and then."""
+        now = time.monotonic()
+        if now - self._checked_at >= DICTIONARY_REFRESH_SECONDS:
+            self._current_id = self.dictionary_store.current_id()
+            self._checked_at = now
+        return self._current_id or 0
+
+    def _compressor(self, dict_id: int) -> zstandard.ZstdCompressor:
+        compressors = self._local.__dict__.setdefault("compressors", {})
+        compressor = compressors.get(dict_id)
+        if compressor is None:
+            dictionary = self.dictionary_store.get(dict_id) if dict_id else None
+            compressor = zstandard.ZstdCompressor(level=self.level, dict_data=dictionary, write_dict_id=False)
+            compressors[dict_id] = compressor
+        return compressor
+
+    def _decompressor(self, dict_id: int) -> zstandard.ZstdDecompressor:
+        decompressors = self._local.__dict__.setdefault("decompressors", {})
+        decompressor = decompressors.get(dict_id)
+        if decompressor is None:
+            dictionary = self.dictionary_store.get(dict_id) if dict_id else None
+            decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+            decompressors[dict_id] = decompressor
+        return decompressor
+
+    def encode(self, text: str) -> bytes:
+        """Compress text with the current dictionary (stored raw if that is smaller)."""
+        raw = text.encode("utf-8")
+        dict_id = self._current_dict_id()
+        frame = self._compressor(dict_id).compress(raw)
+        if _ZSTD_HEADER.size + len(frame) >= 1 + len(raw):
+            return bytes([FORMAT_RAW]) + raw
+        return _ZSTD_HEADER.pack(FORMAT_ZSTD, dict_id) + frame
+
+    def decode(self, blob: Union[bytes, memoryview, str]) -> str:
+        """Return the text of a blob from encode; plain strings (rows not migrated yet) pass through.
+
+        Raises: ValueError if the blob has an unknown format.
+        """
+        if isinstance(blob, str):
+            return blob
+        blob = bytes(blob)
+        if not blob:
+            return ""
+        if blob[0] == FORMAT_RAW:
+            return blob[1:].decode("utf-8")
+        if blob[0] == FORMAT_ZSTD:
+            _, dict_id = _ZSTD_HEADER.unpack_from(blob)
+            return self._decompressor(dict_id).decompress(blob[_ZSTD_HEADER.size:]).decode("utf-8")
+        raise ValueError(f"Unknown text blob format {blob[0]}")
+
+    def encode_str(self, text: str) -> str:
+        """Encode text for a JSON file (base64 of the blob)."""
+        return base64.b64encode(self.encode(text)).decode("ascii")
+
+    def decode_str(self, value: str) -> str:
+        """Decode a value from encode_str."""
+        return self.decode(base64.b64decode(value))
+
+
+_text_codec: Optional[TextCodec] = None
+_text_codec_lock = threading.Lock()
+
+
+def get_text_codec() -> TextCodec:
+    """Return the process-wide codec, with the dictionaries of the repository type and TEXT_COMPRESSION_LEVEL."""
+    global _text_codec
+    with _text_codec_lock:
+        if _text_codec is None:
+            _text_codec = TextCodec(
+                _default_dictionary_store(),
+                level=int(os.getenv("TEXT_COMPRESSION_LEVEL", DEFAULT_COMPRESSION_LEVEL)),
+            )
+        return _text_codec
+
+
+def _default_dictionary_store() -> DictionaryStore:
+    """Return the dictionary store of USER_REPOSITORY_TYPE: the database's table, or TEXT_DICTIONARY_DIR for json."""
+    repository_type = "json" if get_settings().in_ci else os.getenv("USER_REPOSITORY_TYPE", "json")
+    # Imported here: db_utils needs DATABASE_URL, and sqlite_utils imports the models, which import this module
+    if repository_type == "postgres":
+        from utils import db_utils
+        return DatabaseDictionaryStore(db_utils.SessionLocal)
+    if repository_type == "sqlite":
+        from utils.sqlite_utils import DEFAULT_SQLITE_DATABASE_PATH, get_sqlite_session_factory
+        return DatabaseDictionaryStore(
+            get_sqlite_session_factory(os.getenv("SQLITE_DATABASE_PATH", DEFAULT_SQLITE_DATABASE_PATH))
+        )
+    return FileDictionaryStore(os.getenv("TEXT_DICTIONARY_DIR", DEFAULT_DICTIONARY_DIR))
+
+
+class CompressedText(TypeDecorator):
+    """Column type storing text as a blob of the process-wide TextCodec (bytea on Postgres, BLOB on SQLite).
+
+    Python code sees str values; only the database sees the compressed bytes.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[bytes]:
+        return get_text_codec().encode(value) if value is not None else None
+
+    def process_result_value(self, value: Optional[bytes], dialect) -> Optional[str]:
+        return get_text_codec().decode(value) if value is not None else None
@@ -1,5 +1,5 @@
 import re
-from typing import Optional
+from typing import List, Optional
 
 
 def extract_video_id(input_string: str) -> Optional[str]:
@@ -33,3 +33,13 @@ def word_count(s: str) -> int:
     Returns: Number of words in the input string.
     """
     return len(re.findall(r"\w+", s))
+
+
+def clean_transcript_words(text: str) -> List[str]:
+    """Normalize a transcript to its lowercase words, dropping annotations such as [Music] or (applause).
+
+    Args:
+        text: The transcript text.
+    Returns: The words of the spoken text, in order.
+    """
+    return re.findall(r"\w+", re.sub(r"\[[^\]]*\]|\([^)]*\)", " ", text).lower())
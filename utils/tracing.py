@@ -0,0 +1,351 @@
+"""Lightweight request tracing: spans per stage, Server-Timing headers and OTLP/JSON export.
+
+TracingMiddleware opens a root span for every HTTP request, continuing the trace of an incoming
+W3C traceparent header. Code wraps its stages in span(...); spans nest through a context
+variable, which is copied into worker threads (run_in_threadpool, bulkheads), so spans opened by
+services and repositories land in the request's trace as well. The trace ends when the response
+has been sent; background tasks run after that are not part of it.
+
+When the response starts, the spans finished so far are sent to the client in a Server-Timing
+header (name;dur=milliseconds), so frontends see where their latency went. If
+OTEL_EXPORTER_OTLP_ENDPOINT is set (e.g. http://localhost:4318, see scripts/trace_collector.py),
+the finished trace is also posted in the OTLP/JSON format to <endpoint>/v1/traces by a
+background thread, dropping traces rather than slowing requests when the collector lags.
+
+Facts about the request as a whole (transcript length, cache outcomes, retries) are recorded with
+annotate(...) and count(...); they end up on the root span and in the slow request log
+(see utils/slow_requests.py).
+"""
+
+import json
+import logging
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.slow_requests import get_slow_request_log
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_HEADER = "traceparent"
+# Spans listed in Server-Timing at most, to keep the header small
+MAX_SERVER_TIMING_SPANS = 30
+# Traces waiting for the exporter thread (more are dropped), and traces sent per request
+EXPORT_QUEUE_SIZE = 1000
+EXPORT_BATCH_SIZE = 50
+EXPORT_TIMEOUT_SECONDS = 5.0
+DEFAULT_SERVICE_NAME = "yt-transcript-summarizer"
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_CODE_ERROR = 2
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    def __init__(self, name: str, trace: "Trace", parent_id: Optional[str], kind: int = SPAN_KIND_INTERNAL):
+        """Start the span.
+
+        Args:
+            name: The operation, e.g. "transcript" or "database.add".
+            trace: The trace the span belongs to.
+            parent_id: The span id of the parent, None for the root of a new trace.
+            kind: The OTLP span kind.
+        """
+        self.name = name
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    @property
+    def duration_ms(self) -> float:
+        """The duration in milliseconds (so far, if the span has not ended)."""
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Attach a string, number or boolean to the span."""
+        self.attributes[key] = value
+
+    def end(self) -> None:
+        """End the span and add it to the trace's finished spans."""
+        self.end_ns = time.time_ns()
+        self.trace.finished.append(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Return the span in the OTLP/JSON format."""
+        otlp = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+        }
+        if self.parent_id:
+            otlp["parentSpanId"] = self.parent_id
+        if self.error is not None:
+            otlp["status"] = {"code": STATUS_CODE_ERROR, "message": self.error}
+        return otlp
+
+
+class Trace:
+    """The spans of one request; spans from worker threads are appended too (list.append is atomic)."""
+
+    def __init__(self, trace_id: Optional[str] = None, sampled: bool = True):
+        """Initialize the trace.
+
+        Args:
+            trace_id: The id of the caller's trace, None to start a new one.
+            sampled: Whether the trace is exported (the caller's sampled flag).
+        """
+        self.trace_id = trace_id or secrets.token_hex(16)
+        self.sampled = sampled
+        self.finished: List[Span] = []
+        # Request-level attributes, see annotate and count
+        self.attributes: Dict[str, Any] = {}
+        # Set once the response has been sent; work after that (background tasks) is not traced
+        self.ended = False
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Trace the block as a child of the current span; a no-op outside a traced request.
+
+    Args:
+        name: The operation.
+        attributes: Attributes of the span.
+    Yields: The span, None outside a traced request.
+    """
+    parent = current_span()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, parent.trace, parent.span_id)
+    child.attributes.update(attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        child.end()
+
+
+def annotate(**attributes: Any) -> None:
+    """Record facts about the current request as a whole; a no-op outside a traced request."""
+    current = current_span()
+    if current is not None:
+        current.trace.attributes.update(attributes)
+
+
+def count(name: str, amount: int = 1) -> None:
+    """Add amount to a counter of the current request (e.g. "retries"); a no-op outside a traced request."""
+    current = current_span()
+    if current is not None:
+        attributes = current.trace.attributes
+        attributes[name] = attributes.get(name, 0) + amount
+
+
+def current_span() -> Optional[Span]:
+    """Return the innermost open span, None outside a traced request or after its response was sent."""
+    current = _current_span.get()
+    return current if current is not None and not current.trace.ended else None
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """Parse a W3C traceparent header.
+
+    Returns: The trace id, the parent span id and the sampled flag, None if the header is missing or invalid.
+    """
+    match = _TRACEPARENT.match((value or "").strip().lower())
+    if match is None or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+def format_traceparent(root: Span) -> str:
+    """Return the traceparent header identifying a span, for the caller or downstream services."""
+    return f"00-{root.trace.trace_id}-{root.span_id}-{'01' if root.trace.sampled else '00'}"
+
+
+def server_timing(spans: List[Span], root: Span) -> str:
+    """Return the Server-Timing header value for the finished spans of a request.
+
+    Lists each span with its duration in milliseconds, the whole request as "total", and the
+    request's traceparent (as the description of a "traceparent" entry) to look the trace up.
+    """
+    entries = [f"{_timing_name(finished.name)};dur={finished.duration_ms:.1f}"
+               for finished in spans[:MAX_SERVER_TIMING_SPANS]]
+    entries.append(f"total;dur={root.duration_ms:.1f}")
+    entries.append(f'traceparent;desc="{format_traceparent(root)}"')
+    return ", ".join(entries)
+
+
+def _timing_name(name: str) -> str:
+    """Turn a span name into a Server-Timing metric name (an HTTP token)."""
+    return re.sub(r"[^A-Za-z0-9!#$%&'*+.^_`|~-]", "_", name) or "span"
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class OtlpJsonExporter:
+    """Posts finished traces to an OTLP/HTTP collector in the JSON encoding, from a background thread."""
+
+    def __init__(self, endpoint: str, service_name: str = DEFAULT_SERVICE_NAME):
+        """Initialize the exporter.
+
+        Args:
+            endpoint: The collector's base URL; traces are posted to <endpoint>/v1/traces.
+            service_name: The service.name resource attribute.
+        """
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self._queue: "queue.Queue[List[Span]]" = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, spans: List[Span]) -> None:
+        """Queue a finished trace for export, dropping it if the queue is full."""
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            logger.warning("Trace export queue is full, dropping a trace")
+
+    def payload(self, spans: List[Span]) -> Dict[str, Any]:
+        """Return the OTLP/JSON export request for spans."""
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": [span.to_otlp() for span in spans]}],
+            }]
+        }
+
+    def _run(self) -> None:
+        while True:
+            traces = [self._queue.get()]
+            # Send the traces that are waiting as well, in one request
+            while len(traces) < EXPORT_BATCH_SIZE:
+                try:
+                    traces.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            spans = [span for trace in traces for span in trace]
+            request = urllib.request.Request(
+                self.url,
+                data=json.dumps(self.payload(spans)).encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+                method="POST",
+            )
+            try:
+                urllib.request.urlopen(request, timeout=EXPORT_TIMEOUT_SECONDS).close()
+            except Exception as e:
+                logger.warning(f"Could not export {len(spans)} spans to {self.url}: {e}")
+
+
+_exporter: Optional[OtlpJsonExporter] = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter() -> Optional[OtlpJsonExporter]:
+    """Return the worker's exporter, None if OTEL_EXPORTER_OTLP_ENDPOINT is not set."""
+    global _exporter
+    endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+    if not endpoint:
+        return None
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                _exporter = OtlpJsonExporter(endpoint, os.getenv("OTEL_SERVICE_NAME", DEFAULT_SERVICE_NAME))
+    return _exporter
+
+
+class TracingMiddleware:
+    """Traces every HTTP request and adds the Server-Timing header to its response."""
+
+    def __init__(self, app: ASGIApp):
+        """Initialize the middleware with the application it wraps."""
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        incoming = parse_traceparent(headers.get(TRACEPARENT_HEADER.encode(), b"").decode("latin-1"))
+        trace = Trace(incoming[0], incoming[2]) if incoming else Trace()
+        root = Span(f"{scope['method']} {scope['path']}", trace, incoming[1] if incoming else None, SPAN_KIND_SERVER)
+        root.set_attribute("http.method", scope["method"])
+        token = _current_span.set(root)
+
+        finished = False
+
+        def finish() -> None:
+            nonlocal finished
+            finished = True
+            # The router stores the matched route in the scope; its template groups the traces
+            route = getattr(scope.get("route"), "path", None)
+            if route is not None:
+                root.name = f"{scope['method']} {route}"
+                root.set_attribute("http.route", route)
+            root.attributes.update(trace.attributes)
+            root.end()
+            # Background tasks still see the root span in their context; they must not add to a sent trace
+            trace.ended = True
+            get_slow_request_log().record(root)
+            exporter = get_exporter()
+            if exporter is not None and trace.sampled:
+                exporter.export(trace.finished)
+
+        async def send_with_server_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+                response_headers = MutableHeaders(scope=message)
+                response_headers.append("Server-Timing", server_timing(list(trace.finished), root))
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False) and not finished:
+                # The client has its answer; background tasks run after this and are not part of the request
+                finish()
+
+        try:
+            await self.app(scope, receive, send_with_server_timing)
+        except BaseException as e:
+            root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            # Responses that never finished (errors, disconnects) end when the application returns
+            if not finished:
+                finish()
@@ -0,0 +1,236 @@
+"""Per-worker cache of User rows, invalidated across workers through Postgres LISTEN/NOTIFY.
+
+UserDBRepository sends a NOTIFY on the user_changes channel inside every write transaction, so the
+notification is delivered exactly when the change commits. Every worker runs a listener thread on a
+dedicated connection that drops the changed user from its cache. The TTL bounds staleness if a
+notification is ever lost; on reconnect the listener clears the whole cache for the same reason.
+
+Configuration:
+- USER_CACHE_TTL_SECONDS: lifetime of cached users, 0 disables the cache (default 30)
+- USER_CACHE_MAX_ENTRIES: users kept per worker (default 10000)
+"""
+
+import json
+import logging
+import select
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from sqlalchemy import text
+
+from models.user import User
+from utils.db_routing import mark_written
+from utils.metrics import USER_CACHE_INVALIDATIONS, USER_CACHE_REQUESTS
+from utils.tracing import count
+
+logger = logging.getLogger(__name__)
+
+USER_CHANGES_CHANNEL = "user_changes"
+DEFAULT_USER_CACHE_TTL_SECONDS = 30.0
+DEFAULT_USER_CACHE_MAX_ENTRIES = 10000
+LISTENER_RECONNECT_SECONDS = 5.0
+
+
+class UserCache:
+    """LRU cache of users by user_name, email and user_id with a TTL.
+
+    Users are stored as dictionaries and handed out as fresh User objects, so callers can modify
+    what they get without affecting the cache.
+    """
+
+    def __init__(
+        self, ttl_seconds: float = DEFAULT_USER_CACHE_TTL_SECONDS, max_entries: int = DEFAULT_USER_CACHE_MAX_ENTRIES
+    ):
+        """Initialize the cache.
+
+        Args:
+            ttl_seconds: Seconds a user stays cached.
+            max_entries: Maximum number of cached users; the least recently used are evicted first.
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[float, Dict]]" = OrderedDict()
+        self._keys: Dict[Hashable, int] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        """Counter bumped on every invalidation; pass it to put() to avoid caching rows read before one."""
+        return self._generation
+
+    def get(self, field: str, value: Any) -> Optional[User]:
+        """Return the cached user whose field (user_name, email or user_id) equals value, or None."""
+        now = time.monotonic()
+        with self._lock:
+            user_id = value if field == "user_id" else self._keys.get((field, value))
+            entry = self._entries.get(user_id) if user_id is not None else None
+            if entry is not None and entry[0] <= now:
+                self._remove(user_id)
+                entry = None
+            if entry is None:
+                USER_CACHE_REQUESTS.labels(result="miss").inc()
+                count("user_cache.miss")
+                return None
+            self._entries.move_to_end(user_id)
+        USER_CACHE_REQUESTS.labels(result="hit").inc()
+        count("user_cache.hit")
+        return User.from_dict(entry[1])
+
+    def put(self, user: Optional[User], generation: Optional[int] = None) -> None:
+        """Cache user (misses are never cached, so new users show up immediately).
+
+        Args:
+            user: The user read from the repository.
+            generation: The value of generation before the user was read; if an invalidation happened
+                since, the user may be outdated and is not cached.
+        """
+        if user is None or user.user_id is None:
+            return
+        data = user.to_dict()
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._remove(user.user_id)
+            self._entries[user.user_id] = (time.monotonic() + self.ttl_seconds, data)
+            self._keys[("user_name", data["user_name"])] = user.user_id
+            self._keys[("email", data["email"])] = user.user_id
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(
+        self, user_id: Optional[int] = None, user_name: Optional[str] = None, email: Optional[str] = None,
+        source: str = "local",
+    ) -> None:
+        """Drop the user identified by any of user_id, user_name or email.
+
+        Args:
+            user_id: ID of the changed user.
+            user_name: User name of the changed user.
+            email: Email of the changed user.
+            source: "local" for writes in this worker, "notify" for notifications (metrics label).
+        """
+        with self._lock:
+            self._generation += 1
+            user_ids = {user_id, self._keys.get(("user_name", user_name)), self._keys.get(("email", email))}
+            for cached_id in user_ids - {None}:
+                self._remove(cached_id)
+        USER_CACHE_INVALIDATIONS.labels(source=source).inc()
+
+    def clear(self) -> None:
+        """Drop all cached users."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._keys.clear()
+
+    def _remove(self, user_id: int) -> None:
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self._keys.pop(("user_name", entry[1]["user_name"]), None)
+            self._keys.pop(("email", entry[1]["email"]), None)
+
+
+def user_change_payload(user: User) -> str:
+    """Return the NOTIFY payload identifying user."""
+    return json.dumps({"user_id": user.user_id, "user_name": user.user_name, "email": user.email})
+
+
+def notify_user_change(session: Any, user: User) -> None:
+    """Queue a user_changes notification in session's transaction (Postgres only).
+
+    Postgres delivers the notification when the transaction commits and drops it on rollback, so
+    listeners never invalidate for a change that did not happen.
+    """
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    session.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": USER_CHANGES_CHANNEL, "payload": user_change_payload(user)},
+    )
+
+
+async def notify_user_change_async(session: Any, user: User) -> None:
+    """Async counterpart of notify_user_change for AsyncSession objects."""
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    await session.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": USER_CHANGES_CHANNEL, "payload": user_change_payload(user)},
+    )
+
+
+def handle_user_change(cache: UserCache, payload: str) -> None:
+    """Invalidate the user described by a user_changes payload.
+
+    The user's keys are also pinned to the primary for the replica staleness budget, so the next
+    lookup does not fill the cache from a replica that has not replayed the change yet.
+    """
+    try:
+        change = json.loads(payload)
+    except ValueError:
+        logger.warning(f"Ignoring malformed {USER_CHANGES_CHANNEL} payload: {payload!r}")
+        cache.clear()
+        return
+    user_id, user_name, email = change.get("user_id"), change.get("user_name"), change.get("email")
+    mark_written(("user_name", user_name), ("email", email), ("user_id", user_id))
+    cache.invalidate(user_id=user_id, user_name=user_name, email=email, source="notify")
+
+
+class UserChangeListener:
+    """Background thread LISTENing on user_changes and invalidating a UserCache."""
+
+    def __init__(self, database_url: str, cache: UserCache):
+        """Initialize the listener.
+
+        Args:
+            database_url: Postgres URL (SQLAlchemy or libpq form) of the primary.
+            cache: The cache to invalidate.
+        """
+        self.database_url = database_url
+        self.cache = cache
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start listening in a daemon thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="user-cache-listener", daemon=True)
+            self._thread.start()
+
+    def _connect(self):
+        import psycopg2
+        from sqlalchemy.engine import make_url
+
+        url = make_url(self.database_url).set(drivername="postgresql")
+        connection = psycopg2.connect(url.render_as_string(hide_password=False))
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {USER_CHANGES_CHANNEL}")
+        return connection
+
+    def _run(self) -> None:
+        while True:
+            connection = None
+            try:
+                connection = self._connect()
+                # Changes made while we were not listening went unnoticed
+                self.cache.clear()
+                logger.info(f"Listening for {USER_CHANGES_CHANNEL} notifications")
+                while True:
+                    if select.select([connection], [], [], LISTENER_RECONNECT_SECONDS) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        handle_user_change(self.cache, connection.notifies.pop(0).payload)
+            except Exception as e:
+                logger.warning(f"User cache listener failed, reconnecting: {str(e)}")
+                self.cache.clear()
+                time.sleep(LISTENER_RECONNECT_SECONDS)
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
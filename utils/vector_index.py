@@ -0,0 +1,203 @@
+"""Memory-mapped matrix of hashed term vectors answering top-k similarity queries with NumPy.
+
+Each document is turned into a fixed-size vector with the hashing trick: every term is hashed to
+one of `dimensions` buckets (with a hashed sign, so collisions cancel out on average) and weighted
+by 1 + log(term frequency); the vector is L2-normalized. No vocabulary has to be kept or grown.
+
+The vectors are rows of a float32 matrix in a file mapped with numpy.memmap, so every worker shares
+them through the page cache and the index does not have to fit into the Python heap. A sidecar JSONL
+file lists the key and metadata of each row; a row only counts once its line has been appended,
+which makes the append the commit point. Document frequencies per bucket are kept in a second
+memmap, and inverse document frequencies, which change as the corpus grows, are applied to the
+query vector only, so stored rows never have to be rewritten.
+
+A query is a single matrix-vector product over all rows followed by numpy.argpartition for the
+top k, instead of a Python loop over documents.
+"""
+
+import math
+import os
+import threading
+import zlib
+from typing import ClassVar, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.file_utils import append_jsonl, file_lock, read_jsonl, read_signature
+from utils.inverted_index import tokenize
+
+DEFAULT_DIMENSIONS = 1024
+# Rows allocated when the matrix file is created; it doubles whenever it is full
+INITIAL_CAPACITY = 1024
+
+VECTORS_FILE = "vectors.f32"
+DOCUMENT_FREQUENCIES_FILE = "df.i32"
+ROWS_FILE = "rows.jsonl"
+LOCK_FILE = ".lock"
+
+
+def hash_term(term: str, dimensions: int) -> Tuple[int, float]:
+    """Return the bucket and sign of a term (stable across processes, unlike hash())."""
+    value = zlib.crc32(term.encode("utf-8"))
+    return value % dimensions, 1.0 if value & 0x80000000 else -1.0
+
+
+def vectorize(text: str, dimensions: int) -> np.ndarray:
+    """Return the L2-normalized hashed term-frequency vector of text (all zeros if it has no terms)."""
+    counts: Dict[str, int] = {}
+    for term in tokenize(text):
+        counts[term] = counts.get(term, 0) + 1
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for term, count in counts.items():
+        bucket, sign = hash_term(term, dimensions)
+        vector[bucket] += sign * (1.0 + math.log(count))
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+class VectorIndex:
+    """Vectors of documents identified by a key, in the memory-mapped files of a directory.
+
+    Writers serialize on an inter-process file lock; readers in other workers pick up new rows the
+    next time they look at the sidecar file.
+    """
+
+    _shared_instances: ClassVar[Dict[str, "VectorIndex"]] = {}
+    _shared_instances_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(self, directory: str, dimensions: int = DEFAULT_DIMENSIONS):
+        """Initialize the index.
+
+        Args:
+            directory: Directory of the index files (created on first write).
+            dimensions: Length of the vectors; must not change for an existing index.
+        """
+        self.directory = directory
+        self.dimensions = dimensions
+        self.vectors_path = os.path.join(directory, VECTORS_FILE)
+        self.document_frequencies_path = os.path.join(directory, DOCUMENT_FREQUENCIES_FILE)
+        self.rows_path = os.path.join(directory, ROWS_FILE)
+        self.lock_path = os.path.join(directory, LOCK_FILE)
+        self._lock = threading.RLock()
+        self._offset = 0
+        self._rows: List[Dict] = []
+        self._row_by_key: Dict[str, int] = {}
+        self._vectors: Optional[np.memmap] = None
+        self._document_frequencies: Optional[np.memmap] = None
+
+    @classmethod
+    def shared(cls, directory: str, dimensions: int = DEFAULT_DIMENSIONS) -> "VectorIndex":
+        """Return the process-wide index for directory."""
+        key = os.path.abspath(directory)
+        with cls._shared_instances_lock:
+            index = cls._shared_instances.get(key)
+            if index is None:
+                index = cls(directory, dimensions)
+                cls._shared_instances[key] = index
+            return index
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._rows)
+
+    def _refresh(self) -> None:
+        """Read the rows appended since the last refresh and map the files (caller holds the thread lock)."""
+        signature = read_signature(self.rows_path)
+        if signature is not None and signature[1] != self._offset:
+            records, self._offset = read_jsonl(self.rows_path, self._offset)
+            for record in records:
+                self._row_by_key[record["key"]] = len(self._rows)
+                self._rows.append(record)
+        if self._rows and (self._vectors is None or self._vectors.shape[0] < len(self._rows)):
+            self._map()
+
+    def _map(self) -> None:
+        """(Re)map the matrix after another process or this one grew it (caller holds the thread lock)."""
+        rows = os.path.getsize(self.vectors_path) // (4 * self.dimensions)
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(rows, self.dimensions))
+        self._document_frequencies = np.memmap(
+            self.document_frequencies_path, dtype=np.int32, mode="r+", shape=(self.dimensions,)
+        )
+
+    def _ensure_capacity(self, rows: int) -> None:
+        """Grow the matrix file to hold at least rows rows (caller holds both locks)."""
+        if not os.path.exists(self.document_frequencies_path):
+            with open(self.document_frequencies_path, "wb") as file:
+                file.truncate(4 * self.dimensions)
+        row_bytes = 4 * self.dimensions
+        capacity = os.path.getsize(self.vectors_path) // row_bytes if os.path.exists(self.vectors_path) else 0
+        if capacity < rows:
+            with open(self.vectors_path, "ab") as file:
+                # Extending the file fills it with zeros (sparse where the file system allows)
+                file.truncate(row_bytes * max(INITIAL_CAPACITY, 2 * capacity, rows))
+            self._vectors = None
+        if self._vectors is None or self._vectors.shape[0] < rows:
+            self._map()
+
+    def add(self, key: str, text: str, metadata: Optional[Dict] = None) -> bool:
+        """Add the vector of text under key, unless key is indexed already.
+
+        Args:
+            key: Identifies the document (e.g. a video id).
+            text: The document text.
+            metadata: JSON-serializable data returned with query results.
+        Returns: True if the document was added.
+        """
+        vector = vectorize(text, self.dimensions)
+        if not vector.any():
+            return False
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock, file_lock(self.lock_path):
+            self._refresh()
+            if key in self._row_by_key:
+                return False
+            row = len(self._rows)
+            self._ensure_capacity(row + 1)
+            self._vectors[row] = vector
+            self._vectors.flush()
+            self._document_frequencies[np.flatnonzero(vector)] += 1
+            self._document_frequencies.flush()
+            record = {"key": key, **(metadata or {})}
+            self._offset = append_jsonl(self.rows_path, [record], self._offset)
+            self._row_by_key[key] = row
+            self._rows.append(record)
+            return True
+
+    def get_metadata(self, key: str) -> Optional[Dict]:
+        """Return the metadata stored with key, or None if key is not indexed."""
+        with self._lock:
+            self._refresh()
+            row = self._row_by_key.get(key)
+            return self._rows[row] if row is not None else None
+
+    def query_key(self, key: str, limit: int) -> Optional[List[Tuple[Dict, float]]]:
+        """Return the limit documents most similar to the indexed document key, best first.
+
+        Similarity is the cosine between the stored vectors with IDF weights applied to the query side.
+
+        Returns: (metadata, similarity) pairs without key itself, or None if key is not indexed.
+        """
+        with self._lock:
+            self._refresh()
+            row = self._row_by_key.get(key)
+            if row is None:
+                return None
+            count = len(self._rows)
+            # Views keep their mapping alive even if the matrix is remapped while we compute
+            matrix = self._vectors[:count]
+            document_frequencies = np.array(self._document_frequencies)
+            rows = self._rows
+        idf = np.log((1 + count) / (1 + document_frequencies)).astype(np.float32) + 1.0
+        query = matrix[row] * idf
+        query /= np.linalg.norm(query)
+        scores = matrix @ query
+        scores[row] = -np.inf
+        limit = min(limit, count - 1)
+        if limit <= 0:
+            return []
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [(rows[index], float(scores[index])) for index in top]